@@ -2,13 +2,31 @@
 FastAPI application factory
 """
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import router
+from fastapi.responses import JSONResponse, Response
+from app import config
+from app.cache import ResponseCacheMiddleware
+from app.encoding import FastJSONResponse
+from app.executor import ExecutorSaturatedError
+from app.metrics import MetricsMiddleware
+from app.routes import router, admin_router, analytics_router, ontology_manager, response_cache, graph_version, service_metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the ontology file watcher for the lifetime of the app"""
+    ontology_manager.start_watcher(config.WATCH_INTERVAL)
+    yield
+    ontology_manager.stop_watcher()
+
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application"""
     app = FastAPI(
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
         title="Music Ontology API",
         description="API for semantic search in music ontologies",
         version="1.0.0",
@@ -17,6 +35,19 @@ def create_app() -> FastAPI:
         openapi_url="/openapi.json"
     )
     
+    # Serve repeated reads from the response cache (inside CORS, so CORS headers are never cached)
+    if config.RESPONSE_CACHE_ENABLED:
+        app.add_middleware(ResponseCacheMiddleware, cache=response_cache, version=graph_version)
+    
+    # Per-route latency, in-flight requests and graph work per request (wraps the cache, so hits are measured too)
+    if config.METRICS_ENABLED:
+        app.add_middleware(
+            MetricsMiddleware,
+            metrics=service_metrics,
+            router=app.router,
+            slow_seconds=config.SLOW_REQUEST_SECONDS
+        )
+    
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -26,14 +57,35 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
-    # Health check
+    # Shed load when a query lane is full instead of queueing without bound
+    @app.exception_handler(ExecutorSaturatedError)
+    async def executor_saturated_handler(request: Request, exc: ExecutorSaturatedError):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(config.QUERY_RETRY_AFTER)}
+        )
+    
+    # Health check (runs on the event loop, never waits behind graph queries)
     @app.get("/health")
-    def health_check():
+    async def health_check():
         """Health check endpoint"""
         return {"status": "healthy"}
     
+    # Prometheus scrape endpoint
+    if config.METRICS_ENABLED:
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics():
+            """Metrics in Prometheus text format"""
+            return Response(
+                content=service_metrics.render(),
+                media_type="text/plain; version=0.0.4; charset=utf-8"
+            )
+    
     # Include routers
     app.include_router(router)
+    app.include_router(admin_router)
+    app.include_router(analytics_router)
     
     return app
 
@@ -0,0 +1,203 @@
+"""
+Adyacencias - Índices CSR de enteros por propiedad de objeto y su inversa
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from rdflib import Graph, URIRef
+
+
+class CSRAdjacency:
+    """
+    Lista de adyacencia en formato CSR (compressed sparse row)
+
+    Los vecinos del nodo i son `targets[offsets[i]:offsets[i + 1]]`. Las
+    filas modificadas después de construir el índice se guardan en un
+    diccionario aparte que tiene prioridad sobre los arrays.
+    """
+
+    def __init__(self):
+        self.offsets = array("I", [0])
+        self.targets = array("I")
+        self._overlay: Dict[int, Tuple[int, ...]] = {}
+
+    def build(self, rows: Dict[int, List[int]], size: int):
+        """
+        Construir los arrays a partir de las filas
+
+        Args:
+            rows: Mapa nodo -> vecinos (en orden)
+            size: Número de nodos (identificadores 0..size-1)
+        """
+        offsets = array("I", [0]) * (size + 1)
+        targets = array("I")
+        for node in range(size):
+            row = rows.get(node)
+            if row:
+                targets.extend(row)
+            offsets[node + 1] = len(targets)
+        self.offsets = offsets
+        self.targets = targets
+        self._overlay = {}
+
+    def row(self, node: int) -> Iterable[int]:
+        """Vecinos de un nodo"""
+        overlay = self._overlay.get(node)
+        if overlay is not None:
+            return overlay
+        if node + 1 >= len(self.offsets):
+            return ()
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def set_row(self, node: int, neighbors: Iterable[int]):
+        """Sustituir los vecinos de un nodo (p. ej. tras un delta)"""
+        self._overlay[node] = tuple(neighbors)
+
+    def overridden(self) -> Iterable[int]:
+        """Nodos cuyas filas se sustituyeron después de construir los arrays"""
+        return list(self._overlay)
+
+
+class AdjacencyIndex:
+    """
+    Adyacencias de varias propiedades de objeto con identificadores enteros
+
+    Cada URI se interna una vez; por cada propiedad se guarda la adyacencia
+    directa (sujeto -> objetos) y la inversa (objeto -> sujetos). Los vecinos
+    conservan el orden en que el grafo los devuelve, así que las consultas
+    dan el mismo resultado que recorrer el grafo con `objects`/`subjects`.
+    """
+
+    def __init__(self, graph: Graph, properties: Dict[str, URIRef]):
+        """
+        Args:
+            graph: Grafo RDF de origen
+            properties: Mapa nombre -> propiedad de objeto indexada
+        """
+        self.graph = graph
+        self.properties = properties
+        self._ids: Dict[URIRef, int] = {}
+        self._terms: List[URIRef] = []
+        self._forward: Dict[str, CSRAdjacency] = {}
+        self._inverse: Dict[str, CSRAdjacency] = {}
+
+    def _intern(self, term: URIRef) -> int:
+        node = self._ids.get(term)
+        if node is None:
+            node = len(self._terms)
+            self._ids[term] = node
+            self._terms.append(term)
+        return node
+
+    def build(self):
+        """Construir las adyacencias de todas las propiedades"""
+        graph = self.graph
+        rows: Dict[Tuple[str, bool], Dict[int, List[int]]] = {}
+        for name, prop in self.properties.items():
+            forward: Dict[int, List[int]] = {}
+            for subject in set(graph.subjects(prop, None)):
+                forward[self._intern(subject)] = [
+                    self._intern(obj) for obj in graph.objects(subject, prop)
+                    if isinstance(obj, URIRef)
+                ]
+            inverse: Dict[int, List[int]] = {}
+            for obj in set(graph.objects(None, prop)):
+                if isinstance(obj, URIRef):
+                    inverse[self._intern(obj)] = [
+                        self._intern(subject) for subject in graph.subjects(prop, obj)
+                    ]
+            rows[(name, False)] = forward
+            rows[(name, True)] = inverse
+
+        for name in self.properties:
+            self._forward[name] = CSRAdjacency()
+            self._forward[name].build(rows[(name, False)], len(self._terms))
+            self._inverse[name] = CSRAdjacency()
+            self._inverse[name].build(rows[(name, True)], len(self._terms))
+
+    def __len__(self) -> int:
+        """Número de URIs internadas (los identificadores van de 0 a len - 1)"""
+        return len(self._terms)
+
+    def node(self, uri: URIRef) -> Optional[int]:
+        """Identificador entero de una URI (None si no aparece en ninguna adyacencia)"""
+        return self._ids.get(uri)
+
+    def term(self, node: int) -> URIRef:
+        """URI de un identificador entero"""
+        return self._terms[node]
+
+    def csr(self, name: str, inverse: bool = False) -> CSRAdjacency:
+        """Adyacencia de una propiedad en un sentido"""
+        return (self._inverse if inverse else self._forward)[name]
+
+    def neighbors(self, name: str, uri: URIRef, inverse: bool = False) -> List[URIRef]:
+        """
+        Vecinos de una URI por una propiedad
+
+        Args:
+            name: Nombre de la propiedad indexada
+            uri: URI de partida
+            inverse: Recorrer la propiedad en sentido inverso (objeto -> sujetos)
+        """
+        node = self.node(uri)
+        if node is None:
+            return []
+        adjacency = (self._inverse if inverse else self._forward)[name]
+        term = self.term
+        return [term(target) for target in adjacency.row(node)]
+
+    def path(
+        self,
+        uri: URIRef,
+        steps: Iterable[Tuple[str, bool]],
+        max_nodes: Optional[int] = None,
+        distinct: bool = False
+    ) -> List[URIRef]:
+        """
+        Recorrido de varios saltos (p. ej. artista -> álbumes -> canciones)
+
+        El coste es proporcional al número de nodos visitados, no al tamaño
+        del grafo.
+
+        Args:
+            uri: URI de partida
+            steps: Pares (propiedad, inversa) a recorrer en orden
+            max_nodes: Tamaño máximo de la frontera en cada salto (None = sin límite)
+            distinct: Eliminar repetidos en cada salto (conservando el orden)
+        """
+        node = self.node(uri)
+        if node is None:
+            return []
+        frontier = [node]
+        for name, inverse in steps:
+            adjacency = (self._inverse if inverse else self._forward)[name]
+            frontier = [target for source in frontier for target in adjacency.row(source)]
+            if distinct:
+                frontier = list(dict.fromkeys(frontier))
+            if max_nodes is not None:
+                del frontier[max_nodes:]
+        term = self.term
+        return [term(target) for target in frontier]
+
+    def refresh(self, subject: URIRef, prop: URIRef, obj: Optional[URIRef]):
+        """
+        Releer del grafo las filas afectadas por una tripla añadida o eliminada
+
+        Args:
+            subject: Sujeto de la tripla
+            prop: Predicado de la tripla
+            obj: Objeto de la tripla (None si no es una URI)
+        """
+        for name, indexed in self.properties.items():
+            if indexed != prop:
+                continue
+            self._forward[name].set_row(self._intern(subject), [
+                self._intern(target) for target in self.graph.objects(subject, prop)
+                if isinstance(target, URIRef)
+            ])
+            if obj is not None:
+                self._inverse[name].set_row(self._intern(obj), [
+                    self._intern(source) for source in self.graph.subjects(prop, obj)
+                ])
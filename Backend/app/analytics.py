@@ -0,0 +1,641 @@
+"""
+Analítica - Tabla columnar del catálogo y agregaciones vectorizadas con NumPy
+
+Las canciones son las filas de la tabla: cada entidad se codifica como un
+entero (su posición en orden de URI, como en la paginación), los años y
+duraciones son columnas numéricas y los enlaces con álbumes, artistas,
+géneros e instrumentos son arrays CSR. Una agregación expande las filas por
+sus enlaces, codifica los grupos como un entero y los cuenta o suma con
+`bincount`, sin recorrer las entidades en Python.
+
+La tabla se deriva de la proyección y de las adyacencias (no del grafo
+directamente) y se construye en la primera consulta. Un delta no la
+descarta: se releen solo las filas afectadas (ver `patch_table`).
+"""
+
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from rdflib import URIRef
+
+from app.adjacency import AdjacencyIndex, CSRAdjacency
+from app.projection import EntityProjection
+
+# Tipos de entidad codificados en la tabla
+ENTITY_TYPES = ("song", "album", "artist", "genre", "instrument")
+
+# Enlaces leídos de las adyacencias: nombre -> (tipo origen, tipo destino, propiedad, inversa)
+LINKS: Dict[str, Tuple[str, str, str, bool]] = {
+    "song_album": ("song", "album", "containsSong", True),
+    "album_artist": ("album", "artist", "hasAlbum", True),
+    "album_genre": ("album", "genre", "hasGenre", False),
+    "song_instrument": ("song", "instrument", "usesInstrument", False),
+}
+
+# Dimensiones de agrupación de las canciones. Las de entidad indican el
+# enlace de la canción; el artista y el género son los de su álbum, como en
+# las facetas y en /api/songs/artist/{id}
+ENTITY_DIMENSIONS: Dict[str, str] = {
+    "album": "song_album",
+    "artist": "song_artist",
+    "genre": "song_genre",
+    "instrument": "song_instrument",
+}
+NUMERIC_DIMENSIONS: Dict[str, Tuple[str, int]] = {
+    "year": ("year", 1),
+    "decade": ("year", 10),
+}
+DIMENSIONS = tuple(ENTITY_DIMENSIONS) + tuple(NUMERIC_DIMENSIONS)
+
+# Medidas numéricas de las canciones
+MEASURES = ("duration", "year")
+
+# Funciones de agregación
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+
+# Valor de las columnas numéricas cuando la entidad no lo tiene
+MISSING = -1
+
+# Los grupos se cuentan con un array denso (sin ordenar) si el producto de los
+# rangos de las claves no supera DENSE_GROUPS_FACTOR * filas + DENSE_GROUPS_MIN
+DENSE_GROUPS_FACTOR = 2
+DENSE_GROUPS_MIN = 1 << 16
+
+# Triplas pendientes de aplicar a la tabla a partir de las cuales sale más
+# a cuenta reconstruirla que releer las filas afectadas
+PATCH_LIMIT = 10000
+
+
+class AnalyticsQueryError(ValueError):
+    """Dimensión, medida o agregación no válida"""
+
+
+class LinkColumn:
+    """
+    Enlaces de las entidades de un tipo con las de otro, en formato CSR
+
+    Los destinos de la entidad i son `targets[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, sources: np.ndarray, targets: np.ndarray, size: int):
+        """
+        Args:
+            sources: Código de la entidad origen de cada enlace
+            targets: Código de la entidad destino de cada enlace
+            size: Número de entidades del tipo origen
+        """
+        order = np.argsort(sources, kind="stable")
+        self.targets = targets[order].astype(np.int32)
+        self.offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=size), out=self.offsets[1:])
+
+    @property
+    def degrees(self) -> np.ndarray:
+        """Número de enlaces de cada entidad origen"""
+        return np.diff(self.offsets)
+
+    def expand(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Un elemento por cada enlace de las entidades dadas
+
+        Args:
+            rows: Códigos de entidades origen (pueden repetirse)
+
+        Returns:
+            (índice en `rows`, código destino) de cada enlace
+        """
+        starts = self.offsets[rows]
+        counts = self.offsets[rows + 1] - starts
+        index = np.repeat(np.arange(len(rows)), counts)
+        first = np.cumsum(counts) - counts
+        positions = starts[index] + np.arange(len(index)) - first[index]
+        return index, self.targets[positions]
+
+    def compose(self, other: "LinkColumn", size: int) -> "LinkColumn":
+        """
+        Enlaces en dos saltos (p. ej. canción -> álbum -> artista), sin repetidos
+
+        Args:
+            other: Enlaces del tipo intermedio al destino
+            size: Número de entidades del tipo destino
+        """
+        sources = np.repeat(np.arange(len(self.offsets) - 1), self.degrees)
+        index, targets = other.expand(self.targets)
+        pairs = np.unique(sources[index].astype(np.int64) * max(size, 1) + targets)
+        return LinkColumn(pairs // max(size, 1), pairs % max(size, 1), len(self.offsets) - 1)
+
+
+class CatalogTable:
+    """
+    Tabla columnar del catálogo
+
+    Attributes:
+        uris: URIs de cada tipo, en orden de código
+        columns: Columnas numéricas de las canciones (MISSING si no hay valor)
+        links: Enlaces entre tipos (incluidos los derivados song_artist y song_genre)
+        pairs: Enlaces de LINKS como (códigos origen, códigos destino)
+        live: Canciones presentes (None si lo están todas)
+    """
+
+    def __init__(
+        self,
+        uris: Dict[str, List[URIRef]],
+        columns: Dict[str, np.ndarray],
+        links: Dict[str, Tuple[np.ndarray, np.ndarray]],
+        live: Optional[np.ndarray] = None,
+        codes: Optional[Dict[str, Dict[URIRef, int]]] = None
+    ):
+        """
+        Args:
+            uris: Tipo -> URIs de sus entidades (el código es la posición)
+            columns: Medida -> valor por canción (MISSING si no lo tiene)
+            links: Nombre de LINKS -> (códigos origen, códigos destino)
+            live: Canciones presentes; las eliminadas por un delta conservan
+                su código, sin enlaces ni valores (None si no hay ninguna)
+            codes: Tipo -> URI -> código de las entidades presentes (None
+                para derivarlo de `uris`)
+        """
+        self.uris = uris
+        self.columns = columns
+        self.pairs = links
+        self.live = live
+        self._codes = codes
+        self.links: Dict[str, LinkColumn] = {
+            name: LinkColumn(sources, targets, len(uris[LINKS[name][0]]))
+            for name, (sources, targets) in links.items()
+        }
+        self.links["song_artist"] = self.links["song_album"].compose(
+            self.links["album_artist"], len(uris["artist"])
+        )
+        self.links["song_genre"] = self.links["song_album"].compose(
+            self.links["album_genre"], len(uris["genre"])
+        )
+
+    @property
+    def songs(self) -> int:
+        """Número de canciones presentes"""
+        return len(self.uris["song"]) if self.live is None else int(np.count_nonzero(self.live))
+
+    @property
+    def codes(self) -> Dict[str, Dict[URIRef, int]]:
+        """Tipo -> URI -> código de las entidades presentes"""
+        if self._codes is None:
+            self._codes = {
+                entity_type: {uri: code for code, uri in enumerate(uris)}
+                for entity_type, uris in self.uris.items()
+            }
+        return self._codes
+
+    def group_by(
+        self,
+        dimensions: Sequence[str],
+        measure: Optional[str] = None,
+        aggregate: str = "count",
+        limit: Optional[int] = None,
+        order: str = "value"
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Agregar las canciones por una o varias dimensiones
+
+        Una canción con varios valores en una dimensión (p. ej. varios
+        instrumentos) cuenta en cada uno de sus grupos. Con una medida solo
+        entran las canciones que la tienen.
+
+        Args:
+            dimensions: Dimensiones de DIMENSIONS (ninguna = un solo grupo)
+            measure: Medida de MEASURES (None para contar canciones)
+            aggregate: Función de AGGREGATES aplicada a la medida
+            limit: Número máximo de grupos (None para todos)
+            order: "value" (mayor agregado primero) o "key" (por dimensiones)
+
+        Returns:
+            Grupos ({"keys": códigos por dimensión, "songs", "value"}) y
+            número total de grupos
+
+        Raises:
+            AnalyticsQueryError: Si la consulta no es válida
+        """
+        unknown = [dimension for dimension in dimensions if dimension not in DIMENSIONS]
+        if unknown:
+            raise AnalyticsQueryError(f"Dimensiones desconocidas: {', '.join(unknown)}")
+        if len(set(dimensions)) != len(dimensions):
+            raise AnalyticsQueryError("Dimensiones repetidas")
+        if measure is not None and measure not in MEASURES:
+            raise AnalyticsQueryError(f"Medida desconocida: {measure}")
+        if aggregate not in AGGREGATES:
+            raise AnalyticsQueryError(f"Agregación desconocida: {aggregate}")
+        if aggregate != "count" and measure is None:
+            raise AnalyticsQueryError(f"La agregación '{aggregate}' requiere una medida")
+        if order not in ("value", "key"):
+            raise AnalyticsQueryError(f"Orden desconocido: {order}")
+
+        # rows: canción de cada fila (None mientras sean todas, en orden, para no indexar)
+        rows: Optional[np.ndarray] = None
+        if measure is not None:
+            rows = np.flatnonzero(self.columns[measure] != MISSING)
+
+        # Expandir las filas dimensión a dimensión: cada fila es (canción, claves)
+        keys: List[np.ndarray] = []
+        for dimension in dimensions:
+            if dimension in ENTITY_DIMENSIONS:
+                link = self.links[ENTITY_DIMENSIONS[dimension]]
+                if rows is None:
+                    index, values = None, link.targets
+                    rows = np.repeat(np.arange(len(self.uris["song"])), link.degrees)
+                else:
+                    index, values = link.expand(rows)
+                    rows = rows[index]
+            else:
+                column, width = NUMERIC_DIMENSIONS[dimension]
+                values = self.columns[column] if rows is None else self.columns[column][rows]
+                index = np.flatnonzero(values != MISSING)
+                values = values[index] // width * width
+                rows = index if rows is None else rows[index]
+            if index is not None:
+                keys = [key[index] for key in keys]
+            keys.append(values.astype(np.int64, copy=False))
+        if rows is None:
+            rows = np.arange(len(self.uris["song"])) if self.live is None else np.flatnonzero(self.live)
+
+        groups, inverse, count = self._encode(keys, len(rows))
+        songs = np.bincount(inverse, minlength=count)
+        if measure is None:
+            values = songs
+        else:
+            values = self._aggregate(self.columns[measure][rows], inverse, count, aggregate, songs)
+
+        if order == "value":
+            selected = np.lexsort(tuple(groups[::-1]) + (-values,)) if keys else np.arange(count)
+        else:
+            selected = np.arange(count)
+        if limit is not None:
+            selected = selected[:limit]
+
+        results = []
+        for group in selected.tolist():
+            results.append({
+                "keys": {dimension: int(groups[i][group]) for i, dimension in enumerate(dimensions)},
+                "songs": int(songs[group]),
+                "value": values[group].item(),
+            })
+        return results, count
+
+    @staticmethod
+    def _encode(keys: List[np.ndarray], size: int) -> Tuple[List[np.ndarray], np.ndarray, int]:
+        """
+        Codificar las claves de cada fila como un único entero de grupo
+
+        Returns:
+            Claves de cada grupo (ordenadas por dimensiones), grupo de cada fila
+            y número de grupos
+        """
+        if not keys:
+            return [], np.zeros(size, dtype=np.int64), int(size > 0)
+        lows = [int(key.min()) if len(key) else 0 for key in keys]
+        spans = [int(key.max()) - low + 1 if len(key) else 1 for key, low in zip(keys, lows)]
+        product = float(np.prod([float(span) for span in spans]))
+        if product >= 2 ** 62:
+            unique, inverse = np.unique(np.stack(keys, axis=1), axis=0, return_inverse=True)
+            return [unique[:, i] for i in range(len(keys))], inverse.ravel(), len(unique)
+
+        combined = keys[0] - lows[0]
+        for key, low, span in zip(keys[1:], lows[1:], spans[1:]):
+            combined = combined * span + (key - low)
+        if product <= DENSE_GROUPS_FACTOR * size + DENSE_GROUPS_MIN:
+            # Espacio de claves pequeño: recuento directo, sin ordenar
+            present = np.flatnonzero(np.bincount(combined, minlength=int(product)))
+            lookup = np.empty(int(product), dtype=np.int64)
+            lookup[present] = np.arange(len(present))
+            unique, inverse = present, lookup[combined]
+        else:
+            unique, inverse = np.unique(combined, return_inverse=True)
+        groups = []
+        for low, span in zip(lows[::-1], spans[::-1]):
+            groups.append(unique % span + low)
+            unique = unique // span
+        return groups[::-1], inverse, len(groups[0])
+
+    @staticmethod
+    def _aggregate(
+        values: np.ndarray,
+        inverse: np.ndarray,
+        count: int,
+        aggregate: str,
+        songs: np.ndarray
+    ) -> np.ndarray:
+        """Agregado de la medida por grupo"""
+        if aggregate == "count":
+            return songs
+        if aggregate in ("sum", "avg"):
+            sums = np.bincount(inverse, weights=values, minlength=count)
+            if aggregate == "sum":
+                return sums.astype(np.int64)
+            return np.round(sums / np.maximum(songs, 1), 2)
+        if aggregate == "min":
+            result = np.full(count, np.iinfo(np.int64).max, dtype=np.int64)
+            np.minimum.at(result, inverse, values)
+        else:
+            result = np.full(count, np.iinfo(np.int64).min, dtype=np.int64)
+            np.maximum.at(result, inverse, values)
+        return result
+
+
+def _link_arrays(
+    csr: CSRAdjacency,
+    source_nodes: np.ndarray,
+    target_codes: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Enlaces de una adyacencia CSR entre dos tipos, como arrays de códigos
+
+    Los arrays de la adyacencia se leen sin copiar; las filas modificadas
+    por deltas después de construirla se leen una a una.
+
+    Args:
+        csr: Adyacencia de la propiedad en el sentido del enlace
+        source_nodes: Nodo de la adyacencia de cada entidad origen (-1 si no aparece)
+        target_codes: Código destino de cada nodo de la adyacencia (-1 si no es del tipo)
+    """
+    offsets = np.frombuffer(csr.offsets, dtype=np.uint32).astype(np.int64)
+    targets = np.frombuffer(csr.targets, dtype=np.uint32)
+    overridden = np.fromiter(csr.overridden(), dtype=np.int64)
+
+    valid = (source_nodes >= 0) & (source_nodes + 1 < len(offsets))
+    valid &= ~np.isin(source_nodes, overridden)
+    codes = np.flatnonzero(valid)
+    starts = offsets[source_nodes[codes]]
+    counts = offsets[source_nodes[codes] + 1] - starts
+    index = np.repeat(np.arange(len(codes)), counts)
+    first = np.cumsum(counts) - counts
+    sources = codes[index]
+    nodes = targets[starts[index] + np.arange(len(index)) - first[index]].astype(np.int64)
+
+    extra_sources, extra_nodes = [], []
+    for code in np.flatnonzero(np.isin(source_nodes, overridden)).tolist():
+        for node in csr.row(int(source_nodes[code])):
+            extra_sources.append(code)
+            extra_nodes.append(node)
+    if extra_sources:
+        sources = np.concatenate((sources, np.array(extra_sources, dtype=np.int64)))
+        nodes = np.concatenate((nodes, np.array(extra_nodes, dtype=np.int64)))
+
+    mapped = target_codes[nodes] if len(nodes) else nodes
+    keep = mapped >= 0
+    return sources[keep], mapped[keep]
+
+
+def build_table(projection: EntityProjection, adjacency: AdjacencyIndex) -> CatalogTable:
+    """
+    Construir la tabla columnar a partir de la proyección y las adyacencias
+
+    Args:
+        projection: Registros materializados (URIs, años y duraciones)
+        adjacency: Adyacencias CSR de las relaciones
+    """
+    uris: Dict[str, List[URIRef]] = {}
+    nodes: Dict[str, np.ndarray] = {}
+    codes: Dict[str, np.ndarray] = {}
+    song_year: List[int] = []
+    song_duration: List[int] = []
+    album_year: List[int] = []
+    for entity_type in ENTITY_TYPES:
+        records = list(projection.iter_records(entity_type))
+        uris[entity_type] = [URIRef(record.uri) for record in records]
+        node_of = [adjacency.node(uri) for uri in uris[entity_type]]
+        nodes[entity_type] = np.array([MISSING if node is None else node for node in node_of], dtype=np.int64)
+        code_of = np.full(len(adjacency) + 1, MISSING, dtype=np.int64)
+        present = nodes[entity_type] >= 0
+        code_of[nodes[entity_type][present]] = np.flatnonzero(present)
+        codes[entity_type] = code_of
+        if entity_type == "song":
+            song_year = [MISSING if record.release_year is None else record.release_year for record in records]
+            song_duration = [MISSING if record.duration is None else record.duration for record in records]
+        elif entity_type == "album":
+            album_year = [MISSING if record.release_year is None else record.release_year for record in records]
+
+    links = {}
+    for name, (source, target, prop, inverse) in LINKS.items():
+        links[name] = _link_arrays(adjacency.csr(prop, inverse), nodes[source], codes[target])
+
+    # Canciones sin año propio: el del primer álbum que las contiene
+    year = np.array(song_year, dtype=np.int64)
+    album_years = np.array(album_year, dtype=np.int64)
+    sources, albums = links["song_album"]
+    fallback = np.full(len(year), MISSING, dtype=np.int64)
+    fallback[sources[::-1]] = album_years[albums[::-1]]
+    year = np.where(year == MISSING, fallback, year)
+
+    columns = {
+        "year": year,
+        "duration": np.array(song_duration, dtype=np.int64),
+    }
+    return CatalogTable(uris, columns, links)
+
+
+def patch_table(
+    table: CatalogTable,
+    projection: EntityProjection,
+    adjacency: AdjacencyIndex,
+    changed: Iterable[Tuple]
+) -> CatalogTable:
+    """
+    Tabla con las filas afectadas por un delta releídas de la proyección y las adyacencias
+
+    Se releen las entidades que aparecen en las triplas, las que enlazan con
+    una entidad que aparece o desaparece y las canciones de los álbumes
+    releídos (heredan su año). Los códigos no cambian: una entidad nueva
+    recibe el siguiente código y una eliminada conserva el suyo sin enlaces
+    ni valores. Solo las filas releídas se recorren en Python; los enlaces
+    CSR se vuelven a formar con NumPy a partir de los pares.
+
+    Args:
+        table: Tabla anterior (no se modifica)
+        projection: Registros ya actualizados
+        adjacency: Adyacencias ya actualizadas
+        changed: Triplas (s, p, o) añadidas o eliminadas
+    """
+    uris = {entity_type: list(values) for entity_type, values in table.uris.items()}
+    codes = {entity_type: dict(values) for entity_type, values in table.codes.items()}
+    candidates = set()
+    for subject, _, obj in changed:
+        candidates.add(subject)
+        if isinstance(obj, URIRef):
+            candidates.add(obj)
+
+    rows: Dict[str, Set[int]] = {entity_type: set() for entity_type in ENTITY_TYPES}
+    dead: Set[int] = set()
+    # Entidades que aparecen o desaparecen: cambian los enlaces que llegan a ellas
+    arrivals: List[Tuple[str, URIRef]] = []
+    for entity_type in ENTITY_TYPES:
+        for uri in candidates:
+            present = projection.get(uri, entity_type) is not None
+            code = codes[entity_type].get(uri)
+            if present and code is None:
+                code = len(uris[entity_type])
+                uris[entity_type].append(URIRef(uri))
+                codes[entity_type][uri] = code
+                arrivals.append((entity_type, uri))
+            elif code is not None and not present:
+                del codes[entity_type][uri]
+                arrivals.append((entity_type, uri))
+                if entity_type == "song":
+                    dead.add(code)
+            if code is not None:
+                rows[entity_type].add(code)
+
+    def sources_of(name: str, uri: URIRef):
+        """Códigos de las entidades con un enlace `name` hacia la URI"""
+        source, _, prop, inverse = LINKS[name]
+        node = adjacency.node(uri)
+        if node is not None:
+            for source_node in adjacency.csr(prop, not inverse).row(node):
+                code = codes[source].get(adjacency.term(source_node))
+                if code is not None:
+                    rows[source].add(code)
+
+    for entity_type, uri in arrivals:
+        for name, (_, target, _, _) in LINKS.items():
+            if target == entity_type:
+                sources_of(name, uri)
+    for code in list(rows["album"]):
+        sources_of("song_album", uris["album"][code])
+
+    # Enlaces: se sustituyen los pares de las entidades releídas
+    links = {}
+    first_album: Dict[int, int] = {}
+    for name, (source, target, prop, inverse) in LINKS.items():
+        sources, targets = table.pairs[name]
+        affected = np.fromiter(rows[source], dtype=np.int64)
+        keep = ~np.isin(sources, affected)
+        csr = adjacency.csr(prop, inverse)
+        extra_sources, extra_targets = [], []
+        for code in sorted(rows[source]):
+            uri = uris[source][code]
+            node = adjacency.node(uri)
+            if node is None or uri not in codes[source]:
+                continue
+            for target_node in csr.row(node):
+                target_code = codes[target].get(adjacency.term(target_node))
+                if target_code is not None:
+                    extra_sources.append(code)
+                    extra_targets.append(target_code)
+                    if name == "song_album":
+                        first_album.setdefault(code, target_code)
+        links[name] = (
+            np.concatenate((sources[keep], np.array(extra_sources, dtype=np.int64))),
+            np.concatenate((targets[keep], np.array(extra_targets, dtype=np.int64))),
+        )
+
+    # Columnas: valores propios de las canciones releídas, o el año de su primer álbum
+    size = len(uris["song"])
+    columns = {}
+    for measure, column in table.columns.items():
+        columns[measure] = np.concatenate((column, np.full(size - len(column), MISSING, dtype=np.int64)))
+    for code in rows["song"]:
+        record = projection.get(uris["song"][code], "song")
+        duration = year = None
+        if record is not None:
+            duration, year = record.duration, record.release_year
+            if year is None and code in first_album:
+                album = projection.get(uris["album"][first_album[code]], "album")
+                year = album.release_year if album is not None else None
+        columns["duration"][code] = MISSING if duration is None else duration
+        columns["year"][code] = MISSING if year is None else year
+
+    live = table.live
+    if dead or live is not None:
+        live = np.concatenate((
+            np.ones(len(table.uris["song"]), dtype=bool) if live is None else live,
+            np.ones(size - len(table.uris["song"]), dtype=bool),
+        ))
+        live[np.fromiter(dead, dtype=np.int64)] = False
+    return CatalogTable(uris, columns, links, live, codes)
+
+
+class CatalogAnalytics:
+    """
+    Tabla columnar con construcción perezosa
+
+    Se construye en la primera consulta. Un delta solo anota sus triplas: la
+    siguiente consulta sustituye la tabla por otra con las filas afectadas
+    releídas (ver `patch_table`), una vez para todos los deltas pendientes,
+    así que el coste no recae en el delta.
+    """
+
+    def __init__(self, projection: EntityProjection, adjacency: AdjacencyIndex):
+        self.projection = projection
+        self.adjacency = adjacency
+        self._table: Optional[CatalogTable] = None
+        self._pending: List[Tuple] = []
+        self._lock = threading.Lock()
+
+    def table(self) -> CatalogTable:
+        """Tabla actual (construida o actualizada si el grafo cambió)"""
+        table = self._table
+        if table is None or self._pending:
+            with self._lock:
+                if self._table is None:
+                    self._table = build_table(self.projection, self.adjacency)
+                elif self._pending:
+                    self._table = patch_table(self._table, self.projection, self.adjacency, self._pending)
+                self._pending = []
+                table = self._table
+        return table
+
+    def update(self, changed: Iterable[Tuple]):
+        """
+        Anotar las triplas de un delta para actualizar la tabla en la siguiente consulta
+
+        Args:
+            changed: Triplas (s, p, o) añadidas o eliminadas
+        """
+        with self._lock:
+            if self._table is None:
+                return
+            self._pending.extend(changed)
+            if len(self._pending) > PATCH_LIMIT:
+                self._table = None
+                self._pending = []
+
+    def group_by(
+        self,
+        dimensions: Sequence[str],
+        measure: Optional[str],
+        aggregate: str,
+        limit: Optional[int],
+        order: str,
+        labels: Callable[[str, URIRef], Tuple[str, str]]
+    ) -> Dict[str, Any]:
+        """
+        Agregación sobre la tabla actual con las claves de entidad resueltas
+
+        Args:
+            dimensions: Dimensiones de agrupación
+            measure: Medida agregada (None para contar canciones)
+            aggregate: Función de agregación
+            limit: Número máximo de grupos
+            order: "value" o "key"
+            labels: Función (tipo, URI) -> (ID, nombre)
+
+        Returns:
+            Grupos con sus claves (ID y nombre para las entidades), número de
+            canciones y valor agregado, y número total de grupos
+        """
+        table = self.table()
+        groups, total = table.group_by(dimensions, measure, aggregate, limit, order)
+        field = "songs" if measure is None else f"{aggregate}_{measure}"
+        rows = []
+        for group in groups:
+            row: Dict[str, Any] = {}
+            for dimension, code in group["keys"].items():
+                if dimension in ENTITY_DIMENSIONS:
+                    value, name = labels(dimension, table.uris[dimension][code])
+                    row[dimension] = value
+                    row[f"{dimension}_name"] = name
+                else:
+                    row[dimension] = code
+            row["songs"] = group["songs"]
+            row[field] = group["value"]
+            rows.append(row)
+        return {"groups": rows, "total_groups": total, "total_songs": table.songs}
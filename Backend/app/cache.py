@@ -0,0 +1,231 @@
+"""
+Caché de respuestas - LRU por ruta, parámetros y versión del grafo, con ETag/304
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+Headers = List[Tuple[bytes, bytes]]
+
+# Prefijos de ruta que nunca se cachean (administración, exportación en streaming
+# y SPARQL, que guarda sus propios resultados por versión del grafo)
+UNCACHED_PREFIXES = ("/api/admin", "/api/export", "/api/sparql")
+
+
+class CachedResponse:
+    """Respuesta completa ya serializada"""
+
+    __slots__ = ("status", "headers", "body", "etag")
+
+    def __init__(self, status: int, headers: Headers, body: bytes, etag: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+
+
+def make_etag(body: bytes) -> bytes:
+    """ETag fuerte derivado del contenido"""
+    return b'"' + hashlib.sha256(body).hexdigest()[:32].encode("ascii") + b'"'
+
+
+def etag_matches(if_none_match: Optional[bytes], etag: bytes) -> bool:
+    """Comprobar una cabecera If-None-Match contra un ETag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(b","):
+        candidate = candidate.strip()
+        if candidate.startswith(b"W/"):
+            candidate = candidate[2:]
+        if candidate == b"*" or candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Caché LRU de respuestas limitada por número de bytes
+
+    Las claves incluyen la versión del grafo, así que una recarga o un delta
+    dejan obsoletas todas las entradas; al detectar una versión nueva se
+    vacía la caché para liberar memoria en lugar de esperar a la expulsión.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        """
+        Inicializar la caché
+
+        Args:
+            max_bytes: Tamaño máximo total de los cuerpos cacheados
+            max_entry_bytes: Tamaño máximo de una respuesta cacheable
+        """
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[Hashable] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _sync_version(self, version: Hashable):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[CachedResponse]:
+        """Entrada cacheada para la versión actual del grafo"""
+        with self._lock:
+            self._sync_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, version: Hashable, entry: CachedResponse):
+        """Guardar una respuesta (se ignora si es demasiado grande)"""
+        size = len(entry.body)
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            self._sync_version(version)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Aciertos, fallos y ocupación de la caché"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class ResponseCacheMiddleware:
+    """
+    Middleware ASGI que sirve las peticiones GET de /api desde la caché
+
+    Un acierto no llega a los handlers ni al grafo. Las respuestas llevan un
+    ETag fuerte; si el cliente envía un If-None-Match que coincide se
+    responde 304 sin cuerpo. Las respuestas que no son 200, o que superan el
+    tamaño máximo de una entrada, se reenvían tal cual en cuanto se detectan
+    en lugar de acumularlas en memoria.
+    """
+
+    def __init__(self, app, cache: ResponseCache, version: Callable[[], Hashable]):
+        """
+        Args:
+            app: Aplicación ASGI envuelta
+            cache: Caché de respuestas
+            version: Función que devuelve la versión actual del grafo
+        """
+        self.app = app
+        self.cache = cache
+        self.version = version
+
+    @staticmethod
+    def _cacheable(scope) -> bool:
+        path = scope["path"]
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "GET"
+            and path.startswith("/api/")
+            and not path.startswith(UNCACHED_PREFIXES)
+        )
+
+    async def __call__(self, scope, receive, send):
+        if not self._cacheable(scope):
+            await self.app(scope, receive, send)
+            return
+
+        query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)))
+        key = (scope["path"], query)
+        version = self.version()
+        if_none_match = dict(scope["headers"]).get(b"if-none-match")
+
+        entry = self.cache.get(key, version)
+        if entry is not None:
+            await self._send_cached(send, entry, if_none_match, b"HIT")
+            return
+
+        start: Dict[str, Any] = {}
+        chunks: List[bytes] = []
+        size = 0
+        passthrough = False
+
+        async def capture(message):
+            nonlocal size, passthrough
+            if passthrough:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                start.update(message)
+                if message["status"] != 200:
+                    passthrough = True
+                    await send(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                size += len(chunks[-1])
+                if size > self.cache.max_entry_bytes:
+                    # No cabe en la caché: se envía lo acumulado y el resto sin pasar por memoria
+                    passthrough = True
+                    headers = list(start.get("headers", [])) + [(b"x-cache", b"BYPASS")]
+                    await send({"type": "http.response.start", "status": start["status"], "headers": headers})
+                    await send({
+                        "type": "http.response.body",
+                        "body": b"".join(chunks),
+                        "more_body": message.get("more_body", False),
+                    })
+                    chunks.clear()
+            else:
+                await send(message)
+
+        await self.app(scope, receive, capture)
+        if passthrough:
+            return
+
+        body = b"".join(chunks)
+        entry = CachedResponse(start["status"], list(start.get("headers", [])), body, make_etag(body))
+        # Solo se guarda si el grafo no cambió mientras se calculaba la respuesta
+        if self.version() == version:
+            self.cache.put(key, version, entry)
+        await self._send_cached(send, entry, if_none_match, b"MISS")
+
+    async def _send_cached(self, send, entry: CachedResponse, if_none_match: Optional[bytes], state: bytes):
+        extra = [
+            (b"etag", entry.etag),
+            (b"cache-control", b"no-cache"),
+            (b"x-cache", state),
+        ]
+        if etag_matches(if_none_match, entry.etag):
+            self.cache.not_modified += 1
+            await send({"type": "http.response.start", "status": 304, "headers": extra})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": entry.status, "headers": entry.headers + extra})
+        await send({"type": "http.response.body", "body": entry.body})
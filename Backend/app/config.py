@@ -0,0 +1,70 @@
+"""
+Configuración - Parámetros del servicio leídos de variables de entorno (.env)
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Leer una variable de entorno booleana (1/0, true/false, yes/no)"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Ruta al archivo de la ontología (RDF/XML .owl/.rdf, N-Triples .nt o Turtle .ttl)
+ONTOLOGY_PATH = os.getenv(
+    "ONTOLOGY_PATH",
+    os.path.join(BASE_DIR, "data", "music-ontology.owl")
+)
+
+# Snapshot binario del grafo parseado (arranque rápido)
+SNAPSHOT_ENABLED = _env_bool("ONTOLOGY_SNAPSHOT", True)
+SNAPSHOT_PATH = os.getenv("ONTOLOGY_SNAPSHOT_PATH", ONTOLOGY_PATH + ".snapshot")
+
+# Backend del grafo: "memory" (rdflib en memoria, por worker), "shared"
+# (store de solo lectura sobre el snapshot, compartido entre workers) o
+# "sqlite" (store persistente en disco con índices SPO/POS/OSP)
+STORE_BACKEND = os.getenv("ONTOLOGY_STORE", "memory").strip().lower()
+
+# Base de datos del backend "sqlite" (se recarga desde el OWL cuando este cambia)
+SQLITE_PATH = os.getenv("ONTOLOGY_SQLITE_PATH", ONTOLOGY_PATH + ".sqlite")
+
+# Procesos para parsear el archivo de origen al cargarlo (solo N-Triples; 1 = en el mismo proceso)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+
+# Segundos entre comprobaciones del OWL para recargarlo en caliente (0 = desactivado)
+WATCH_INTERVAL = float(os.getenv("ONTOLOGY_WATCH_INTERVAL", "5"))
+
+# Token requerido en la cabecera X-Admin-Token para /api/admin (vacío = sin token)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Ejecutor de consultas: hilos y cola máxima por carril (al llenarse se responde 503)
+QUERY_CHEAP_WORKERS = int(os.getenv("QUERY_CHEAP_WORKERS", "4"))
+QUERY_CHEAP_QUEUE = int(os.getenv("QUERY_CHEAP_QUEUE", "64"))
+QUERY_EXPENSIVE_WORKERS = int(os.getenv("QUERY_EXPENSIVE_WORKERS", "2"))
+QUERY_EXPENSIVE_QUEUE = int(os.getenv("QUERY_EXPENSIVE_QUEUE", "16"))
+
+# Segundos sugeridos en Retry-After cuando el ejecutor está saturado
+QUERY_RETRY_AFTER = int(os.getenv("QUERY_RETRY_AFTER", "1"))
+
+# Caché de respuestas GET de /api (se invalida con cada recarga o delta)
+RESPONSE_CACHE_ENABLED = _env_bool("RESPONSE_CACHE", True)
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(8 * 1024 * 1024)))
+
+# Métricas en /metrics (formato Prometheus) e instrumentación del grafo
+METRICS_ENABLED = _env_bool("METRICS", True)
+
+# Peticiones más lentas que este umbral (segundos) se registran en el log con su desglose (0 = desactivado)
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "1.0"))
+
+# Presupuesto de /api/sparql: segundos de evaluación y filas máximas por consulta
+SPARQL_TIMEOUT = float(os.getenv("SPARQL_TIMEOUT", "5"))
+SPARQL_MAX_ROWS = int(os.getenv("SPARQL_MAX_ROWS", "10000"))
@@ -0,0 +1,79 @@
+"""
+Deltas - Conversión de lotes de triplas (JSON o N-Triples) a términos RDF
+"""
+
+from typing import Iterable, List, Optional, Tuple
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.term import Node
+
+Triple = Tuple[Node, Node, Node]
+
+
+class DeltaFormatError(ValueError):
+    """El lote de triplas no se pudo interpretar"""
+
+
+def parse_ntriples(text: Optional[str]) -> List[Triple]:
+    """
+    Interpretar triplas en formato N-Triples
+
+    Args:
+        text: Documento N-Triples (una tripla por línea)
+
+    Raises:
+        DeltaFormatError: Si el documento no es N-Triples válido
+    """
+    if not text or not text.strip():
+        return []
+    graph = Graph()
+    try:
+        graph.parse(data=text, format="nt")
+    except Exception as e:
+        raise DeltaFormatError(f"N-Triples inválido: {e}") from e
+    return list(graph)
+
+
+def json_triple(
+    s: str,
+    p: str,
+    o: str,
+    o_type: str = "uri",
+    datatype: Optional[str] = None,
+    lang: Optional[str] = None
+) -> Triple:
+    """
+    Construir una tripla a partir de su representación JSON
+
+    Args:
+        s: URI del sujeto (o "_:id" para un nodo en blanco)
+        p: URI del predicado
+        o: Valor del objeto
+        o_type: "uri", "literal" o "bnode"
+        datatype: URI del tipo de dato del literal
+        lang: Etiqueta de idioma del literal
+
+    Raises:
+        DeltaFormatError: Si el tipo de objeto no es válido o el literal
+            tiene a la vez idioma y tipo de dato
+    """
+    subject = BNode(s[2:]) if s.startswith("_:") else URIRef(s)
+    if o_type == "uri":
+        obj: Node = URIRef(o)
+    elif o_type == "literal":
+        try:
+            obj = Literal(o, lang=lang or None, datatype=URIRef(datatype) if datatype else None)
+        except (TypeError, ValueError) as e:
+            raise DeltaFormatError(f"Literal inválido '{o}': {e}") from e
+    elif o_type == "bnode":
+        obj = BNode(o[2:] if o.startswith("_:") else o)
+    else:
+        raise DeltaFormatError(f"Tipo de objeto desconocido: {o_type}")
+    return subject, URIRef(p), obj
+
+
+def collect_triples(json_items: Iterable[dict], ntriples: Optional[str]) -> List[Triple]:
+    """Unir las triplas recibidas en JSON y en N-Triples"""
+    triples = [json_triple(**item) for item in json_items]
+    triples.extend(parse_ntriples(ntriples))
+    return triples
@@ -0,0 +1,526 @@
+"""
+Índices derivados compartidos - Proyección, adyacencias e índices de nombres en un archivo mapeado
+
+Complementa al snapshot en el backend `shared`: los índices que cada worker
+construía a partir del grafo se escriben una vez en un segundo archivo y
+todos los workers los leen con mmap, igual que las triplas.
+
+Formato (little-endian, secciones alineadas a 8 bytes):
+
+    cabecera    magic, versión, huella del OWL de origen y número de términos
+                y de triplas del snapshot, número de secciones
+    directorio  nombre, tipo de array, posición y longitud de cada sección
+    secciones   arrays de enteros y tablas de textos (offsets uint64 + blob)
+
+Los nodos de las adyacencias y las entidades de los índices se identifican
+por su ID de término en el snapshot, así que el archivo solo es válido para
+el snapshot con el que se escribió (se comprueba su huella al abrirlo).
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from rdflib import RDF, Graph, Namespace, URIRef
+
+from app.adjacency import AdjacencyIndex, CSRAdjacency
+from app.projection import EntityProjection, EntityRecord
+from app.search_index import text_grams
+from app.snapshot import Snapshot, SnapshotError, encode_term, file_lock
+from app.store import ReadOnlyStoreError, SnapshotStore
+
+MAGIC = b"MUDRV001"
+FORMAT_VERSION = 1
+
+# magic, versión, tamaño, mtime_ns, sha256, n_terms, n_triples, n_secciones
+HEADER = struct.Struct("<8sIxxxxQq32sQQQ")
+# nombre, tipo de array ("B" para bytes), posición, longitud en bytes
+SECTION = struct.Struct("<48s1sxxxxxxxQQ")
+
+# Longitud de los n-gramas de los índices de búsqueda (la de NGramIndex)
+NGRAM = 3
+
+# Registros decodificados que se mantienen en caché por proceso
+RECORD_CACHE_SIZE = 8192
+
+
+class StringTable:
+    """Tabla de textos UTF-8: el texto i es `blob[offsets[i]:offsets[i + 1]]`"""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position: int) -> bytes:
+        return bytes(self.blob[self.offsets[position]:self.offsets[position + 1]])
+
+    def text(self, position: int) -> str:
+        """Texto decodificado de una posición"""
+        return self[position].decode("utf-8")
+
+    def find(self, data: bytes) -> Optional[int]:
+        """Posición de un texto en una tabla ordenada por bytes, None si no está"""
+        position = bisect_left(self, data)
+        if position < len(self) and self[position] == data:
+            return position
+        return None
+
+
+class _Writer:
+    """Secciones pendientes de escribir"""
+
+    def __init__(self):
+        self.sections: List[Tuple[str, str, Any]] = []
+
+    def array(self, name: str, values: array):
+        self.sections.append((name, values.typecode, values))
+
+    def strings(self, name: str, texts: Iterable[bytes]):
+        offsets = array("Q", [0])
+        blob = bytearray()
+        for data in texts:
+            blob += data
+            offsets.append(len(blob))
+        self.array(f"{name}.offsets", offsets)
+        self.sections.append((f"{name}.blob", "B", blob))
+
+    def write(self, path: str, snapshot: Snapshot):
+        """Escribir el archivo en una ruta temporal y renombrarlo al final"""
+        position = HEADER.size + SECTION.size * len(self.sections)
+        directory = []
+        for name, typecode, data in self.sections:
+            position += -position % 8
+            length = len(data) * (data.itemsize if isinstance(data, array) else 1)
+            directory.append(SECTION.pack(name.encode("ascii"), typecode.encode("ascii"), position, length))
+            position += length
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(HEADER.pack(
+                    MAGIC, FORMAT_VERSION, snapshot.source_size, snapshot.source_mtime_ns,
+                    snapshot.source_sha256, snapshot.n_terms, snapshot.n_triples, len(self.sections)
+                ))
+                for entry in directory:
+                    f.write(entry)
+                for _, _, data in self.sections:
+                    f.write(b"\x00" * (-f.tell() % 8))
+                    f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _encode(text: Optional[str]) -> bytes:
+    return text.encode("utf-8") if text else b""
+
+
+def write_derived(
+    path: str,
+    snapshot: Snapshot,
+    projection: EntityProjection,
+    adjacency: AdjacencyIndex,
+    entities: Dict[str, List[Tuple[Optional[str], Optional[str], int]]],
+    id_index: Dict[str, List[Tuple[URIRef, str]]],
+    entity_types: Tuple[str, ...]
+):
+    """
+    Escribir los índices derivados de un grafo ya indexado en memoria
+
+    Args:
+        path: Ruta del archivo
+        snapshot: Snapshot del que procede el grafo (IDs de término)
+        projection: Proyección construida
+        adjacency: Adyacencias construidas
+        entities: Por tipo, (nombre, descripción, grado) de cada entidad en
+            el orden de la proyección
+        id_index: Índice ID -> [(URI, tipo)]
+        entity_types: Tipos de entidad (el código de tipo es su posición)
+    """
+    ids = {term: position for position, term in enumerate(snapshot.decode_terms())}
+    writer = _Writer()
+
+    for name in adjacency.properties:
+        for inverse in (False, True):
+            csr = adjacency.csr(name, inverse)
+            rows = {
+                ids[adjacency.term(node)]: [ids[adjacency.term(target)] for target in csr.row(node)]
+                for node in range(len(adjacency))
+            }
+            shared = CSRAdjacency()
+            shared.build(rows, snapshot.n_terms)
+            direction = "inverse" if inverse else "forward"
+            writer.array(f"adjacency.{name}.{direction}.offsets", shared.offsets)
+            writer.array(f"adjacency.{name}.{direction}.targets", shared.targets)
+
+    for entity_type in entity_types:
+        records = list(projection.iter_records(entity_type))
+        rows = sorted(zip((ids[URIRef(record.uri)] for record in records), records, entities[entity_type]))
+        writer.array(f"projection.{entity_type}.ids", array("I", [row[0] for row in rows]))
+        writer.strings(f"projection.{entity_type}.json", (record.to_json() for _, record, _ in rows))
+        writer.strings(f"names.{entity_type}", (_encode(name) for _, _, (name, _, _) in rows))
+        writer.array(f"degrees.{entity_type}", array("I", [degree for _, _, (_, _, degree) in rows]))
+
+        for field, column in (("name", 0), ("description", 1)):
+            texts = [(row[2][column] or "").lower() for row in rows]
+            postings: Dict[str, List[int]] = {}
+            for position, text in enumerate(texts):
+                for gram in text_grams(text, NGRAM):
+                    postings.setdefault(gram, []).append(position)
+            grams = sorted(postings, key=_encode)
+            prefix = f"search.{field}.{entity_type}"
+            writer.strings(f"{prefix}.texts", (_encode(text) for text in texts))
+            writer.strings(f"{prefix}.grams", (_encode(gram) for gram in grams))
+            offsets = array("I", [0])
+            values = array("I")
+            for gram in grams:
+                values.extend(postings[gram])
+                offsets.append(len(values))
+            writer.array(f"{prefix}.postings.offsets", offsets)
+            writer.array(f"{prefix}.postings", values)
+
+    keys = sorted(id_index, key=_encode)
+    offsets = array("I", [0])
+    nodes = array("I")
+    types = array("B")
+    for key in keys:
+        for uri, entity_type in id_index[key]:
+            nodes.append(ids[uri])
+            types.append(entity_types.index(entity_type))
+        offsets.append(len(nodes))
+    writer.strings("ids.keys", (_encode(key) for key in keys))
+    writer.array("ids.offsets", offsets)
+    writer.array("ids.nodes", nodes)
+    writer.array("ids.types", types)
+
+    writer.write(path, snapshot)
+
+
+class DerivedIndexes:
+    """Archivo de índices derivados abierto con mmap (solo lectura)"""
+
+    def __init__(self, path: str):
+        """
+        Abrir el archivo
+
+        Raises:
+            SnapshotError: Si el archivo no existe o no es válido
+        """
+        try:
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"No se pudieron abrir los índices derivados: {e}") from e
+
+        if len(self._mmap) < HEADER.size:
+            raise SnapshotError("Índices derivados truncados")
+        (magic, version, self.source_size, self.source_mtime_ns, self.source_sha256,
+         self.n_terms, self.n_triples, n_sections) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise SnapshotError("Formato de índices derivados incompatible")
+
+        self._views: List[memoryview] = []
+        self._sections: Dict[str, memoryview] = {}
+        for i in range(n_sections):
+            name, typecode, pos, length = SECTION.unpack_from(self._mmap, HEADER.size + SECTION.size * i)
+            if pos + length > len(self._mmap):
+                raise SnapshotError("Índices derivados truncados")
+            view = memoryview(self._mmap)[pos:pos + length]
+            self._views.append(view)
+            if typecode != b"B":
+                view = view.cast(typecode.decode("ascii"))
+                self._views.append(view)
+            self._sections[name.rstrip(b"\x00").decode("ascii")] = view
+
+    def matches(self, snapshot: Snapshot) -> bool:
+        """Comprobar si el archivo se escribió para este snapshot"""
+        return (self.source_size, self.source_mtime_ns, self.source_sha256, self.n_terms, self.n_triples) == (
+            snapshot.source_size, snapshot.source_mtime_ns, snapshot.source_sha256,
+            snapshot.n_terms, snapshot.n_triples
+        )
+
+    def array(self, name: str) -> memoryview:
+        """Sección de enteros"""
+        try:
+            return self._sections[name]
+        except KeyError:
+            raise SnapshotError(f"Sección ausente en los índices derivados: {name}") from None
+
+    def strings(self, name: str) -> StringTable:
+        """Sección de textos"""
+        return StringTable(self.array(f"{name}.offsets"), self.array(f"{name}.blob"))
+
+    def close(self):
+        """Liberar el mmap"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._sections = {}
+        self._mmap.close()
+
+
+def ensure_derived(snapshot: Snapshot, path: str, build: Callable[[], Any]) -> DerivedIndexes:
+    """
+    Abrir los índices derivados de un snapshot, escribiéndolos antes si faltan
+
+    Como `ensure_snapshot`, usa un lock de archivo para que solo un proceso
+    los construya. La construcción (`build`, que debe escribir `path`) se
+    ejecuta en un proceso aparte: la memoria que usa para indexar el grafo
+    se devuelve al sistema al terminar en lugar de quedarse en el worker.
+
+    Args:
+        snapshot: Snapshot abierto
+        path: Ruta del archivo de índices derivados
+        build: Función (serializable) que escribe el archivo
+
+    Raises:
+        SnapshotError: Si tras construirlo el archivo no corresponde al snapshot
+    """
+    with file_lock(path + ".lock"):
+        if os.path.exists(path):
+            try:
+                derived = DerivedIndexes(path)
+            except SnapshotError:
+                pass
+            else:
+                if derived.matches(snapshot):
+                    return derived
+                derived.close()
+
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            pool.submit(build).result()
+        derived = DerivedIndexes(path)
+        if not derived.matches(snapshot):
+            derived.close()
+            raise SnapshotError("Los índices derivados no corresponden al snapshot")
+        return derived
+
+
+def snapshot_counts(store: SnapshotStore) -> Tuple[Dict[URIRef, int], Dict[URIRef, int]]:
+    """
+    Triplas por predicado e instancias por clase contadas sobre los IDs del snapshot
+
+    El índice POS está ordenado por predicado y objeto, así que basta contar
+    sus columnas sin decodificar más que los términos distintos.
+
+    Returns:
+        (recuento por predicado, recuento por clase)
+    """
+    pos = np.frombuffer(store.snapshot.pos, dtype=np.uint32).reshape(-1, 3)
+    ids, counts = np.unique(pos[:, 0], return_counts=True)
+    predicates = {store.term(int(term_id)): int(count) for term_id, count in zip(ids, counts)}
+    classes = {}
+    rdf_type = store.term_id(RDF.type)
+    if rdf_type is not None:
+        ids, counts = np.unique(pos[pos[:, 0] == rdf_type, 1], return_counts=True)
+        classes = {store.term(int(term_id)): int(count) for term_id, count in zip(ids, counts)}
+    return predicates, classes
+
+
+class SharedAdjacencyIndex(AdjacencyIndex):
+    """Adyacencias leídas del archivo mapeado; los nodos son IDs de término del snapshot"""
+
+    def __init__(self, graph: Graph, properties: Dict[str, URIRef], store: SnapshotStore, derived: DerivedIndexes):
+        super().__init__(graph, properties)
+        self._store = store
+        for name in properties:
+            for inverse, adjacencies in ((False, self._forward), (True, self._inverse)):
+                direction = "inverse" if inverse else "forward"
+                csr = CSRAdjacency()
+                csr.offsets = derived.array(f"adjacency.{name}.{direction}.offsets")
+                csr.targets = derived.array(f"adjacency.{name}.{direction}.targets")
+                adjacencies[name] = csr
+
+    def build(self):
+        """Las adyacencias ya están construidas en el archivo"""
+
+    def __len__(self) -> int:
+        return self._store.snapshot.n_terms
+
+    def node(self, uri: URIRef) -> Optional[int]:
+        return self._store.term_id(uri) if isinstance(uri, URIRef) else None
+
+    def term(self, node: int) -> URIRef:
+        return self._store.term(node)
+
+    def refresh(self, subject: URIRef, prop: URIRef, obj: Optional[URIRef]):
+        raise ReadOnlyStoreError("El store compartido es de solo lectura")
+
+
+class SharedProjection(EntityProjection):
+    """
+    Proyección leída del archivo mapeado
+
+    Cada tipo guarda los IDs de término de sus entidades ordenados (el orden
+    de los IDs es el de las URIs) y el JSON de `to_dict` de cada una; los
+    registros se decodifican al pedirlos y los más usados quedan en caché.
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        music: Namespace,
+        store: SnapshotStore,
+        derived: DerivedIndexes,
+        entity_types: Iterable[str]
+    ):
+        super().__init__(graph, music)
+        self._store = store
+        self._ids = {entity_type: derived.array(f"projection.{entity_type}.ids") for entity_type in entity_types}
+        self._fragments = {
+            entity_type: derived.strings(f"projection.{entity_type}.json") for entity_type in entity_types
+        }
+        self._cached = lru_cache(maxsize=RECORD_CACHE_SIZE)(self._decode)
+
+    def build(self, entity_classes: Dict[str, Any]):
+        """La proyección ya está construida en el archivo"""
+
+    def _decode(self, entity_type: str, position: int) -> EntityRecord:
+        fragment = self._fragments[entity_type][position]
+        return EntityRecord.from_dict(entity_type, json.loads(fragment), fragment)
+
+    def position(self, uri, entity_type: str) -> Optional[int]:
+        """Posición de una entidad en su tipo, None si no es de ese tipo"""
+        ids = self._ids.get(entity_type)
+        node = self._store.term_id(URIRef(uri))
+        if ids is None or node is None:
+            return None
+        position = bisect_left(ids, node)
+        if position < len(ids) and ids[position] == node:
+            return position
+        return None
+
+    def uri(self, entity_type: str, position: int) -> URIRef:
+        """URI de la entidad en una posición"""
+        return self._store.term(self._ids[entity_type][position])
+
+    def _start(self, entity_type: str, after: Optional[Any]) -> int:
+        """Primera posición con URI mayor que `after` (exista o no en el snapshot)"""
+        if after is None:
+            return 0
+        snapshot = self._store.snapshot
+        data = encode_term(URIRef(after))
+        bound = snapshot.term_bound(data)
+        if bound < snapshot.n_terms and snapshot.term_bytes(bound) == data:
+            bound += 1
+        return bisect_left(self._ids.get(entity_type, ()), bound)
+
+    def get(self, uri, entity_type: str) -> Optional[EntityRecord]:
+        position = self.position(uri, entity_type)
+        return self._cached(entity_type, position) if position is not None else None
+
+    def iter_records(self, entity_type: str) -> Iterator[EntityRecord]:
+        for position in range(self.count(entity_type)):
+            yield self._decode(entity_type, position)
+
+    def page(
+        self,
+        entity_type: str,
+        after: Optional[Any] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[EntityRecord], bool]:
+        count = self.count(entity_type)
+        start = self._start(entity_type, after)
+        end = count if limit is None else min(start + limit, count)
+        return [self._cached(entity_type, position) for position in range(start, end)], end < count
+
+    def iter_uris(self, entity_type: str, after: Optional[Any] = None) -> Iterator[Any]:
+        for position in range(self._start(entity_type, after), self.count(entity_type)):
+            yield self.uri(entity_type, position)
+
+    def count(self, entity_type: str) -> int:
+        return len(self._ids.get(entity_type, ()))
+
+    def refresh(self, uri, entity_type: str, present: bool):
+        raise ReadOnlyStoreError("El store compartido es de solo lectura")
+
+
+class SharedNGramIndex:
+    """
+    Índice de n-gramas leído del archivo mapeado (misma búsqueda que `NGramIndex`)
+
+    Las listas de postings guardan posiciones de la proyección, así que los
+    resultados salen en orden de URI.
+    """
+
+    def __init__(self, derived: DerivedIndexes, prefix: str, key: Callable[[int], Hashable]):
+        """
+        Args:
+            derived: Archivo de índices derivados
+            prefix: Prefijo de las secciones del índice
+            key: Clave (URI) de la entidad en una posición
+        """
+        self.n = NGRAM
+        self._texts = derived.strings(f"{prefix}.texts")
+        self._grams = derived.strings(f"{prefix}.grams")
+        self._offsets = derived.array(f"{prefix}.postings.offsets")
+        self._postings = derived.array(f"{prefix}.postings")
+        self._key = key
+
+    def __len__(self) -> int:
+        offsets = self._texts.offsets
+        return sum(1 for position in range(len(self._texts)) if offsets[position + 1] > offsets[position])
+
+    def search(self, query: str) -> List[Hashable]:
+        """Claves de las entidades cuyo texto contiene la consulta (sin distinguir mayúsculas)"""
+        query_lower = query.lower()
+        texts = self._texts
+        if len(query_lower) < self.n:
+            # Consultas más cortas que un n-grama: recorrido de los textos no vacíos
+            offsets = texts.offsets
+            candidates: Iterable[int] = [
+                position for position in range(len(texts)) if offsets[position + 1] > offsets[position]
+            ]
+        else:
+            postings = []
+            for gram in text_grams(query_lower, self.n):
+                found = self._grams.find(gram.encode("utf-8"))
+                if found is None:
+                    return []
+                postings.append(self._postings[self._offsets[found]:self._offsets[found + 1]])
+            postings.sort(key=len)
+            candidates = sorted(set(postings[0]).intersection(*postings[1:]))
+
+        query_bytes = query_lower.encode("utf-8")
+        return [self._key(position) for position in candidates if query_bytes in texts[position]]
+
+
+class SharedIdIndex:
+    """Índice ID -> [(URI, tipo)] leído del archivo mapeado (interfaz de lectura de un dict)"""
+
+    def __init__(self, derived: DerivedIndexes, term: Callable[[int], URIRef], entity_types: Tuple[str, ...]):
+        self._keys = derived.strings("ids.keys")
+        self._offsets = derived.array("ids.offsets")
+        self._nodes = derived.array("ids.nodes")
+        self._types = derived.array("ids.types")
+        self._term = term
+        self._entity_types = entity_types
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            position = self._keys.find(key.encode("utf-8"))
+        except UnicodeEncodeError:
+            position = None
+        if position is None:
+            return default
+        return [
+            (self._term(self._nodes[i]), self._entity_types[self._types[i]])
+            for i in range(self._offsets[position], self._offsets[position + 1])
+        ]
+
+    def __getitem__(self, key: str) -> List[Tuple[URIRef, str]]:
+        entries = self.get(key)
+        if entries is None:
+            raise KeyError(key)
+        return entries
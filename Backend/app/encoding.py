@@ -0,0 +1,64 @@
+"""
+Codificación JSON - Serialización rápida y respuestas ensambladas desde fragmentos
+"""
+
+import json
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional: se usa json de la biblioteca estándar
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    """Serializar a JSON compacto en UTF-8 (orjson si está instalado)"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def item_fragment(entity_type: str, data_fragment: bytes) -> bytes:
+    """Fragmento {"type": ..., "data": ...} a partir de los datos ya codificados"""
+    return b'{"type":' + dumps(entity_type) + b',"data":' + data_fragment + b"}"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que serializa con `dumps`"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fragment_response(
+    fragments: Iterable[bytes],
+    message: Optional[str] = None,
+    pagination: Optional[Dict[str, Any]] = None,
+    facets: Optional[Dict[str, Any]] = None
+) -> Response:
+    """
+    Respuesta con la forma de `ApiResponse` ensamblada sin volver a codificar
+
+    Los elementos de `data` llegan ya codificados, así que ni Pydantic ni el
+    codificador JSON recorren las entidades: solo se concatenan bytes.
+
+    Args:
+        fragments: Elementos de `data` codificados en JSON
+        message: Mensaje de la respuesta
+        pagination: Metadatos de paginación
+        facets: Recuentos por faceta
+    """
+    body = b"".join((
+        b'{"success":true,"data":[',
+        b",".join(fragments),
+        b'],"error":null,"message":',
+        dumps(message),
+        b',"pagination":',
+        dumps(pagination),
+        b',"facets":',
+        dumps(facets),
+        b"}",
+    ))
+    return Response(content=body, media_type="application/json")
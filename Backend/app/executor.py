@@ -0,0 +1,111 @@
+"""
+Ejecutor de consultas - Carriles de hilos acotados con rechazo por saturación
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+from app.metrics import timed_call
+
+# Carriles: consultas baratas (detalle, estadísticas) y caras (listados, búsqueda)
+LANE_CHEAP = "cheap"
+LANE_EXPENSIVE = "expensive"
+
+
+class ExecutorSaturatedError(Exception):
+    """El carril no admite más consultas pendientes"""
+
+    def __init__(self, lane: str, capacity: int):
+        self.lane = lane
+        self.capacity = capacity
+        super().__init__(f"Servicio saturado (carril '{lane}', {capacity} consultas pendientes)")
+
+
+class _Lane:
+    """Pool de hilos con un límite de consultas en ejecución + en cola"""
+
+    def __init__(self, name: str, workers: int, max_queue: int):
+        self.name = name
+        self.workers = workers
+        self.capacity = workers + max_queue
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"query-{name}")
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                return False
+            self.pending += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+
+class QueryExecutor:
+    """
+    Ejecutor de consultas al grafo desde handlers `async def`
+
+    Cada carril tiene su propio pool de hilos, de modo que las consultas
+    caras no ocupan los hilos de las baratas. Cuando un carril alcanza su
+    límite de consultas pendientes, las nuevas se rechazan de inmediato
+    (ExecutorSaturatedError -> 503) en lugar de acumular latencia.
+    """
+
+    def __init__(self, lanes: Dict[str, Tuple[int, int]]):
+        """
+        Inicializar los carriles
+
+        Args:
+            lanes: Mapa nombre -> (hilos, tamaño máximo de cola)
+        """
+        self._lanes = {
+            name: _Lane(name, workers, max_queue)
+            for name, (workers, max_queue) in lanes.items()
+        }
+
+    async def run(self, lane: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Ejecutar una función bloqueante en el carril indicado
+
+        La función se ejecuta en el contexto de la petición, de modo que sus
+        consultas al grafo y su tiempo cuentan en el desglose de métricas.
+
+        Raises:
+            ExecutorSaturatedError: Si el carril está lleno
+        """
+        target = self._lanes[lane]
+        if not target.acquire():
+            raise ExecutorSaturatedError(lane, target.capacity)
+        try:
+            context = contextvars.copy_context()
+            future = target.pool.submit(context.run, timed_call, func, time.perf_counter(), *args, **kwargs)
+        except BaseException:
+            target.release()
+            raise
+        # Se libera al terminar el hilo, aunque el cliente se haya desconectado antes
+        future.add_done_callback(lambda _: target.release())
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Ocupación y contadores de cada carril"""
+        return {
+            name: {
+                "workers": lane.workers,
+                "capacity": lane.capacity,
+                "pending": lane.pending,
+                "completed": lane.completed,
+                "rejected": lane.rejected,
+            }
+            for name, lane in self._lanes.items()
+        }
@@ -0,0 +1,624 @@
+"""
+Facetas - Filtros por año, duración, género, artista e instrumento con recuento
+
+Las entidades de cada tipo ocupan posiciones consecutivas en orden de URI
+(el mismo orden que la paginación), de modo que un conjunto de entidades es
+un bitmap (un entero de Python, un bit por posición). Los filtros se
+combinan con `&`/`|` sobre esos enteros, que recorren memoria contigua en C:
+
+- Rangos numéricos: valores ordenados con sus posiciones; un rango se
+  localiza con dos búsquedas binarias.
+- Términos (género, artista, instrumento): posiciones ordenadas de cada
+  valor, y además un bitmap precalculado si el valor es denso (aparece en
+  más de 1/DENSE_RATIO de las entidades).
+
+Los recuentos por faceta usan `bit_count` del bitmap resultado intersecado
+con los bitmaps densos, y para los valores dispersos recorren sus
+posiciones o las filas de los resultados, lo que sea más corto.
+
+Un delta actualiza en el sitio solo las posiciones de las entidades
+afectadas. Las posiciones no se desplazan: una entidad nueva se añade al
+final (fuera del orden de URI, que `page` restablece) y una eliminada deja
+un hueco que ningún bitmap incluye.
+"""
+
+import heapq
+import re
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from rdflib import URIRef
+
+from app.adjacency import AdjacencyIndex
+from app.projection import EntityProjection, EntityRecord
+
+# Facetas de términos por tipo de entidad: camino de adyacencias desde la
+# entidad hasta el valor (propiedad, sentido inverso). El artista de una
+# canción es el del álbum que la contiene, como en /api/songs/artist/{id}
+TERM_FACETS: Dict[str, Dict[str, Tuple[Tuple[str, bool], ...]]] = {
+    "artist": {
+        "genre": (("performsGenre", False),),
+    },
+    "album": {
+        "genre": (("hasGenre", False),),
+        "artist": (("hasAlbum", True),),
+    },
+    "song": {
+        "genre": (("containsSong", True), ("hasGenre", False)),
+        "artist": (("containsSong", True), ("hasAlbum", True)),
+        "instrument": (("usesInstrument", False),),
+    },
+}
+
+# Facetas numéricas por tipo: atributo del registro y ancho de los intervalos
+# con los que se cuentan (décadas y minutos)
+RANGE_FACETS: Dict[str, Dict[str, Tuple[str, int]]] = {
+    "album": {
+        "year": ("release_year", 10),
+    },
+    "song": {
+        "year": ("release_year", 10),
+        "duration": ("duration", 60),
+    },
+}
+
+# Valores numéricos heredados cuando el registro no tiene el suyo: tipo de la
+# entidad de la que se toma y camino de adyacencias hasta ella (vale la
+# primera). Una canción sin año usa el de su álbum, como en /api/analytics
+RANGE_FALLBACKS: Dict[str, Dict[str, Tuple[str, Tuple[Tuple[str, bool], ...]]]] = {
+    "song": {
+        "year": ("album", (("containsSong", True),)),
+    },
+}
+
+# Un valor es denso (se guarda también como bitmap) si aparece en más de 1/DENSE_RATIO entidades
+DENSE_RATIO = 32
+
+# Valores devueltos como máximo por faceta de términos (los de más resultados)
+FACET_LIMIT = 20
+
+_NONZERO = re.compile(rb"[^\x00]")
+
+
+def bitmap_from_positions(positions: Iterable[int], size: int) -> int:
+    """Bitmap (entero) con los bits de las posiciones dadas"""
+    data = bytearray((size + 7) // 8)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, "little")
+
+
+def iter_positions(bitmap: int, size: int, start: int = 0) -> Iterator[int]:
+    """
+    Posiciones de los bits activos en orden creciente, a partir de `start`
+
+    Los bytes a cero se saltan con una búsqueda en C, así que el coste es
+    proporcional a los bits activos y no al tamaño del bitmap.
+    """
+    data = bitmap.to_bytes((size + 7) // 8, "little")
+    for match in _NONZERO.finditer(data, start >> 3):
+        index = match.start()
+        byte = data[index]
+        base = index << 3
+        while byte:
+            low = byte & -byte
+            position = base + low.bit_length() - 1
+            if position >= start:
+                yield position
+            byte ^= low
+
+
+class TermFacet:
+    """
+    Índice de una faceta de términos: posiciones por valor y valores por posición
+
+    Los valores son enteros (identificadores de la adyacencia o intervalos
+    numéricos). Las filas por posición están en formato CSR; las que cambia
+    un delta se guardan aparte y tienen prioridad.
+    """
+
+    def __init__(self, rows: Sequence[Sequence[int]], size: int):
+        """
+        Args:
+            rows: Valores de cada posición (rows[i] para la entidad i)
+            size: Número de entidades del tipo
+        """
+        self.size = size
+        self.offsets = array("I", [0])
+        self.values = array("q")
+        postings: Dict[int, List[int]] = {}
+        for position, row in enumerate(rows):
+            for value in row:
+                postings.setdefault(value, []).append(position)
+            self.values.extend(row)
+            self.offsets.append(len(self.values))
+        self.postings = {value: array("I", positions) for value, positions in postings.items()}
+        self.dense = {
+            value: bitmap_from_positions(positions, size)
+            for value, positions in self.postings.items()
+            if len(positions) * DENSE_RATIO > size
+        }
+        self._sparse_total = sum(
+            len(positions) for value, positions in self.postings.items() if value not in self.dense
+        )
+        self._overlay: Dict[int, Tuple[int, ...]] = {}
+
+    def row(self, position: int) -> Sequence[int]:
+        """Valores de una posición"""
+        row = self._overlay.get(position)
+        if row is not None:
+            return row
+        if position + 1 >= len(self.offsets):
+            return ()
+        return self.values[self.offsets[position]:self.offsets[position + 1]]
+
+    def set_row(self, position: int, row: Sequence[int]):
+        """
+        Sustituir los valores de una posición, actualizando posiciones y bitmaps
+
+        Args:
+            position: Posición de la entidad (`size` para añadir una nueva)
+            row: Valores nuevos (vacío para una entidad eliminada)
+        """
+        old = set(self.row(position))
+        new = set(row)
+        self.size = max(self.size, position + 1)
+        for value in old - new:
+            positions = self.postings[value]
+            del positions[bisect_left(positions, position)]
+            if value in self.dense:
+                self.dense[value] &= ~(1 << position)
+            else:
+                self._sparse_total -= 1
+            if not positions:
+                del self.postings[value]
+                self.dense.pop(value, None)
+        for value in new - old:
+            positions = self.postings.setdefault(value, array("I"))
+            positions.insert(bisect_left(positions, position), position)
+            if value in self.dense:
+                self.dense[value] |= 1 << position
+            elif len(positions) * DENSE_RATIO > self.size:
+                # El valor pasa a ser denso
+                self.dense[value] = bitmap_from_positions(positions, self.size)
+                self._sparse_total -= len(positions) - 1
+            else:
+                self._sparse_total += 1
+        self._overlay[position] = tuple(row)
+
+    def bitmap(self, values: Iterable[int]) -> int:
+        """Entidades con alguno de los valores dados"""
+        result = 0
+        for value in values:
+            dense = self.dense.get(value)
+            if dense is not None:
+                result |= dense
+            elif value in self.postings:
+                result |= bitmap_from_positions(self.postings[value], self.size)
+        return result
+
+    def counts(self, bitmap: Optional[int], matched: Optional[int] = None) -> Counter:
+        """
+        Número de entidades del bitmap por valor (None = todas las entidades)
+
+        Args:
+            bitmap: Entidades seleccionadas
+            matched: Número de bits activos del bitmap, si ya se conoce
+        """
+        if bitmap is None:
+            return Counter({value: len(positions) for value, positions in self.postings.items()})
+
+        counts: Counter = Counter()
+        for value, dense in self.dense.items():
+            count = (bitmap & dense).bit_count()
+            if count:
+                counts[value] = count
+        if matched is None:
+            matched = bitmap.bit_count()
+        if matched <= self._sparse_total:
+            # Pocos resultados: se leen sus filas
+            offsets, values, dense, overlay = self.offsets, self.values, self.dense, self._overlay
+            for position in iter_positions(bitmap, self.size):
+                row = overlay.get(position) if overlay else None
+                if row is None:
+                    row = values[offsets[position]:offsets[position + 1]]
+                for value in row:
+                    if value not in dense:
+                        counts[value] += 1
+        else:
+            # Muchos resultados: se recorren las posiciones de los valores dispersos
+            data = bitmap.to_bytes((self.size + 7) // 8, "little")
+            for value, positions in self.postings.items():
+                if value in self.dense:
+                    continue
+                count = sum(data[p >> 3] >> (p & 7) & 1 for p in positions)
+                if count:
+                    counts[value] = count
+        return counts
+
+
+class RangeFacet:
+    """Índice de una faceta numérica: valores ordenados con sus posiciones"""
+
+    def __init__(self, column: Sequence[Optional[int]], bucket: int):
+        """
+        Args:
+            column: Valor de cada posición (None si la entidad no lo tiene)
+            bucket: Ancho de los intervalos para los recuentos
+        """
+        pairs = sorted((value, position) for position, value in enumerate(column) if value is not None)
+        self.sorted_values = array("q", (value for value, _ in pairs))
+        self.positions = array("I", (position for _, position in pairs))
+        self.column = list(column)
+        self.size = len(column)
+        self.bucket = bucket
+        self.buckets = TermFacet(
+            [() if value is None else (value // bucket,) for value in column], len(column)
+        )
+
+    def bitmap(self, low: Optional[int], high: Optional[int]) -> int:
+        """Entidades con valor en [low, high] (extremos opcionales)"""
+        start = 0 if low is None else bisect_left(self.sorted_values, low)
+        end = len(self.sorted_values) if high is None else bisect_right(self.sorted_values, high)
+        return bitmap_from_positions(self.positions[start:end], self.size)
+
+    def _index(self, value: int, position: int) -> int:
+        """Índice del par (valor, posición) en los arrays ordenados (o donde insertarlo)"""
+        low = bisect_left(self.sorted_values, value)
+        high = bisect_right(self.sorted_values, value, low)
+        return bisect_left(self.positions, position, low, high)
+
+    def set_value(self, position: int, value: Optional[int]):
+        """
+        Sustituir el valor de una posición
+
+        Args:
+            position: Posición de la entidad (`size` para añadir una nueva)
+            value: Valor nuevo (None si la entidad no lo tiene o se ha eliminado)
+        """
+        if position < self.size:
+            old = self.column[position]
+            if old == value:
+                return
+            if old is not None:
+                index = self._index(old, position)
+                del self.sorted_values[index]
+                del self.positions[index]
+        else:
+            self.column.append(None)
+            self.size = position + 1
+        self.column[position] = value
+        if value is not None:
+            index = self._index(value, position)
+            self.sorted_values.insert(index, value)
+            self.positions.insert(index, position)
+        self.buckets.set_row(position, () if value is None else (value // self.bucket,))
+
+
+class FacetFilters:
+    """
+    Filtros de una consulta
+
+    Dentro de una faceta de términos basta con uno de los valores (OR); entre
+    facetas se exigen todas (AND). Los valores de términos son IDs (nombre
+    local o URI completa) de la entidad del tipo de la faceta.
+    """
+
+    def __init__(
+        self,
+        terms: Optional[Dict[str, Optional[List[str]]]] = None,
+        ranges: Optional[Dict[str, Tuple[Optional[int], Optional[int]]]] = None
+    ):
+        self.terms = {name: list(values) for name, values in (terms or {}).items() if values}
+        self.ranges = {
+            name: bounds for name, bounds in (ranges or {}).items()
+            if bounds[0] is not None or bounds[1] is not None
+        }
+
+    def __bool__(self) -> bool:
+        return bool(self.terms or self.ranges)
+
+    def names(self) -> List[str]:
+        """Facetas filtradas"""
+        return list(self.terms) + list(self.ranges)
+
+
+def _follow(adjacency: AdjacencyIndex, uri: URIRef, steps: Tuple[Tuple[str, bool], ...]) -> Tuple[int, ...]:
+    """Nodos alcanzados desde una entidad siguiendo un camino de adyacencias (sin repetidos, en orden)"""
+    node = adjacency.node(uri)
+    frontier = [] if node is None else [node]
+    for prop, inverse in steps:
+        csr = adjacency.csr(prop, inverse)
+        frontier = [target for source in frontier for target in csr.row(source)]
+    return tuple(dict.fromkeys(frontier))
+
+
+def _reverse(adjacency: AdjacencyIndex, uri: URIRef, steps: Tuple[Tuple[str, bool], ...]) -> Set[URIRef]:
+    """Entidades que alcanzan una URI siguiendo un camino de adyacencias (el camino recorrido al revés)"""
+    node = adjacency.node(uri)
+    if node is None:
+        return {uri} if not steps else set()
+    frontier = [node]
+    for prop, inverse in reversed(steps):
+        csr = adjacency.csr(prop, not inverse)
+        frontier = [source for target in frontier for source in csr.row(target)]
+    return {adjacency.term(node) for node in frontier}
+
+
+def _inherited(
+    projection: EntityProjection,
+    adjacency: AdjacencyIndex,
+    uri: URIRef,
+    source_type: str,
+    steps: Tuple[Tuple[str, bool], ...],
+    attribute: str
+) -> Optional[int]:
+    """Valor del atributo en la primera entidad del camino, None si no hay ninguna o no lo tiene"""
+    for node in _follow(adjacency, uri, steps):
+        record = projection.get(adjacency.term(node), source_type)
+        if record is not None:
+            return getattr(record, attribute)
+    return None
+
+
+class TypeFacets:
+    """
+    Facetas de un tipo de entidad
+
+    Las posiciones de la carga siguen el orden de URI; las entidades que
+    añaden los deltas ocupan posiciones a continuación y se mantienen aparte
+    ordenadas por URI para intercalarlas al paginar.
+    """
+
+    def __init__(self, entity_type: str, projection: EntityProjection, adjacency: AdjacencyIndex):
+        records = list(projection.iter_records(entity_type))
+        self.entity_type = entity_type
+        self.uris = [URIRef(record.uri) for record in records]
+        self.positions = {uri: position for position, uri in enumerate(self.uris)}
+        self.size = len(records)
+        # Entidades presentes (excluye los huecos de las eliminadas)
+        self.alive = (1 << self.size) - 1
+        self._base = self.size
+        self._appended: List[URIRef] = []
+
+        self.terms: Dict[str, TermFacet] = {}
+        for name, steps in TERM_FACETS.get(entity_type, {}).items():
+            rows = [_follow(adjacency, uri, steps) for uri in self.uris]
+            self.terms[name] = TermFacet(rows, self.size)
+
+        self.ranges: Dict[str, RangeFacet] = {}
+        for name, (attribute, bucket) in RANGE_FACETS.get(entity_type, {}).items():
+            column = [
+                self._range_value(name, attribute, record, uri, projection, adjacency)
+                for record, uri in zip(records, self.uris)
+            ]
+            self.ranges[name] = RangeFacet(column, bucket)
+
+    def _range_value(
+        self,
+        name: str,
+        attribute: str,
+        record: EntityRecord,
+        uri: URIRef,
+        projection: EntityProjection,
+        adjacency: AdjacencyIndex
+    ) -> Optional[int]:
+        """Valor de una faceta numérica para una entidad (heredado si no tiene el suyo)"""
+        value = getattr(record, attribute)
+        fallback = RANGE_FALLBACKS.get(self.entity_type, {}).get(name)
+        if value is None and fallback is not None:
+            source_type, steps = fallback
+            value = _inherited(projection, adjacency, uri, source_type, steps, attribute)
+        return value
+
+    def refresh(self, uri: URIRef, projection: EntityProjection, adjacency: AdjacencyIndex):
+        """
+        Releer las facetas de una entidad de la proyección y las adyacencias
+
+        Una entidad nueva del tipo se añade al final; una que ha dejado de
+        serlo deja un hueco.
+        """
+        record = projection.get(uri, self.entity_type)
+        position = self.positions.get(uri)
+        if record is None:
+            if position is None:
+                return
+            del self.positions[uri]
+            self.alive &= ~(1 << position)
+            if position >= self._base:
+                self._appended.remove(uri)
+        elif position is None:
+            position = self.size
+            self.size += 1
+            self.uris.append(uri)
+            self.positions[uri] = position
+            self.alive |= 1 << position
+            insort(self._appended, uri)
+
+        for name, steps in TERM_FACETS.get(self.entity_type, {}).items():
+            self.terms[name].set_row(position, _follow(adjacency, uri, steps) if record is not None else ())
+        for name, (attribute, _) in RANGE_FACETS.get(self.entity_type, {}).items():
+            value = None
+            if record is not None:
+                value = self._range_value(name, attribute, record, uri, projection, adjacency)
+            self.ranges[name].set_value(position, value)
+
+    def supports(self, filters: FacetFilters) -> bool:
+        """Si todas las facetas filtradas existen para este tipo"""
+        return all(name in self.terms or name in self.ranges for name in filters.names())
+
+    def select(
+        self,
+        terms: Dict[str, List[int]],
+        ranges: Dict[str, Tuple[Optional[int], Optional[int]]]
+    ) -> int:
+        """
+        Bitmap de las entidades que cumplen los filtros
+
+        Args:
+            terms: Faceta -> nodos de la adyacencia admitidos
+            ranges: Faceta -> (mínimo, máximo), extremos incluidos
+
+        Raises:
+            ValueError: Si alguna faceta no existe para este tipo
+        """
+        result = self.alive
+        for name, nodes in terms.items():
+            if name not in self.terms:
+                raise ValueError(f"El filtro '{name}' no se aplica a {self.entity_type}")
+            result &= self.terms[name].bitmap(nodes)
+        for name, (low, high) in ranges.items():
+            if name not in self.ranges:
+                raise ValueError(f"El filtro '{name}' no se aplica a {self.entity_type}")
+            result &= self.ranges[name].bitmap(low, high)
+        return result
+
+    def bitmap(self, uris: Iterable[URIRef]) -> int:
+        """Bitmap de las URIs dadas (las que no son de este tipo se ignoran)"""
+        positions = self.positions
+        return bitmap_from_positions(
+            (positions[uri] for uri in uris if uri in positions), self.size
+        )
+
+    def members(self, bitmap: int, uris: Iterable[URIRef]) -> List[URIRef]:
+        """URIs dadas que están en el bitmap, en el mismo orden"""
+        data = bitmap.to_bytes((self.size + 7) // 8, "little")
+        positions = self.positions
+        result = []
+        for uri in uris:
+            position = positions.get(uri)
+            if position is not None and data[position >> 3] >> (position & 7) & 1:
+                result.append(uri)
+        return result
+
+    def page(self, bitmap: int, after: Optional[URIRef], limit: Optional[int]) -> Tuple[List[URIRef], bool]:
+        """
+        URIs de una página del bitmap en orden de URI
+
+        Args:
+            bitmap: Entidades seleccionadas
+            after: Última URI de la página anterior (None para empezar)
+            limit: Tamaño de página (None para todas)
+
+        Returns:
+            URIs de la página y si quedan más
+        """
+        start = 0 if after is None else bisect_right(self.uris, after, 0, self._base)
+        ordered = (
+            self.uris[position]
+            for position in iter_positions(bitmap & ((1 << self._base) - 1), self._base, start)
+        )
+        if self._appended:
+            appended = self._appended[0 if after is None else bisect_right(self._appended, after):]
+            ordered = heapq.merge(ordered, (
+                uri for uri in appended if bitmap >> self.positions[uri] & 1
+            ))
+        uris = []
+        for uri in ordered:
+            if limit is not None and len(uris) == limit:
+                return uris, True
+            uris.append(uri)
+        return uris, False
+
+
+class FacetIndex:
+    """
+    Facetas de todos los tipos de entidad
+
+    Se construyen al cargar la ontología; un delta actualiza en el sitio
+    las entidades afectadas (ver `update`), a partir de la proyección y las
+    adyacencias ya actualizadas, sin leer el grafo.
+    """
+
+    def __init__(self, projection: EntityProjection, adjacency: AdjacencyIndex):
+        self.projection = projection
+        self.adjacency = adjacency
+        self._types: Dict[str, TypeFacets] = {}
+
+    def build(self, entity_types: Iterable[str]):
+        """Construir las facetas de los tipos indicados"""
+        self._types = {
+            entity_type: TypeFacets(entity_type, self.projection, self.adjacency)
+            for entity_type in entity_types
+        }
+
+    def get(self, entity_type: str) -> TypeFacets:
+        """Facetas de un tipo"""
+        return self._types[entity_type]
+
+    def update(self, changed: Iterable[Tuple]):
+        """
+        Actualizar las entidades afectadas por triplas ya aplicadas al grafo
+
+        Además del sujeto de cada tripla, se releen las entidades cuyo camino
+        hasta un valor pasa por el enlace añadido o eliminado, y las que
+        heredan un valor numérico del sujeto (las canciones de un álbum
+        cuyo año cambia).
+
+        Args:
+            changed: Triplas (s, p, o) añadidas o eliminadas
+        """
+        properties = self.adjacency.properties
+        affected: Dict[str, Set[URIRef]] = {entity_type: set() for entity_type in self._types}
+        for subject, predicate, obj in changed:
+            for entity_type, uris in affected.items():
+                uris.add(subject)
+                fallbacks = RANGE_FALLBACKS.get(entity_type, {}).values()
+                for _, steps in fallbacks:
+                    uris.update(_reverse(self.adjacency, subject, steps))
+                if not isinstance(obj, URIRef):
+                    continue
+                paths = list(TERM_FACETS.get(entity_type, {}).values()) + [steps for _, steps in fallbacks]
+                for steps in paths:
+                    for depth, (prop, inverse) in enumerate(steps):
+                        if properties[prop] == predicate:
+                            # Nodo del camino en el que empieza el enlace
+                            node = obj if inverse else subject
+                            uris.update(_reverse(self.adjacency, node, steps[:depth]))
+        for entity_type, uris in affected.items():
+            facets = self._types[entity_type]
+            for uri in uris:
+                facets.refresh(uri, self.projection, self.adjacency)
+
+    def counts(self, selections: Dict[str, Optional[int]], labels) -> Dict[str, Any]:
+        """
+        Recuentos por faceta de una selección, sumando los tipos
+
+        Args:
+            selections: Tipo -> bitmap de sus entidades seleccionadas (None = todas)
+            labels: Función (faceta, URI) -> (ID, nombre) de un valor de término
+
+        Returns:
+            Faceta -> [{"value", "uri", "name", "count"}] para los términos
+            (los FACET_LIMIT de más resultados) o [{"min", "max", "count"}]
+            para los rangos
+        """
+        terms: Dict[str, Counter] = {}
+        ranges: Dict[str, Counter] = {}
+        buckets: Dict[str, int] = {}
+        for entity_type, bitmap in selections.items():
+            facets = self.get(entity_type)
+            matched = None if bitmap is None else bitmap.bit_count()
+            for name, facet in facets.terms.items():
+                terms.setdefault(name, Counter()).update(facet.counts(bitmap, matched))
+            for name, facet in facets.ranges.items():
+                ranges.setdefault(name, Counter()).update(facet.buckets.counts(bitmap, matched))
+                buckets[name] = facet.bucket
+
+        result: Dict[str, Any] = {}
+        for name, counts in terms.items():
+            values = []
+            for node, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:FACET_LIMIT]:
+                uri = self.adjacency.term(node)
+                value, label = labels(name, uri)
+                values.append({"value": value, "uri": str(uri), "name": label, "count": count})
+            result[name] = values
+        for name, counts in ranges.items():
+            width = buckets[name]
+            result[name] = [
+                {"min": key * width, "max": (key + 1) * width - 1, "count": count}
+                for key, count in sorted(counts.items())
+            ]
+        return result
@@ -0,0 +1,780 @@
+"""
+Ingesta en streaming - Lectura incremental de RDF/XML, N-Triples y Turtle
+
+Los lectores recorren el archivo por bloques y producen lotes de triplas que
+se insertan directamente en el store, sin estructuras intermedias del tamaño
+del documento: la memoria pico queda cerca del tamaño del grafo final (o de
+un solo lote, si el destino es el store SQLite).
+
+- RDF/XML: parser SAX incremental (expat) con un manejador propio; resuelve
+  las URIs absolutas sin pasar por urljoin, que es lo que más pesa al
+  parsear con rdflib.
+- N-Triples: bloques de líneas completas; opcionalmente se reparten entre
+  varios procesos por rangos de bytes.
+- Turtle: el texto se corta en sentencias completas y se entrega a un único
+  parser de rdflib que conserva prefijos y nodos en blanco entre bloques.
+"""
+
+import codecs
+import io
+import os
+import re
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin
+from xml.sax import SAXException, handler, make_parser
+from xml.sax.saxutils import escape, quoteattr
+
+from rdflib import BNode, Graph, Literal, RDF, URIRef
+from rdflib.plugins.parsers.notation3 import BadSyntax, RDFSink, SinkParser
+from rdflib.plugins.parsers.ntriples import ParseError, W3CNTriplesParser
+from rdflib.term import Node
+
+Triple = Tuple[Node, Node, Node]
+
+# Bytes leídos del archivo en cada bloque
+CHUNK_SIZE = 1 << 20
+
+# Triplas por lote insertado en el store
+BATCH_SIZE = 10000
+
+# Segundos entre mensajes de progreso
+PROGRESS_INTERVAL = 5.0
+
+# Extensión del archivo -> formato
+FORMATS = {
+    ".owl": "xml", ".rdf": "xml", ".xml": "xml",
+    ".nt": "nt", ".ntriples": "nt",
+    ".ttl": "turtle", ".turtle": "turtle",
+}
+
+RDF_NS = str(RDF)
+XML_NS = "http://www.w3.org/XML/1998/namespace"
+RDF_TYPE = RDF.type
+RDF_DESCRIPTION = URIRef(RDF_NS + "Description")
+
+# Atributos que rdflib acepta sin prefijo como si fueran del espacio rdf:
+UNQUALIFIED = ("about", "ID", "type", "resource", "parseType")
+
+# Términos de sintaxis que no pueden usarse como atributo de propiedad
+NODE_ATTRIBUTE_ERRORS = ("resource", "parseType", "datatype", "li", "Description", "RDF", "aboutEach", "aboutEachPrefix", "bagID")
+PROPERTY_ATTRIBUTE_ERRORS = ("about", "li", "Description", "RDF", "aboutEach", "aboutEachPrefix", "bagID")
+
+# URI con esquema (no hace falta resolverla contra la base)
+_ABSOLUTE = re.compile(r"[A-Za-z][A-Za-z0-9+.\-]*:")
+
+
+class IngestError(ValueError):
+    """El archivo no se pudo interpretar en el formato indicado"""
+
+
+def detect_format(path: str) -> str:
+    """
+    Formato RDF de un archivo según su extensión
+
+    Raises:
+        IngestError: Si la extensión no corresponde a ningún formato soportado
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise IngestError(f"Formato no reconocido para {path} (extensiones: {', '.join(sorted(FORMATS))})")
+    return FORMATS[extension]
+
+
+def _base_uri(path: str) -> str:
+    """URI base de un documento local (la misma que usa rdflib al parsear la ruta)"""
+    return Path(path).absolute().as_uri()
+
+
+class _Frame:
+    """Estado de un elemento abierto del documento RDF/XML"""
+
+    __slots__ = (
+        "mode", "base", "lang", "subject", "predicate", "object", "text",
+        "datatype", "reify", "li", "items", "parts", "declared"
+    )
+
+    def __init__(self, mode: str, base: str, lang: Optional[str]):
+        # mode indica cómo interpretar los hijos: "document", "node",
+        # "property", "collection" o "literal"
+        self.mode = mode
+        self.base = base
+        self.lang = lang
+        self.subject = None
+        self.predicate = None
+        self.object = None
+        self.text = None
+        self.datatype = None
+        self.reify = None
+        self.li = 0
+        self.items = None
+        self.parts = None
+        self.declared = None
+
+
+class RDFXMLHandler(handler.ContentHandler):
+    """
+    Manejador SAX que traduce RDF/XML a triplas
+
+    Sigue la gramática de RDF/XML (nodos tipados, rdf:about/ID/nodeID,
+    atributos de propiedad, rdf:resource, rdf:datatype, rdf:li, xml:lang,
+    xml:base, reificación con rdf:ID y parseType Resource, Literal y
+    Collection) con el mismo resultado que el parser de rdflib. Las triplas
+    se acumulan en `triples`, que el lector vacía tras cada bloque.
+    """
+
+    def __init__(self, base: str):
+        super().__init__()
+        self.triples: List[Triple] = []
+        self.namespaces: Dict[str, str] = {}
+        self._stack = [_Frame("document", urldefrag(base)[0], None)]
+        self._bnodes: Dict[str, BNode] = {}
+        self._names: Dict[Tuple[Optional[str], str], URIRef] = {}
+        self._prefixes: Dict[str, Optional[str]] = {}
+        self._prefix_stack: List[Dict[str, Optional[str]]] = []
+
+    def startPrefixMapping(self, prefix, namespace):
+        self._prefix_stack.append(self._prefixes)
+        self._prefixes = dict(self._prefixes)
+        self._prefixes[namespace] = prefix
+        self.namespaces.setdefault(prefix or "", namespace or "")
+
+    def endPrefixMapping(self, prefix):
+        self._prefixes = self._prefix_stack.pop()
+
+    def _name(self, name: Tuple[Optional[str], str]) -> URIRef:
+        """URI de un nombre de elemento o atributo (cacheada: hay pocos distintos)"""
+        uri = self._names.get(name)
+        if uri is None:
+            namespace, local = name
+            if namespace is None:
+                uri = URIRef(RDF_NS + local) if local in UNQUALIFIED else URIRef(local)
+            else:
+                uri = URIRef(namespace + local)
+            self._names[name] = uri
+        return uri
+
+    @staticmethod
+    def _absolutize(frame: _Frame, uri: str) -> URIRef:
+        if _ABSOLUTE.match(uri):
+            return URIRef(uri)
+        result = urljoin(frame.base, uri, allow_fragments=True)
+        if uri.endswith("#") and not result.endswith("#"):
+            result += "#"
+        return URIRef(result)
+
+    def _bnode(self, node_id: str) -> BNode:
+        node = self._bnodes.get(node_id)
+        if node is None:
+            node = self._bnodes[node_id] = BNode()
+        return node
+
+    def startElementNS(self, name, qname, attrs):
+        parent = self._stack[-1]
+        base = parent.base
+        lang = parent.lang
+        if attrs:
+            xml_base = attrs.get((XML_NS, "base"))
+            if xml_base is not None:
+                base = urljoin(base, urldefrag(xml_base)[0])
+            lang = attrs.get((XML_NS, "lang"), lang)
+
+        mode = parent.mode
+        if mode == "property":
+            frame = self._property_start(parent, name, attrs, base, lang)
+        elif mode == "literal":
+            frame = self._literal_start(parent, name, attrs, base, lang)
+        elif mode == "document" and name == (RDF_NS, "RDF"):
+            frame = _Frame("node", base, lang)
+        else:
+            frame = self._node_start(name, attrs, base, lang)
+        self._stack.append(frame)
+
+    def endElementNS(self, name, qname):
+        frame = self._stack.pop()
+        parent = self._stack[-1]
+        if frame.predicate is not None:
+            self._property_end(frame, parent)
+        elif frame.parts is not None:
+            frame.parts.append(self._literal_tag(name, closing=True))
+        elif frame.subject is not None:
+            if parent.mode == "collection":
+                parent.items.append(frame.subject)
+            elif parent.predicate is not None:
+                parent.object = frame.subject
+
+    def characters(self, content):
+        frame = self._stack[-1]
+        if frame.text is not None:
+            frame.text.append(content)
+        elif frame.parts is not None:
+            frame.parts.append(escape(content))
+
+    def _node_start(self, name, attrs, base, lang) -> _Frame:
+        frame = _Frame("property", base, lang)
+        add = self.triples.append
+        properties = []
+        subject = None
+        for attr, value in attrs.items():
+            namespace, local = attr
+            if namespace == XML_NS or (namespace is None and local[:3].lower() == "xml"):
+                continue
+            if namespace == RDF_NS or (namespace is None and local in UNQUALIFIED):
+                if local == "about":
+                    subject = self._absolutize(frame, value)
+                    continue
+                if local == "ID":
+                    subject = self._absolutize(frame, "#" + value)
+                    continue
+                if local == "nodeID":
+                    subject = self._bnode(value)
+                    continue
+                if local == "type":
+                    properties.append((RDF_TYPE, self._absolutize(frame, value)))
+                    continue
+                if local in NODE_ATTRIBUTE_ERRORS:
+                    raise IngestError(f"Atributo de propiedad inválido: rdf:{local}")
+            properties.append((self._name(attr), Literal(value, lang)))
+
+        if subject is None:
+            subject = BNode()
+        frame.subject = subject
+        element = self._name(name)
+        if element != RDF_DESCRIPTION:
+            add((subject, RDF_TYPE, element))
+        for predicate, obj in properties:
+            add((subject, predicate, obj))
+        return frame
+
+    def _property_start(self, parent: _Frame, name, attrs, base, lang) -> _Frame:
+        frame = _Frame("node", base, lang)
+        if name == (RDF_NS, "li"):
+            parent.li += 1
+            frame.predicate = URIRef(f"{RDF_NS}_{parent.li}")
+        else:
+            frame.predicate = self._name(name)
+
+        resource = node_id = parse_type = datatype = None
+        properties = []
+        for attr, value in attrs.items():
+            namespace, local = attr
+            if namespace == XML_NS or (namespace is None and local[:3].lower() == "xml"):
+                continue
+            if namespace == RDF_NS or (namespace is None and local in UNQUALIFIED):
+                if local == "ID":
+                    frame.reify = self._absolutize(frame, "#" + value)
+                    continue
+                if local == "resource":
+                    resource = value
+                    continue
+                if local == "nodeID":
+                    node_id = value
+                    continue
+                if local == "parseType":
+                    parse_type = value
+                    continue
+                if local == "datatype":
+                    datatype = value
+                    continue
+                if local == "type":
+                    # rdflib no resuelve rdf:type contra la base en atributos de propiedad
+                    properties.append((RDF_TYPE, URIRef(value)))
+                    continue
+                if local in PROPERTY_ATTRIBUTE_ERRORS:
+                    raise IngestError(f"Atributo de propiedad inválido: rdf:{local}")
+            properties.append((self._name(attr), value))
+
+        obj = None
+        if resource is not None:
+            obj = self._absolutize(frame, resource)
+        elif node_id is not None:
+            obj = self._bnode(node_id)
+        elif parse_type is not None:
+            if parse_type == "Resource":
+                frame.mode = "property"
+                frame.object = frame.subject = BNode()
+            elif parse_type == "Collection":
+                frame.mode = "collection"
+                frame.items = []
+            else:
+                # Cualquier otro valor se trata como Literal (parseTypeOtherPropertyElt)
+                frame.mode = "literal"
+                frame.parts = []
+                frame.declared = {XML_NS: "xml"}
+            return frame
+
+        if datatype is not None:
+            frame.datatype = self._absolutize(frame, datatype)
+        else:
+            for predicate, value in properties:
+                if obj is None:
+                    obj = BNode()
+                if not isinstance(value, URIRef):
+                    value = Literal(value, lang)
+                self.triples.append((obj, predicate, value))
+        if obj is None:
+            frame.text = []
+        frame.object = obj
+        return frame
+
+    def _property_end(self, frame: _Frame, parent: _Frame):
+        add = self.triples.append
+        if frame.mode == "collection":
+            obj = RDF.nil
+            for item in reversed(frame.items):
+                node = BNode()
+                add((node, RDF.first, item))
+                add((node, RDF.rest, obj))
+                obj = node
+        elif frame.mode == "literal":
+            obj = Literal("".join(frame.parts), datatype=RDF.XMLLiteral)
+        elif frame.object is None:
+            text = "".join(frame.text)
+            if frame.datatype is not None:
+                obj = Literal(text, datatype=frame.datatype)
+            else:
+                obj = Literal(text, frame.lang)
+        else:
+            obj = frame.object
+
+        triple = (parent.subject, frame.predicate, obj)
+        add(triple)
+        if frame.reify is not None:
+            statement = frame.reify
+            add((statement, RDF.type, RDF.Statement))
+            add((statement, RDF.subject, triple[0]))
+            add((statement, RDF.predicate, triple[1]))
+            add((statement, RDF.object, triple[2]))
+
+    def _literal_tag(self, name, closing: bool = False, declared: Optional[Dict[str, str]] = None) -> str:
+        """Etiqueta XML de un elemento dentro de un parseType="Literal" """
+        namespace, local = name
+        prefix = self._prefixes.get(namespace) if namespace else None
+        tag = f"{prefix}:{local}" if prefix else local
+        if closing:
+            return f"</{tag}>"
+        tag = "<" + tag
+        if namespace and namespace not in declared:
+            declared[namespace] = prefix
+            tag += f' xmlns:{prefix}="{namespace}"' if prefix else f' xmlns="{namespace}"'
+        return tag
+
+    def _literal_start(self, parent: _Frame, name, attrs, base, lang) -> _Frame:
+        frame = _Frame("literal", base, lang)
+        frame.parts = parent.parts
+        frame.declared = dict(parent.declared)
+        tag = self._literal_tag(name, declared=frame.declared)
+        for (namespace, local), value in attrs.items():
+            if namespace:
+                if namespace not in frame.declared:
+                    frame.declared[namespace] = self._prefixes.get(namespace)
+                local = f"{frame.declared[namespace]}:{local}"
+            tag += f" {local}={quoteattr(value)}"
+        frame.parts.append(tag + ">")
+        return frame
+
+
+class Progress:
+    """Contador de triplas y bytes leídos que informa periódicamente por consola"""
+
+    def __init__(self, path: str, interval: float = PROGRESS_INTERVAL, enabled: bool = True):
+        self.path = path
+        self.total_bytes = os.path.getsize(path)
+        self.interval = interval
+        self.enabled = enabled
+        self.triples = 0
+        self.bytes_read = 0
+        # Prefijos declarados en el documento (los rellena el lector)
+        self.namespaces: Dict[str, str] = {}
+        self.start = time.perf_counter()
+        self._last = self.start
+
+    def update(self, triples: int, bytes_read: Optional[int] = None):
+        """Sumar triplas leídas y, opcionalmente, fijar los bytes procesados"""
+        self.triples += triples
+        if bytes_read is not None:
+            self.bytes_read = bytes_read
+        now = time.perf_counter()
+        if self.enabled and now - self._last >= self.interval:
+            self._last = now
+            percent = 100 * self.bytes_read / self.total_bytes if self.total_bytes else 100
+            print(f"  … {self.triples} triplas ({percent:.0f}%, {self.rate():.0f} triplas/s)", flush=True)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def rate(self) -> float:
+        elapsed = self.elapsed()
+        return self.triples / elapsed if elapsed > 0 else 0.0
+
+
+def iter_rdfxml(path: str, progress: Progress, batch_size: int = BATCH_SIZE) -> Iterator[List[Triple]]:
+    """
+    Leer un archivo RDF/XML por bloques
+
+    Returns:
+        Iterador de lotes de triplas; los prefijos del documento quedan en
+        `progress.namespaces`
+    """
+    rdf_handler = RDFXMLHandler(_base_uri(path))
+    parser = make_parser()
+    parser.setFeature(handler.feature_namespaces, 1)
+    parser.setContentHandler(rdf_handler)
+    progress.namespaces = rdf_handler.namespaces
+    with open(path, "rb") as f:
+        try:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    parser.close()
+                else:
+                    parser.feed(chunk)
+                triples = rdf_handler.triples
+                if len(triples) >= batch_size or (not chunk and triples):
+                    rdf_handler.triples = []
+                    progress.update(len(triples), f.tell())
+                    yield triples
+                if not chunk:
+                    return
+        except SAXException as e:
+            raise IngestError(f"RDF/XML inválido en {path}: {e}") from e
+
+
+# Línea N-Triples con IRIs y literales sin escapes: <s> <p> <o> | "lit"[@lang|^^<dt>] .
+_IRI = r'<([^<>"{}|^`\\\s]*)>'
+_NT_SIMPLE = re.compile(
+    rf'\s*{_IRI}\s*{_IRI}\s*(?:{_IRI}|"([^"\\\r\n]*)"(?:@([a-zA-Z]+(?:-[a-zA-Z0-9]+)*)|\^\^{_IRI})?)\s*\.\s*$'
+)
+
+
+class _TripleSink:
+    """Destino de W3CNTriplesParser que acumula las triplas en una lista"""
+
+    def __init__(self):
+        self.triples: List[Triple] = []
+
+    def triple(self, s, p, o):
+        self.triples.append((s, p, o))
+
+
+class _BNodeLabels(dict):
+    """
+    Contexto de nodos en blanco sin estado: cada etiqueta se traduce a un ID
+    fijo (prefijo del documento + etiqueta), de modo que la misma etiqueta da
+    el mismo nodo en todos los bloques y procesos sin guardar una tabla
+    """
+
+    def __init__(self, prefix: str):
+        super().__init__()
+        self.prefix = prefix
+
+    def get(self, label, default=None):
+        return self.prefix + label
+
+
+def _parse_ntriples(text: str, labels: _BNodeLabels) -> List[Triple]:
+    """
+    Parsear un bloque de líneas N-Triples
+
+    Las líneas sin escapes ni nodos en blanco (la inmensa mayoría) se
+    resuelven con una sola expresión regular; el resto pasa por el parser
+    de rdflib, que da el mismo resultado para las primeras.
+    """
+    triples: List[Triple] = []
+    add = triples.append
+    match = _NT_SIMPLE.match
+    other = []
+    for line in text.splitlines():
+        m = match(line)
+        if m is None:
+            other.append(line)
+            continue
+        s, p, o, lexical, lang, datatype = m.groups()
+        if o is not None:
+            obj = URIRef(o)
+        else:
+            obj = Literal(lexical, lang, URIRef(datatype) if datatype else None)
+        add((URIRef(s), URIRef(p), obj))
+
+    if other:
+        sink = _TripleSink()
+        sink.triples = triples
+        try:
+            W3CNTriplesParser(sink).parse(io.StringIO("\n".join(other)), bnode_context=labels)
+        except ParseError as e:
+            raise IngestError(f"N-Triples inválido: {e}") from e
+    return triples
+
+
+def _read_lines(f, end: Optional[int] = None) -> Iterator[bytes]:
+    """Bloques de ~CHUNK_SIZE bytes que terminan en fin de línea"""
+    pending = b""
+    while True:
+        size = CHUNK_SIZE if end is None else min(CHUNK_SIZE, end - f.tell())
+        chunk = f.read(size) if size > 0 else b""
+        if not chunk:
+            if pending:
+                yield pending
+            return
+        pending += chunk
+        cut = pending.rfind(b"\n") + 1
+        if cut:
+            yield pending[:cut]
+            pending = pending[cut:]
+
+
+def _parse_ntriples_range(path: str, start: int, end: int, prefix: str) -> List[Triple]:
+    """Parsear las líneas de un rango de bytes (ejecutado en un proceso hijo)"""
+    labels = _BNodeLabels(prefix)
+    triples: List[Triple] = []
+    with open(path, "rb") as f:
+        f.seek(start)
+        for block in _read_lines(f, end):
+            triples.extend(_parse_ntriples(block.decode("utf-8"), labels))
+    return triples
+
+
+def _line_ranges(path: str, size: int) -> Iterator[Tuple[int, int]]:
+    """Rangos de ~`size` bytes alineados a inicios de línea"""
+    total = os.path.getsize(path)
+    with open(path, "rb") as f:
+        start = 0
+        while start < total:
+            f.seek(min(start + size, total))
+            f.readline()
+            end = min(f.tell(), total)
+            yield start, end
+            start = end
+
+
+def iter_ntriples(
+    path: str,
+    progress: Progress,
+    batch_size: int = BATCH_SIZE,
+    workers: int = 1
+) -> Iterator[List[Triple]]:
+    """
+    Leer un archivo N-Triples por bloques de líneas
+
+    Con `workers` > 1 el archivo se reparte por rangos de bytes entre
+    procesos; como mucho hay 2 rangos por proceso en vuelo, así que la
+    memoria sigue acotada aunque el consumidor sea más lento que el parseo.
+    """
+    prefix = f"n{uuid.uuid4().hex[:12]}b"
+    if workers <= 1:
+        labels = _BNodeLabels(prefix)
+        batch: List[Triple] = []
+        with open(path, "rb") as f:
+            for block in _read_lines(f):
+                batch.extend(_parse_ntriples(block.decode("utf-8"), labels))
+                if len(batch) >= batch_size:
+                    progress.update(len(batch), f.tell())
+                    yield batch
+                    batch = []
+            if batch:
+                progress.update(len(batch), f.tell())
+                yield batch
+        return
+
+    range_size = max(CHUNK_SIZE, batch_size * 100)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Tuple[int, Any]] = deque()
+
+        def collect() -> List[Triple]:
+            end, future = pending.popleft()
+            triples = future.result()
+            progress.update(len(triples), end)
+            return triples
+
+        for start, end in _line_ranges(path, range_size):
+            pending.append((end, pool.submit(_parse_ntriples_range, path, start, end, prefix)))
+            if len(pending) >= 2 * workers:
+                yield collect()
+        while pending:
+            yield collect()
+
+
+class _ListSink(RDFSink):
+    """Destino del parser Turtle que acumula las triplas en lugar de añadirlas a un grafo"""
+
+    def __init__(self):
+        super().__init__(None)
+        self.triples: List[Triple] = []
+
+    def makeStatement(self, quadruple, why=None):
+        f, p, s, o = quadruple
+        self.triples.append((self.normalise(f, s), self.normalise(f, p), self.normalise(f, o)))
+
+
+# Caracteres que cambian el estado del troceado de Turtle
+_TURTLE_SPECIAL = re.compile(r"[\"'<#\[\]()\\.]")
+
+
+def _turtle_cut(text: str) -> int:
+    """
+    Posición tras el último fin de sentencia completo de `text` (0 si no hay)
+
+    Un punto es fin de sentencia si está fuera de cadenas, IRIs, comentarios,
+    [] y (), y le sigue un espacio o un comentario. Los puntos de los números
+    decimales y de los nombres con prefijo van seguidos de otro carácter.
+    """
+    cut = 0
+    depth = 0
+    i = 0
+    n = len(text)
+    search = _TURTLE_SPECIAL.search
+    while True:
+        match = search(text, i)
+        if match is None:
+            return cut
+        i = match.start()
+        char = text[i]
+        if char in "\"'":
+            delimiter = text[i:i + 3] if text[i:i + 3] in ('"""', "'''") else char
+            j = i + len(delimiter)
+            while True:
+                k = text.find(delimiter, j)
+                if k < 0:
+                    return cut
+                backslashes = 0
+                while text[k - 1 - backslashes] == "\\":
+                    backslashes += 1
+                if backslashes % 2 == 0:
+                    break
+                j = k + 1
+            i = k + len(delimiter)
+        elif char == "<":
+            k = text.find(">", i)
+            if k < 0:
+                return cut
+            i = k + 1
+        elif char == "#":
+            k = text.find("\n", i)
+            if k < 0:
+                return cut
+            i = k + 1
+        elif char in "[(":
+            depth += 1
+            i += 1
+        elif char in "])":
+            depth -= 1
+            i += 1
+        elif char == "\\":
+            i += 2
+        else:
+            if i + 1 >= n:
+                return cut
+            if depth == 0 and text[i + 1] in " \t\r\n#":
+                cut = i + 1
+            i += 1
+
+
+def iter_turtle(path: str, progress: Progress, batch_size: int = BATCH_SIZE) -> Iterator[List[Triple]]:
+    """
+    Leer un archivo Turtle por bloques de sentencias completas
+
+    Returns:
+        Iterador de lotes de triplas; los prefijos del documento quedan en
+        `progress.namespaces`
+    """
+    sink = _ListSink()
+    parser = SinkParser(sink, baseURI=_base_uri(path), turtle=True)
+    parser.startDoc()
+    progress.namespaces = parser._bindings
+    with open(path, "rb") as f:
+        pending = ""
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            pending += decoder.decode(chunk, final=not chunk)
+            cut = len(pending) if not chunk else _turtle_cut(pending)
+            if cut:
+                try:
+                    parser.feed(pending[:cut])
+                except BadSyntax as e:
+                    raise IngestError(f"Turtle inválido en {path}: {e}") from e
+                pending = pending[cut:]
+            if len(sink.triples) >= batch_size or (not chunk and sink.triples):
+                triples = sink.triples
+                sink.triples = []
+                progress.update(len(triples), f.tell())
+                yield triples
+            if not chunk:
+                break
+    parser.endDoc()
+
+
+def iter_batches(
+    path: str,
+    progress: Progress,
+    format: Optional[str] = None,
+    batch_size: int = BATCH_SIZE,
+    workers: int = 1
+) -> Iterator[List[Triple]]:
+    """
+    Lotes de triplas de un archivo RDF en cualquiera de los formatos soportados
+
+    Args:
+        path: Archivo de origen
+        progress: Contador de progreso (recibe también los prefijos del documento)
+        format: "xml", "nt" o "turtle" (por defecto, según la extensión)
+        batch_size: Triplas por lote
+        workers: Procesos para parsear (solo N-Triples)
+
+    Raises:
+        IngestError: Si el formato no es válido o el archivo está mal formado
+    """
+    format = format or detect_format(path)
+    if format == "xml":
+        return iter_rdfxml(path, progress, batch_size)
+    if format == "nt":
+        return iter_ntriples(path, progress, batch_size, workers)
+    if format == "turtle":
+        return iter_turtle(path, progress, batch_size)
+    raise IngestError(f"Formato no soportado: {format}")
+
+
+def ingest(
+    graph: Graph,
+    path: str,
+    format: Optional[str] = None,
+    batch_size: int = BATCH_SIZE,
+    workers: int = 1,
+    verbose: bool = True
+) -> Dict[str, Any]:
+    """
+    Cargar un archivo RDF en un grafo por lotes
+
+    Args:
+        graph: Grafo de destino
+        path: Archivo de origen
+        format: "xml", "nt" o "turtle" (por defecto, según la extensión)
+        batch_size: Triplas por lote insertado con addN
+        workers: Procesos para parsear (solo N-Triples)
+        verbose: Informar del progreso cada PROGRESS_INTERVAL segundos
+
+    Returns:
+        Estadísticas: triplas leídas, segundos y triplas por segundo
+
+    Raises:
+        IngestError: Si el formato no es válido o el archivo está mal formado
+    """
+    progress = Progress(path, enabled=verbose)
+    for batch in iter_batches(path, progress, format, batch_size, workers):
+        graph.addN((s, p, o, graph) for s, p, o in batch)
+    for prefix, namespace in progress.namespaces.items():
+        graph.bind(prefix, namespace, override=False)
+    return stats(progress)
+
+
+def stats(progress: Progress) -> Dict[str, Any]:
+    """Resumen de una ingesta terminada"""
+    return {
+        "triples": progress.triples,
+        "seconds": round(progress.elapsed(), 3),
+        "triples_per_second": round(progress.rate()),
+    }
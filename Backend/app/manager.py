@@ -0,0 +1,162 @@
+"""
+Gestor de la ontología - Recarga en caliente con intercambio atómico del servicio
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.ontology import OntologyService
+
+
+class OntologyManager:
+    """
+    Mantiene el `OntologyService` activo y lo sustituye al recargar
+
+    La nueva instancia (grafo, índices y cachés) se construye completa fuera
+    del camino de las peticiones y después se publica con una única
+    asignación, de modo que cada petición ve o el servicio anterior o el
+    nuevo, nunca uno a medio cargar.
+    """
+
+    def __init__(self, factory: Callable[[], OntologyService]):
+        """
+        Inicializar el gestor cargando la primera instancia
+
+        Args:
+            factory: Función que construye un `OntologyService` nuevo
+        """
+        self._factory = factory
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        start = time.perf_counter()
+        self._service = factory()
+        self.generation = 1
+        self.last_reload: Dict[str, Any] = {
+            "generation": 1,
+            "reason": "startup",
+            "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+            "triples_before": 0,
+            "triples_after": len(self._service.graph),
+            "triples_delta": len(self._service.graph),
+            "finished_at": time.time(),
+        }
+        self.last_error: Optional[str] = None
+        self._source_state = self._stat_source()
+
+    @property
+    def service(self) -> OntologyService:
+        """Servicio activo (las peticiones deben leerlo una sola vez)"""
+        return self._service
+
+    def _stat_source(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, tamaño) del archivo OWL, o None si no existe"""
+        try:
+            stat = os.stat(self._service.ontology_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self, reason: str = "manual") -> Dict[str, Any]:
+        """
+        Construir un servicio nuevo y publicarlo de forma atómica
+
+        Si la carga falla, el servicio anterior sigue activo y la excepción
+        se propaga al llamador.
+
+        Args:
+            reason: Motivo de la recarga (se expone en el estado)
+
+        Returns:
+            Duración de la recarga y variación del número de triplas
+        """
+        with self._reload_lock:
+            source_state = self._stat_source()
+            previous = self._service
+            start = time.perf_counter()
+            try:
+                service = self._factory()
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+
+            self._service = service
+            self.generation += 1
+            self._source_state = source_state
+            self.last_error = None
+
+            triples_before = len(previous.graph)
+            triples_after = len(service.graph)
+            self.last_reload = {
+                "generation": self.generation,
+                "reason": reason,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "triples_before": triples_before,
+                "triples_after": triples_after,
+                "triples_delta": triples_after - triples_before,
+                "finished_at": time.time(),
+            }
+            return dict(self.last_reload)
+
+    def apply_delta(self, additions, removals) -> Dict[str, Any]:
+        """
+        Aplicar un delta al servicio activo
+
+        Se serializa con las recargas para que un delta no se aplique sobre
+        una instancia que está a punto de ser sustituida.
+        """
+        with self._reload_lock:
+            return self._service.apply_delta(additions, removals)
+
+    def status(self) -> Dict[str, Any]:
+        """Estado de la última recarga y del watcher"""
+        return {
+            "generation": self.generation,
+            "ontology_path": self._service.ontology_path,
+            "triples": len(self._service.graph),
+            "version": self._service.version,
+            "watching": self._watcher is not None and self._watcher.is_alive(),
+            "last_reload": dict(self.last_reload),
+            "last_error": self.last_error,
+        }
+
+    def start_watcher(self, interval: float):
+        """
+        Vigilar el archivo OWL y recargar cuando cambie su mtime o tamaño
+
+        Args:
+            interval: Segundos entre comprobaciones (<= 0 desactiva el watcher)
+        """
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="ontology-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self):
+        """Detener el watcher si está activo"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            state = self._stat_source()
+            if state is None or state == self._source_state:
+                continue
+            try:
+                info = self.reload(reason="file-change")
+                print(
+                    f"✓ Ontología recargada en {info['duration_ms']} ms "
+                    f"({info['triples_delta']:+d} triplas)"
+                )
+            except Exception as e:
+                # Se conserva el servicio anterior; no se reintenta hasta el próximo cambio
+                self._source_state = state
+                print(f"⚠ Error al recargar la ontología: {e}")
@@ -0,0 +1,428 @@
+"""
+Métricas - Histogramas y contadores en formato Prometheus e instrumentación del grafo
+
+Sin dependencias externas: las métricas se guardan en memoria del proceso y
+`/metrics` las expone en el formato de texto de Prometheus (0.0.4). El
+desglose por petición (consultas al grafo, triplas recorridas y tiempo en
+cada método del servicio) se acumula en un `RequestStats` que viaja en una
+variable de contexto, también a los hilos del ejecutor de consultas.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from rdflib import Graph
+from rdflib.store import Store
+from starlette.routing import Match
+
+logger = logging.getLogger("app.metrics")
+
+# Límites (segundos) de los histogramas de latencia
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Límites de los histogramas de consultas al grafo y triplas recorridas por petición
+COUNT_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+# Etiqueta de ruta para peticiones que no corresponden a ninguna ruta (evita cardinalidad ilimitada)
+UNMATCHED_ROUTE = "<unmatched>"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Métrica con nombre, ayuda y etiquetas"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Contador monótono por combinación de etiquetas"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(Metric):
+    """
+    Valor instantáneo por combinación de etiquetas
+
+    Con `collect` el valor se lee al generar /metrics (p. ej. la ocupación del
+    ejecutor), sin coste en el camino de las peticiones.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, labels: LabelValues = ()):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, labels: LabelValues = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: LabelValues = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def samples(self) -> Iterator[str]:
+        if self._collect is not None:
+            values = self._collect()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram(Metric):
+    """Histograma acumulativo con límites fijos por combinación de etiquetas"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # Por etiquetas: [recuento por límite (+Inf al final), suma]
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._series.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Conjunto de métricas expuestas en /metrics"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> bytes:
+        """Exposición en formato de texto de Prometheus"""
+        return ("\n".join(metric.render() for metric in self._metrics) + "\n").encode("utf-8")
+
+
+# ==================== DESGLOSE POR PETICIÓN ====================
+
+class RequestStats:
+    """Consultas al grafo, triplas recorridas y tiempo por método durante una petición"""
+
+    __slots__ = ("lookups", "triples", "calls")
+
+    def __init__(self):
+        self.lookups = 0
+        self.triples = 0
+        # Método del servicio -> [llamadas, segundos en ejecución, segundos en cola]
+        self.calls: Dict[str, List[float]] = {}
+
+    def breakdown(self) -> Dict[str, Any]:
+        return {
+            "lookups": self.lookups,
+            "triples": self.triples,
+            "calls": {
+                name: {"count": int(count), "run_ms": round(run * 1000, 2), "queue_ms": round(queue * 1000, 2)}
+                for name, (count, run, queue) in self.calls.items()
+            },
+        }
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def timed_call(func: Callable[..., Any], submitted: float, *args, **kwargs) -> Any:
+    """
+    Ejecutar una consulta del ejecutor anotando su tiempo en la petición actual
+
+    Args:
+        func: Función a ejecutar (normalmente un método de `OntologyService`)
+        submitted: Instante (perf_counter) en que se encoló
+    """
+    stats = _current.get()
+    if stats is None:
+        return func(*args, **kwargs)
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        name = getattr(func, "__name__", "call")
+        entry = stats.calls.setdefault(name, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += time.perf_counter() - start
+        entry[2] += start - submitted
+
+
+# ==================== INSTRUMENTACIÓN DEL GRAFO ====================
+
+class InstrumentedStore(Store):
+    """
+    Envoltorio de un store que cuenta consultas y triplas en la petición actual
+
+    Fuera de una petición (construcción de índices, recargas) solo añade una
+    lectura de la variable de contexto por patrón; dentro, un generador que
+    cuenta las triplas devueltas.
+    """
+
+    def __init__(self, store: Store):
+        super().__init__()
+        self.inner = store
+        self.context_aware = store.context_aware
+        self.formula_aware = store.formula_aware
+        self.transaction_aware = store.transaction_aware
+        self.graph_aware = store.graph_aware
+
+    def __getattr__(self, name):
+        # Atributos propios del store envuelto (p. ej. `snapshot` o `fingerprint`)
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    @staticmethod
+    def _counted(triples: Iterable, stats: RequestStats) -> Iterator:
+        for item in triples:
+            stats.triples += 1
+            yield item
+
+    def triples(self, triple_pattern, context=None):
+        stats = _current.get()
+        if stats is None:
+            return self.inner.triples(triple_pattern, context=context)
+        stats.lookups += 1
+        return self._counted(self.inner.triples(triple_pattern, context=context), stats)
+
+    def __len__(self, context=None) -> int:
+        return self.inner.__len__(context=context)
+
+    def contexts(self, triple=None):
+        return self.inner.contexts(triple)
+
+    def add(self, triple, context, quoted=False):
+        return self.inner.add(triple, context, quoted)
+
+    def addN(self, quads):
+        return self.inner.addN(quads)
+
+    def remove(self, triple, context=None):
+        return self.inner.remove(triple, context=context)
+
+    def bind(self, prefix, namespace, override=True):
+        return self.inner.bind(prefix, namespace, override=override)
+
+    def namespace(self, prefix):
+        return self.inner.namespace(prefix)
+
+    def prefix(self, namespace):
+        return self.inner.prefix(namespace)
+
+    def namespaces(self):
+        return self.inner.namespaces()
+
+    def close(self, commit_pending_transaction=False):
+        return self.inner.close(commit_pending_transaction)
+
+
+def instrument_graph(graph: Graph) -> Graph:
+    """Grafo con los mismos datos cuyas consultas se cuentan en la petición actual"""
+    return Graph(store=InstrumentedStore(graph.store), identifier=graph.identifier, bind_namespaces="none")
+
+
+# ==================== MIDDLEWARE ====================
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición HTTP
+
+    Registra la latencia por ruta (la plantilla, p. ej. /api/songs/{song_id},
+    no la URL), las peticiones en curso y el desglose de `RequestStats`; las
+    peticiones más lentas que `slow_seconds` se escriben en el log con sus
+    parámetros y su desglose.
+    """
+
+    def __init__(self, app, metrics: "ServiceMetrics", router, slow_seconds: float = 0):
+        """
+        Args:
+            app: Aplicación ASGI envuelta
+            metrics: Métricas del servicio
+            router: Router de la aplicación (para etiquetar peticiones que no llegan a él)
+            slow_seconds: Umbral del log de peticiones lentas (0 = desactivado)
+        """
+        self.app = app
+        self.metrics = metrics
+        self.router = router
+        self.slow_seconds = slow_seconds
+
+    def _route(self, scope) -> str:
+        route = scope.get("route")
+        if route is None:
+            # Respuesta servida antes del router (p. ej. desde la caché de respuestas)
+            for candidate in self.router.routes:
+                match, _ = candidate.matches(scope)
+                if match == Match.FULL:
+                    route = candidate
+                    break
+        return getattr(route, "path", UNMATCHED_ROUTE)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+
+        async def capture(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight.dec()
+            _current.reset(token)
+            metrics.record(scope["method"], self._route(scope), status, elapsed, stats)
+            if self.slow_seconds and elapsed >= self.slow_seconds:
+                query = scope["query_string"].decode("latin-1")
+                logger.warning(
+                    "Petición lenta: %s %s%s -> %s en %.1f ms %s",
+                    scope["method"], scope["path"], f"?{query}" if query else "",
+                    status, elapsed * 1000, stats.breakdown()
+                )
+
+
+class ServiceMetrics:
+    """Métricas HTTP, del grafo y del servicio registradas en un `MetricsRegistry`"""
+
+    def __init__(self, collectors: Optional[Dict[str, Callable[[], Dict[LabelValues, float]]]] = None):
+        """
+        Args:
+            collectors: Gauges leídos al exponer las métricas (nombre -> función);
+                admite "ontology_load_seconds", "ontology_triples",
+                "ontology_generation" y "executor_pending"
+        """
+        collectors = collectors or {}
+        self.registry = MetricsRegistry()
+        register = self.registry.register
+        self.requests = register(Counter(
+            "http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status")
+        ))
+        self.latency = register(Histogram(
+            "http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "route")
+        ))
+        self.in_flight = register(Gauge("http_requests_in_flight", "Peticiones HTTP en curso"))
+        self.lookups = register(Histogram(
+            "graph_lookups_per_request", "Patrones consultados al grafo por petición", ("route",), COUNT_BUCKETS
+        ))
+        self.triples = register(Histogram(
+            "graph_triples_scanned_per_request", "Triplas recorridas en el grafo por petición", ("route",), COUNT_BUCKETS
+        ))
+        self.method_latency = register(Histogram(
+            "ontology_method_duration_seconds", "Tiempo de ejecución de los métodos del servicio", ("method",)
+        ))
+        self.queue_wait = register(Histogram(
+            "ontology_method_queue_seconds", "Espera en la cola del ejecutor antes de ejecutar un método", ("method",)
+        ))
+        for name, help, labelnames in (
+            ("ontology_load_seconds", "Duración de la última carga o recarga de la ontología", ()),
+            ("ontology_triples", "Triplas del grafo servido", ()),
+            ("ontology_generation", "Generación de la ontología (recargas completas)", ()),
+            ("executor_pending", "Consultas en ejecución o en cola por carril", ("lane",)),
+        ):
+            if name in collectors:
+                register(Gauge(name, help, labelnames, collect=collectors[name]))
+
+    def record(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats):
+        """Registrar una petición terminada"""
+        self.requests.inc((method, route, str(status)))
+        self.latency.observe(elapsed, (method, route))
+        self.lookups.observe(stats.lookups, (route,))
+        self.triples.observe(stats.triples, (route,))
+        for name, (count, run, queue) in stats.calls.items():
+            self.method_latency.observe(run / count, (name,))
+            self.queue_wait.observe(queue / count, (name,))
+
+    def render(self) -> bytes:
+        return self.registry.render()
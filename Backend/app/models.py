@@ -3,7 +3,7 @@ Modelos de datos - Validación con Pydantic
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal, Dict, Any
 from enum import Enum
 
 
@@ -69,12 +69,22 @@ class SearchResult(BaseModel):
     data: dict = Field(..., description="Datos de la entidad")
 
 
+class Pagination(BaseModel):
+    """Metadatos de paginación por cursor"""
+    limit: Optional[int] = None
+    total: int
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+
 class ApiResponse(BaseModel):
     """Respuesta genérica de API"""
     success: bool
     data: dict | list
     error: Optional[str] = None
     message: Optional[str] = None
+    pagination: Optional[Pagination] = None
+    facets: Optional[Dict[str, Any]] = Field(None, description="Recuentos por faceta (si se piden o hay filtros)")
 
 
 class SearchQuery(BaseModel):
@@ -91,3 +101,53 @@ class OntologyStats(BaseModel):
     songs: int
     instruments: int
     genres: int
+    predicates: Dict[str, int] = Field(default_factory=dict, description="Triplas por predicado")
+    distributions: Dict[str, float] = Field(default_factory=dict, description="Medias de relaciones por entidad")
+
+
+class TripleIn(BaseModel):
+    """Tripla en formato JSON para los deltas"""
+    s: str = Field(..., description="URI del sujeto")
+    p: str = Field(..., description="URI del predicado")
+    o: str = Field(..., description="URI o valor literal del objeto")
+    o_type: Literal["uri", "literal", "bnode"] = "uri"
+    datatype: Optional[str] = None
+    lang: Optional[str] = None
+
+
+class DeltaRequest(BaseModel):
+    """Lote de cambios a aplicar sobre el grafo"""
+    add: List[TripleIn] = Field(default_factory=list)
+    remove: List[TripleIn] = Field(default_factory=list)
+    add_ntriples: Optional[str] = Field(None, description="Triplas a añadir en N-Triples")
+    remove_ntriples: Optional[str] = Field(None, description="Triplas a eliminar en N-Triples")
+
+
+class BatchEntityQuery(BaseModel):
+    """Entidad a resolver en una petición por lotes"""
+    id: str = Field(..., min_length=1, description="Nombre local o URI de la entidad")
+    type: Optional[EntityType] = None
+
+
+class BatchRelationQuery(BaseModel):
+    """Relación a resolver en una petición por lotes"""
+    relation: Literal[
+        "albums_by_artist",
+        "songs_by_album",
+        "songs_by_artist",
+        "songs_by_instrument",
+        "genres_by_artist",
+    ]
+    id: str = Field(..., min_length=1, description="Nombre local o URI de la entidad origen")
+
+
+class BatchRequest(BaseModel):
+    """Lote de entidades y relaciones a resolver en una sola petición"""
+    entities: List[BatchEntityQuery] = Field(default_factory=list, max_length=500)
+    relations: List[BatchRelationQuery] = Field(default_factory=list, max_length=500)
+
+
+class SparqlRequest(BaseModel):
+    """Consulta SPARQL enviada por POST"""
+    query: str = Field(..., min_length=1)
+    max_rows: Optional[int] = Field(None, ge=1)
@@ -2,261 +2,1238 @@
 Módulo de ontología - Carga y consulta de la ontología RDF/OWL
 """
 
+import functools
+import heapq
 import os
-from rdflib import Graph, Namespace, RDF, RDFS, Literal
-from typing import List, Dict, Any, Optional, Tuple
+from rdflib import BNode, Graph, Namespace, RDF, RDFS, Literal, URIRef
+from collections import Counter
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterable, Iterator
+from app.search_index import NGramIndex
+from app.ranking import RankedNameIndex
+from app.suggest import SuggestIndex
+from app.adjacency import AdjacencyIndex
+from app.recommend import Recommender
+from app.facets import FacetIndex, FacetFilters
+from app.analytics import CatalogAnalytics
+from app.sparql import SparqlEngine, SparqlStream
+from app.projection import EntityProjection, EntityRecord
+from app.encoding import item_fragment
+from app.pagination import decode_cursor, page_info
+from app.snapshot import Snapshot, load_snapshot, write_snapshot, ensure_snapshot
+from app.store import SnapshotStore, ReadOnlyStoreError
+from app.derived import (
+    DerivedIndexes, SharedAdjacencyIndex, SharedIdIndex, SharedNGramIndex, SharedProjection,
+    ensure_derived, snapshot_counts, write_derived
+)
+from app.sqlite_store import open_sqlite_store
+from app.ingest import ingest
+from app.delta import DeltaFormatError
+from app.stats import GraphCounters
+from app.metrics import instrument_graph
+from app.rwlock import ReadWriteLock
+
+# Backends de almacenamiento del grafo
+STORE_BACKENDS = ("memory", "shared", "sqlite")
+
+# Tipos de entidad en el orden en que se agrupan los resultados
+ENTITY_TYPES = ("artist", "album", "song", "instrument", "genre")
+
+# Propiedades de objeto indexadas como adyacencias (consultas de relaciones)
+RELATION_PROPERTIES = ("hasAlbum", "containsSong", "usesInstrument", "performsGenre", "hasGenre")
+
+# Nodos visitados como máximo en cada salto de un recorrido (/api/traverse)
+TRAVERSE_MAX_NODES = 10000
+
+
+class AmbiguousEntityError(Exception):
+    """El identificador corresponde a más de una entidad"""
+    
+    def __init__(self, entity_id: str, candidates: List[Tuple[str, str]]):
+        self.entity_id = entity_id
+        self.candidates = candidates
+        uris = ", ".join(uri for uri, _ in candidates)
+        super().__init__(f"Identificador ambiguo '{entity_id}': {uris}")
+
+
+def local_name(uri: str) -> str:
+    """Obtener el nombre local de una URI (fragmento o último segmento)"""
+    uri = str(uri)
+    if '#' in uri:
+        return uri.rsplit('#', 1)[-1]
+    return uri.rstrip('/').rsplit('/', 1)[-1]
+
+
+def _reading(method):
+    """Ejecutar un método de consulta del servicio con su lock en lectura"""
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._lock.read():
+            return method(self, *args, **kwargs)
+    return locked
+
 
 class OntologyService:
     """Servicio para consultar la ontología de música"""
     
-    def __init__(self, ontology_path: str):
+    def __init__(
+        self,
+        ontology_path: str,
+        snapshot_path: Optional[str] = None,
+        store_backend: str = "memory",
+        sqlite_path: Optional[str] = None,
+        instrument: bool = False,
+        ingest_workers: int = 1
+    ):
         """
         Inicializar el servicio de ontología
         
         Args:
             ontology_path: Ruta al archivo OWL
+            snapshot_path: Ruta del snapshot binario (None para parsear siempre el OWL)
+            store_backend: "memory" (grafo rdflib propio), "shared" (store de
+                solo lectura sobre el snapshot, compartido entre procesos) o
+                "sqlite" (store persistente en disco con índices SPO/POS/OSP)
+            sqlite_path: Ruta de la base de datos del backend "sqlite"
+            instrument: Contar las consultas al grafo y las triplas recorridas
+                en cada petición (métricas de /metrics)
+            ingest_workers: Procesos para parsear el archivo de origen (solo N-Triples)
         """
+        if store_backend not in STORE_BACKENDS:
+            raise ValueError(f"Backend de almacenamiento desconocido: {store_backend}")
+        if store_backend == "shared" and not snapshot_path:
+            raise ValueError("El backend 'shared' requiere una ruta de snapshot")
+        if store_backend == "sqlite" and not sqlite_path:
+            raise ValueError("El backend 'sqlite' requiere una ruta de base de datos")
+        
         self.graph = Graph()
         self.ontology_path = ontology_path
+        self.snapshot_path = snapshot_path
+        self.store_backend = store_backend
+        self.sqlite_path = sqlite_path
+        self.ingest_workers = ingest_workers
         self.MUSIC = Namespace("http://example.org/music-ontology#")
         self.RDF = RDF
         self.RDFS = RDFS
+        self.ENTITY_CLASSES = {
+            "artist": self.MUSIC.Artist,
+            "album": self.MUSIC.Album,
+            "song": self.MUSIC.Song,
+            "instrument": self.MUSIC.Instrument,
+            "genre": self.MUSIC.Genre,
+        }
+        
+        # Índices de nombre y descripción por tipo de entidad
+        self._name_index: Dict[str, NGramIndex] = {}
+        self._description_index: Dict[str, NGramIndex] = {}
+        
+        # Índice de nombres para la búsqueda por relevancia (clave: (URI, tipo))
+        self._ranked_index = RankedNameIndex()
+        
+        # Índice de prefijos para autocompletado, ordenado por grado de la entidad
+        self._suggest_index = SuggestIndex()
+        
+        # Adyacencias CSR de las propiedades que recorren las consultas de relaciones
+        self._adjacency: Optional[AdjacencyIndex] = None
+        self._recommender: Optional[Recommender] = None
+        
+        # Filtros por facetas (bitmaps por tipo) y sus recuentos
+        self._facets: Optional[FacetIndex] = None
+        
+        # Tabla columnar para las agregaciones de /api/analytics (se construye en la primera consulta)
+        self._analytics: Optional[CatalogAnalytics] = None
+        
+        # Consultas SPARQL con presupuesto y caché de resultados por versión
+        self._sparql: Optional[SparqlEngine] = None
+        
+        # Índice ID -> [(URI, tipo)], por nombre local y por URI completa
+        self._id_index: Dict[str, List[Tuple[URIRef, str]]] = {}
+        
+        # Registros materializados por entidad (sustituyen a las lecturas por petición)
+        self._projection: Optional[EntityProjection] = None
+        
+        # Contadores de triplas por predicado y de instancias por clase
+        self._counters = GraphCounters()
+        
+        # Backend "shared": store sobre el snapshot y archivo de índices derivados
+        self._shared_store: Optional[SnapshotStore] = None
+        self._derived: Optional[DerivedIndexes] = None
+        
+        # Versión del grafo: se incrementa con cada modificación aplicada. Los
+        # deltas modifican el grafo y los índices en el sitio, así que toman el
+        # lock en escritura y las consultas públicas en lectura (ver `_reading`)
+        self.version = 0
+        self._lock = ReadWriteLock()
         
         # Cargar ontología
         self._load_ontology()
+        if instrument:
+            self.graph = instrument_graph(self.graph)
+        self._build_indexes()
     
     def _load_ontology(self):
-        """Cargar la ontología desde archivo"""
+        """Cargar la ontología desde el snapshot, o desde el archivo de origen (en streaming) si está obsoleto"""
         if not os.path.exists(self.ontology_path):
             raise FileNotFoundError(f"Ontología no encontrada: {self.ontology_path}")
         
+        if self.store_backend == "shared":
+            ensure_snapshot(self.ontology_path, self.snapshot_path, self.ingest_workers)
+            self._shared_store = SnapshotStore(self.snapshot_path)
+            self.graph = Graph(store=self._shared_store)
+            print(f"✓ Ontología compartida desde snapshot: {len(self.graph)} triplas")
+            return
+        
+        if self.store_backend == "sqlite":
+            store, rebuilt = open_sqlite_store(self.sqlite_path, self.ontology_path, self.snapshot_path, self.ingest_workers)
+            self.graph = Graph(store=store)
+            origin = "cargada en" if rebuilt else "abierta desde"
+            print(f"✓ Ontología {origin} SQLite: {len(self.graph)} triplas")
+            return
+        
+        if self.snapshot_path and load_snapshot(self.graph, self.snapshot_path, self.ontology_path):
+            print(f"✓ Ontología cargada desde snapshot: {len(self.graph)} triplas")
+            return
+        
         try:
-            self.graph.parse(self.ontology_path, format='xml')
-            print(f"✓ Ontología cargada: {len(self.graph)} triplas")
+            stats = ingest(self.graph, self.ontology_path, workers=self.ingest_workers)
+            print(f"✓ Ontología cargada: {len(self.graph)} triplas ({stats['triples_per_second']} triplas/s)")
         except Exception as e:
             raise Exception(f"Error al cargar ontología: {str(e)}")
+        
+        if self.snapshot_path:
+            try:
+                write_snapshot(self.graph, self.snapshot_path, self.ontology_path)
+            except OSError as e:
+                print(f"⚠ No se pudo escribir el snapshot: {e}")
     
-    def _entity_to_dict(self, uri: str, entity_type: str) -> Dict[str, Any]:
-        """Convertir entidad RDF a diccionario"""
+    def _build_indexes(self):
+        """Construir los índices derivados a partir del grafo"""
+        if self.store_backend == "shared":
+            entities = self._open_shared_indexes()
+        else:
+            self._counters.build(self.graph)
+            entities = self._build_entity_indexes()
+        self._recommender = Recommender(self._adjacency)
+        self._facets = FacetIndex(self._projection, self._adjacency)
+        self._facets.build(ENTITY_TYPES)
+        self._analytics = CatalogAnalytics(self._projection, self._adjacency)
+        self._sparql = SparqlEngine(self.graph, self.MUSIC)
+        
+        names = []
+        suggestions = []
+        for uri, entity_type, name, degree in entities:
+            names.append(((uri, entity_type), name))
+            suggestions.append(((uri, entity_type), str(uri), entity_type, name, degree))
+        self._ranked_index = RankedNameIndex()
+        self._ranked_index.build(names)
+        self._suggest_index = SuggestIndex()
+        self._suggest_index.build(suggestions)
+        self._recommender.precompute({
+            entity_type: self._projection_uris(entity_type) for entity_type in ENTITY_TYPES
+        })
+    
+    def _build_entity_indexes(self) -> List[Tuple[URIRef, str, str, int]]:
+        """
+        Construir la proyección, las adyacencias y los índices de nombres leyendo el grafo
+        
+        Returns:
+            (URI, tipo, nombre, grado) de las entidades con nombre
+        """
+        self._name_index = {entity_type: NGramIndex() for entity_type in ENTITY_TYPES}
+        self._description_index = {entity_type: NGramIndex() for entity_type in ENTITY_TYPES}
+        self._id_index = {}
+        self._projection = EntityProjection(self.graph, self.MUSIC)
+        self._projection.build(self.ENTITY_CLASSES)
+        self._adjacency = AdjacencyIndex(self.graph, {
+            name: self.MUSIC[name] for name in RELATION_PROPERTIES
+        })
+        self._adjacency.build()
+        
+        degrees = self._degrees()
+        entities = []
+        for entity_type, rdf_class in self.ENTITY_CLASSES.items():
+            for uri in self.graph.subjects(self.RDF.type, rdf_class):
+                self._index_entity(uri, entity_type, ranked=False)
+                name = self.graph.value(uri, self.MUSIC.name)
+                if name:
+                    entities.append((uri, entity_type, str(name), degrees[uri]))
+        return entities
+    
+    def _open_shared_indexes(self) -> List[Tuple[URIRef, str, str, int]]:
+        """
+        Abrir (escribiéndolos antes si faltan) los índices derivados del snapshot compartido
+        
+        La proyección, las adyacencias y los índices de nombres y de IDs se
+        leen del archivo mapeado, así que su memoria es compartida entre
+        workers; el resto de índices se construye en cada uno.
+        
+        Returns:
+            (URI, tipo, nombre, grado) de las entidades con nombre
+        """
+        store = self._shared_store
+        path = self.snapshot_path + ".idx"
+        derived = ensure_derived(store.snapshot, path, functools.partial(
+            _write_shared_indexes, self.ontology_path, self.snapshot_path, path
+        ))
+        self._derived = derived
+        self._counters.load(len(self.graph), *snapshot_counts(store))
+        self._projection = SharedProjection(self.graph, self.MUSIC, store, derived, ENTITY_TYPES)
+        self._adjacency = SharedAdjacencyIndex(self.graph, {
+            name: self.MUSIC[name] for name in RELATION_PROPERTIES
+        }, store, derived)
+        self._id_index = SharedIdIndex(derived, store.term, ENTITY_TYPES)
+        
+        entities = []
+        for entity_type in ENTITY_TYPES:
+            key = functools.partial(self._projection.uri, entity_type)
+            self._name_index[entity_type] = SharedNGramIndex(derived, f"search.name.{entity_type}", key)
+            self._description_index[entity_type] = SharedNGramIndex(derived, f"search.description.{entity_type}", key)
+            names = derived.strings(f"names.{entity_type}")
+            degrees = derived.array(f"degrees.{entity_type}")
+            for position in range(len(names)):
+                name = names.text(position)
+                if name:
+                    entities.append((key(position), entity_type, name, degrees[position]))
+        return entities
+    
+    def _export_shared_indexes(self, path: str):
+        """
+        Escribir los índices derivados de este servicio para el backend "shared"
+        
+        Args:
+            path: Ruta del archivo de índices derivados
+        """
+        degrees = self._degrees()
+        entities = {}
+        for entity_type in ENTITY_TYPES:
+            rows = []
+            for record in self._projection.iter_records(entity_type):
+                uri = URIRef(record.uri)
+                name = self.graph.value(uri, self.MUSIC.name)
+                description = self.graph.value(uri, self.MUSIC.description)
+                rows.append((str(name) if name else None, str(description) if description else None, degrees[uri]))
+            entities[entity_type] = rows
+        snapshot = Snapshot(self.snapshot_path)
+        try:
+            write_derived(path, snapshot, self._projection, self._adjacency, entities, self._id_index, ENTITY_TYPES)
+        finally:
+            snapshot.close()
+    
+    def _projection_uris(self, entity_type: str) -> List[URIRef]:
+        """URIs de las entidades materializadas de un tipo"""
+        return [URIRef(record.uri) for record in self._projection.iter_records(entity_type)]
+    
+    def _degrees(self) -> Counter:
+        """Grado (triplas como sujeto u objeto) de cada URI en una sola pasada"""
+        degrees: Counter = Counter()
+        for subject, _, obj in self.graph:
+            degrees[subject] += 1
+            if isinstance(obj, URIRef):
+                degrees[obj] += 1
+        return degrees
+    
+    def _degree(self, uri) -> int:
+        """Grado de una URI (triplas en las que aparece como sujeto u objeto)"""
+        outgoing = sum(1 for _ in self.graph.triples((uri, None, None)))
+        incoming = sum(1 for _ in self.graph.triples((None, None, uri)))
+        return outgoing + incoming
+    
+    def _index_entity(self, uri, entity_type: str, ranked: bool = True):
+        """
+        Indexar (o reindexar) el nombre y la descripción de una entidad
+        
+        Args:
+            uri: URI de la entidad
+            entity_type: Tipo de entidad
+            ranked: Actualizar también el índice de relevancia (en la carga
+                completa se construye aparte, de una vez)
+        """
         name = self.graph.value(uri, self.MUSIC.name)
         description = self.graph.value(uri, self.MUSIC.description)
+        self._name_index[entity_type].add(uri, str(name) if name else None)
+        self._description_index[entity_type].add(uri, str(description) if description else None)
+        if ranked:
+            self._ranked_index.add((uri, entity_type), str(name) if name else None)
         
-        entity = {
-            "uri": str(uri),
-            "name": str(name) if name else "Sin nombre",
-            "type": entity_type
-        }
+        for key in (str(uri), local_name(uri)):
+            entries = self._id_index.setdefault(key, [])
+            if (uri, entity_type) not in entries:
+                entries.append((uri, entity_type))
+    
+    def _unindex_entity(self, uri, entity_type: str):
+        """Eliminar una entidad de los índices"""
+        self._name_index[entity_type].remove(uri)
+        self._description_index[entity_type].remove(uri)
+        self._ranked_index.remove((uri, entity_type))
+        
+        for key in (str(uri), local_name(uri)):
+            entries = self._id_index.get(key)
+            if entries and (uri, entity_type) in entries:
+                entries.remove((uri, entity_type))
+                if not entries:
+                    del self._id_index[key]
+    
+    def _refresh_entity(self, uri):
+        """
+        Sincronizar los índices de una entidad tras modificar el grafo
+        
+        Args:
+            uri: URI de la entidad modificada
+        """
+        names_before = set()
+        for entity_type in ENTITY_TYPES:
+            record = self._projection.get(uri, entity_type)
+            if record is not None:
+                names_before.add(record.name)
+        
+        name = self.graph.value(uri, self.MUSIC.name)
+        for entity_type, rdf_class in self.ENTITY_CLASSES.items():
+            present = (uri, self.RDF.type, rdf_class) in self.graph
+            self._projection.refresh(uri, entity_type, present)
+            if present:
+                self._index_entity(uri, entity_type)
+                self._suggest_index.add(
+                    (uri, entity_type), str(uri), entity_type, str(name) if name else None, self._degree(uri)
+                )
+            else:
+                self._unindex_entity(uri, entity_type)
+                self._suggest_index.remove((uri, entity_type))
         
-        if description:
-            entity["description"] = str(description)
-        
-        # Propiedades específicas por tipo
-        if entity_type == "artist":
-            genre = self.graph.value(uri, self.MUSIC.performsGenre)
-            if genre:
-                genre_name = self.graph.value(genre, self.MUSIC.name)
-                entity["genre"] = str(genre_name) if genre_name else None
-        
-        elif entity_type == "album":
-            year = self.graph.value(uri, self.MUSIC.releaseYear)
-            if year:
-                entity["releaseYear"] = int(year)
-            genre = self.graph.value(uri, self.MUSIC.hasGenre)
-            if genre:
-                genre_name = self.graph.value(genre, self.MUSIC.name)
-                entity["genre"] = str(genre_name) if genre_name else None
-        
-        elif entity_type == "song":
-            duration = self.graph.value(uri, self.MUSIC.duration)
-            if duration:
-                entity["duration"] = int(duration)
-            year = self.graph.value(uri, self.MUSIC.releaseYear)
-            if year:
-                entity["releaseYear"] = int(year)
-            artist = self.graph.value(uri, self.MUSIC.performedBy)
-            if artist:
-                artist_name = self.graph.value(artist, self.MUSIC.name)
-                entity["artist"] = str(artist_name) if artist_name else None
+        # Registros que copian el nombre de esta entidad (p. ej. el artista de una canción)
+        if names_before != {str(name) if name else "Sin nombre"}:
+            for dependent, entity_type in self._projection.dependents(uri):
+                self._projection.refresh(dependent, entity_type, True)
+    
+    def _check_delta_triples(self, triples: Iterable[Tuple], check_values: bool) -> List[Tuple]:
+        """
+        Validar un lote de triplas antes de modificar el grafo
+        
+        Args:
+            triples: Triplas (s, p, o)
+            check_values: Comprobar que los valores numéricos se pueden leer
+                (solo para las triplas añadidas)
             
-            # Instrumentos
-            instruments = []
-            for instr in self.graph.objects(uri, self.MUSIC.usesInstrument):
-                instr_name = self.graph.value(instr, self.MUSIC.name)
-                instruments.append({
-                    "uri": str(instr),
-                    "name": str(instr_name) if instr_name else "Sin nombre"
-                })
-            if instruments:
-                entity["instruments"] = instruments
+        Returns:
+            Lista de triplas validadas
+            
+        Raises:
+            DeltaFormatError: Si alguna tripla no es válida
+        """
+        integer_properties = {self.MUSIC[name] for name in EntityProjection.INTEGER_PROPERTIES}
+        checked = []
+        for triple in triples:
+            if len(triple) != 3:
+                raise DeltaFormatError(f"Tripla inválida: {triple!r}")
+            subject, predicate, obj = triple
+            if not isinstance(subject, (URIRef, BNode)) or not isinstance(predicate, URIRef) \
+                    or not isinstance(obj, (URIRef, BNode, Literal)):
+                raise DeltaFormatError(f"Tripla inválida: {triple!r}")
+            if check_values and predicate in integer_properties:
+                try:
+                    int(obj)
+                except (TypeError, ValueError):
+                    raise DeltaFormatError(
+                        f"{local_name(predicate)} de {subject} debe ser un entero: '{obj}'"
+                    ) from None
+            checked.append((subject, predicate, obj))
+        return checked
+    
+    def _sync_delta(self, changed: List[Tuple]) -> int:
+        """
+        Actualizar los índices y registros afectados por triplas ya aplicadas al grafo
         
-        elif entity_type == "instrument":
-            instr_type = self.graph.value(uri, self.MUSIC.type)
-            if instr_type:
-                entity["type"] = str(instr_type)
+        Cada paso relee el grafo, así que repetirlo tras deshacer las triplas
+        devuelve los índices al estado anterior.
         
-        return entity
+        Returns:
+            Número de entidades reindexadas
+        """
+        touched = {subject for subject, _, _ in changed}
+        linked = {obj for _, _, obj in changed if isinstance(obj, URIRef)}
+        for subject, predicate, obj in changed:
+            self._adjacency.refresh(subject, predicate, obj if isinstance(obj, URIRef) else None)
+        relations = {self.MUSIC[name]: name for name in RELATION_PROPERTIES}
+        self._recommender.invalidate(
+            (relations[predicate], subject, obj)
+            for subject, predicate, obj in changed
+            if predicate in relations and isinstance(obj, URIRef)
+        )
+        for uri in touched:
+            self._refresh_entity(uri)
+        self._facets.update(changed)
+        self._analytics.update(changed)
+        # Las entidades enlazadas como objeto cambian de grado aunque no se reindexen
+        for uri in linked - touched:
+            for entity_uri, entity_type in self._id_index.get(str(uri), ()):
+                self._suggest_index.set_weight((entity_uri, entity_type), self._degree(entity_uri))
+        return len(touched)
     
-    def search(self, query: str) -> List[Dict[str, Any]]:
+    def apply_delta(self, additions: Iterable[Tuple], removals: Iterable[Tuple]) -> Dict[str, int]:
+        """
+        Aplicar un lote de triplas añadidas y eliminadas al grafo en memoria
+        
+        Solo se reconstruyen los índices y registros de las entidades
+        afectadas, por lo que el coste depende del tamaño del lote y no del
+        catálogo. El lote se valida completo antes de tocar el grafo y, si
+        un paso posterior falla, las triplas aplicadas se deshacen: el delta
+        se aplica entero o no se aplica. Los cambios no se escriben en el
+        OWL: con el backend "memory" una recarga desde disco los descarta;
+        con "sqlite" se conservan en la base de datos hasta que cambie el
+        OWL, pero otros procesos que comparten la base de datos no
+        actualizan sus índices ni su recuento hasta que reconstruyen el
+        servicio.
+        
+        Args:
+            additions: Triplas (s, p, o) a añadir
+            removals: Triplas (s, p, o) a eliminar (se aplican primero)
+            
+        Returns:
+            Número de triplas añadidas/eliminadas y entidades reindexadas
+            
+        Raises:
+            ReadOnlyStoreError: Si el backend de almacenamiento es de solo lectura
+            DeltaFormatError: Si alguna tripla no es válida (p. ej. un año no entero)
+        """
+        if self.store_backend == "shared":
+            raise ReadOnlyStoreError("El store compartido es de solo lectura")
+        removals = self._check_delta_triples(removals, check_values=False)
+        additions = self._check_delta_triples(additions, check_values=True)
+        
+        with self._lock.write():
+            removed: List[Tuple] = []
+            added: List[Tuple] = []
+            try:
+                for triple in removals:
+                    if triple in self.graph:
+                        self.graph.remove(triple)
+                        removed.append(triple)
+                        self._counters.remove(triple)
+                for triple in additions:
+                    if triple not in self.graph:
+                        self.graph.add(triple)
+                        added.append(triple)
+                        self._counters.add(triple)
+                refreshed = self._sync_delta(removed + added)
+            except Exception:
+                # Deshacer en orden inverso y volver a sincronizar con el grafo restaurado
+                for triple in reversed(added):
+                    self.graph.remove(triple)
+                    self._counters.remove(triple)
+                for triple in reversed(removed):
+                    self.graph.add(triple)
+                    self._counters.add(triple)
+                self._sync_delta(removed + added)
+                raise
+            if added or removed:
+                self.version += 1
+            
+            result = {
+                "added": len(added),
+                "removed": len(removed),
+                "entities_refreshed": refreshed,
+                "version": self.version,
+                "total_triples": len(self.graph),
+            }
+        
+        # Las recomendaciones precalculadas se recalculan sin bloquear las consultas
+        with self._lock.read():
+            self._recommender.refresh()
+        return result
+    
+    def _entity_record(self, uri: str, entity_type: str) -> EntityRecord:
+        """Registro materializado de una entidad"""
+        record = self._projection.get(uri, entity_type)
+        if record is None:
+            # Entidad enlazada pero sin rdf:type de la clase: se lee del grafo
+            record = self._projection.build_record(uri, entity_type)
+        return record
+    
+    def _entity_to_dict(self, uri: str, entity_type: str) -> Dict[str, Any]:
+        """Convertir entidad RDF a diccionario"""
+        return self._entity_record(uri, entity_type).to_dict()
+    
+    def _search_matches(
+        self,
+        query: str,
+        types: Optional[Iterable[str]],
+        include_description: bool,
+        filters: Optional[FacetFilters] = None
+    ) -> List[Tuple[int, Set[URIRef]]]:
+        """
+        Obtener las entidades que contienen la consulta usando los índices
+        
+        Con filtros, los tipos sin alguna de las facetas filtradas no aportan
+        resultados.
+        
+        Returns:
+            (posición del tipo, URIs coincidentes sin ordenar) por tipo, en orden de tipo
+        """
+        selected = set(types) if types else set(ENTITY_TYPES)
+        unknown = selected - set(ENTITY_TYPES)
+        if unknown:
+            raise ValueError(f"Tipos de entidad desconocidos: {', '.join(sorted(unknown))}")
+        
+        keys = []
+        for rank, entity_type in enumerate(ENTITY_TYPES):
+            if entity_type not in selected:
+                continue
+            facets = self._facets.get(entity_type) if filters else None
+            if facets is not None and not facets.supports(filters):
+                continue
+            matches = set(self._name_index[entity_type].search(query))
+            if include_description:
+                matches.update(self._description_index[entity_type].search(query))
+            if facets is not None:
+                matches = set(facets.members(self._facet_selection(entity_type, filters), matches))
+            keys.append((rank, matches))
+        return keys
+    
+    @_reading
+    def search(
+        self,
+        query: str,
+        types: Optional[Iterable[str]] = None,
+        include_description: bool = False
+    ) -> List[Dict[str, Any]]:
         """
         Búsqueda general en la ontología
         
+        Usa el índice de trigramas para obtener solo los candidatos que pueden
+        contener la consulta, en lugar de recorrer todas las entidades del grafo.
+        
         Args:
             query: Término de búsqueda
+            types: Tipos de entidad en los que buscar (todos por defecto)
+            include_description: Buscar también en music:description
             
         Returns:
-            Lista de resultados
+            Lista de resultados agrupados por tipo
         """
-        query_lower = query.lower()
-        results = []
+        results, _ = self.search_page(query, types, include_description)
+        return results
+    
+    @_reading
+    def search_page(
+        self,
+        query: str,
+        types: Optional[Iterable[str]] = None,
+        include_description: bool = False,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        filters: Optional[FacetFilters] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Búsqueda paginada: solo se materializan las entidades de la página
         
-        # Buscar artistas
-        for artist in self.graph.subjects(self.RDF.type, self.MUSIC.Artist):
-            name = self.graph.value(artist, self.MUSIC.name)
-            if name and query_lower in str(name).lower():
-                results.append({
-                    "type": "artist",
-                    "data": self._entity_to_dict(artist, "artist")
-                })
+        Args:
+            query: Término de búsqueda
+            types: Tipos de entidad en los que buscar (todos por defecto)
+            include_description: Buscar también en music:description
+            limit: Tamaño de página (None para todos los resultados)
+            cursor: Cursor devuelto por la página anterior
+            filters: Filtros por facetas (género, artista, año...)
+            
+        Returns:
+            Resultados de la página y metadatos de paginación
+        """
+        records, pagination = self._search_records(query, types, include_description, limit, cursor, filters)
+        return [{"type": record.entity_type, "data": record.to_dict()} for record in records], pagination
+    
+    @_reading
+    def search_fragments(
+        self,
+        query: str,
+        types: Optional[Iterable[str]] = None,
+        include_description: bool = False,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        filters: Optional[FacetFilters] = None
+    ) -> Tuple[List[bytes], Dict[str, Any]]:
+        """Igual que `search_page`, con cada resultado ya codificado en JSON"""
+        records, pagination = self._search_records(query, types, include_description, limit, cursor, filters)
+        return [item_fragment(record.entity_type, record.to_json()) for record in records], pagination
+    
+    def _search_records(
+        self,
+        query: str,
+        types: Optional[Iterable[str]],
+        include_description: bool,
+        limit: Optional[int],
+        cursor: Optional[str],
+        filters: Optional[FacetFilters] = None
+    ) -> Tuple[List[EntityRecord], Dict[str, Any]]:
+        """
+        Registros de una página de resultados de búsqueda
         
-        # Buscar álbumes
-        for album in self.graph.subjects(self.RDF.type, self.MUSIC.Album):
-            name = self.graph.value(album, self.MUSIC.name)
-            if name and query_lower in str(name).lower():
-                results.append({
-                    "type": "album",
-                    "data": self._entity_to_dict(album, "album")
-                })
+        Las coincidencias no se ordenan completas en cada página: se descartan
+        las anteriores al cursor y solo se ordenan las de la página.
+        """
+        matches = self._search_matches(query, types, include_description, filters)
+        total = sum(len(uris) for _, uris in matches)
         
-        # Buscar canciones
-        for song in self.graph.subjects(self.RDF.type, self.MUSIC.Song):
-            name = self.graph.value(song, self.MUSIC.name)
-            if name and query_lower in str(name).lower():
-                results.append({
-                    "type": "song",
-                    "data": self._entity_to_dict(song, "song")
-                })
+        after_rank, after = 0, None
+        if cursor:
+            entity_type, uri = decode_cursor(cursor, 2)
+            if entity_type not in ENTITY_TYPES:
+                raise ValueError(f"Cursor inválido: {cursor}")
+            after_rank, after = ENTITY_TYPES.index(entity_type), URIRef(uri)
         
-        # Buscar instrumentos
-        for instrument in self.graph.subjects(self.RDF.type, self.MUSIC.Instrument):
-            name = self.graph.value(instrument, self.MUSIC.name)
-            if name and query_lower in str(name).lower():
-                results.append({
-                    "type": "instrument",
-                    "data": self._entity_to_dict(instrument, "instrument")
-                })
+        keys: List[Tuple[int, URIRef]] = []
+        remaining = 0
+        for rank, uris in matches:
+            if rank < after_rank:
+                continue
+            start = after if rank == after_rank else None
+            if start is not None:
+                uris = {uri for uri in uris if uri > start}
+            remaining += len(uris)
+            wanted = None if limit is None else limit - len(keys)
+            if wanted != 0:
+                keys.extend((rank, uri) for uri in self._first_matches(ENTITY_TYPES[rank], uris, start, wanted))
         
-        # Buscar géneros
-        for genre in self.graph.subjects(self.RDF.type, self.MUSIC.Genre):
-            name = self.graph.value(genre, self.MUSIC.name)
-            if name and query_lower in str(name).lower():
-                results.append({
-                    "type": "genre",
-                    "data": self._entity_to_dict(genre, "genre")
-                })
+        records = [self._entity_record(uri, ENTITY_TYPES[rank]) for rank, uri in keys]
         
-        return results
+        next_key = None
+        if remaining > len(keys) and keys:
+            rank, uri = keys[-1]
+            next_key = [ENTITY_TYPES[rank], str(uri)]
+        return records, page_info(limit, total, next_key)
+    
+    def _first_matches(
+        self,
+        entity_type: str,
+        uris: Set[URIRef],
+        after: Optional[URIRef],
+        limit: Optional[int]
+    ) -> List[URIRef]:
+        """
+        Primeras `limit` URIs coincidentes (todas posteriores a `after`) en orden de URI
+        
+        Con coincidencias densas se recorre el orden de la proyección desde el
+        cursor hasta llenar la página (~limit * n / m pasos); si no, se eligen
+        las menores con un montículo (~m pasos).
+        """
+        if limit is None:
+            return sorted(uris)
+        if limit * self._projection.count(entity_type) <= len(uris) * len(uris):
+            page = []
+            for uri in self._projection.iter_uris(entity_type, after):
+                if uri in uris:
+                    page.append(uri)
+                    if len(page) == limit:
+                        break
+            return page
+        return heapq.nsmallest(limit, uris)
+    
+    @_reading
+    def ranked_search(
+        self,
+        query: str,
+        types: Optional[Iterable[str]] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Búsqueda por nombre ordenada por relevancia
+        
+        Tolera mayúsculas, acentos y erratas: primero los nombres idénticos,
+        después los que empiezan por la consulta, los que contienen todas sus
+        palabras (enteras o como prefijo) y por último los que las contienen
+        con erratas.
+        
+        Args:
+            query: Término de búsqueda
+            types: Tipos de entidad en los que buscar (todos por defecto)
+            limit: Número máximo de resultados
+            
+        Returns:
+            Resultados con su puntuación (0-1) y nivel de coincidencia
+        """
+        selected = set(types) if types else set(ENTITY_TYPES)
+        unknown = selected - set(ENTITY_TYPES)
+        if unknown:
+            raise ValueError(f"Tipos de entidad desconocidos: {', '.join(sorted(unknown))}")
+        
+        accept = None if len(selected) == len(ENTITY_TYPES) else (lambda key: key[1] in selected)
+        return [
+            {
+                "type": entity_type,
+                "score": score,
+                "match": level,
+                "data": self._entity_to_dict(uri, entity_type)
+            }
+            for (uri, entity_type), score, level in self._ranked_index.search(query, limit, accept)
+        ]
+    
+    @_reading
+    def suggest(
+        self,
+        prefix: str,
+        types: Optional[Iterable[str]] = None,
+        limit: int = 10
+    ) -> List[Dict[str, str]]:
+        """
+        Sugerencias de autocompletado por prefijo de nombre
+        
+        Solo devuelve URI, nombre y tipo (no se materializan las entidades),
+        ordenados por el grado de la entidad en el grafo.
+        
+        Args:
+            prefix: Texto escrito por el usuario
+            types: Tipos de entidad admitidos (todos por defecto)
+            limit: Número máximo de sugerencias
+        """
+        selected = set(types) if types else None
+        if selected is not None:
+            unknown = selected - set(ENTITY_TYPES)
+            if unknown:
+                raise ValueError(f"Tipos de entidad desconocidos: {', '.join(sorted(unknown))}")
+        return self._suggest_index.suggest(prefix, limit, selected)
+    
+    @_reading
+    def get_entity(self, entity_id: str, entity_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Obtener una entidad por ID en tiempo constante
+        
+        Args:
+            entity_id: Nombre local (p. ej. "artist-john-lennon") o URI completa
+            entity_type: Restringir la búsqueda a un tipo de entidad
+            
+        Returns:
+            Datos de la entidad, o None si no existe
+            
+        Raises:
+            AmbiguousEntityError: Si el ID corresponde a varias entidades
+        """
+        resolved = self._resolve(entity_id, entity_type)
+        if resolved is None:
+            return None
+        uri, candidate_type = resolved
+        return self._entity_to_dict(uri, candidate_type)
+    
+    def _resolve(self, entity_id: str, entity_type: Optional[str] = None) -> Optional[Tuple[URIRef, str]]:
+        """
+        URI y tipo de la entidad con un ID (nombre local o URI completa)
+        
+        Args:
+            entity_id: ID de la entidad
+            entity_type: Restringir la búsqueda a un tipo de entidad
+            
+        Returns:
+            (URI, tipo), o None si no existe
+            
+        Raises:
+            AmbiguousEntityError: Si el ID corresponde a varias entidades
+        """
+        candidates = self._id_index.get(entity_id, [])
+        if entity_type is not None:
+            candidates = [c for c in candidates if c[1] == entity_type]
+        
+        if not candidates:
+            return None
+        if len(candidates) > 1:
+            raise AmbiguousEntityError(
+                entity_id,
+                [(str(uri), candidate_type) for uri, candidate_type in candidates]
+            )
+        return candidates[0]
+    
+    @_reading
+    def list_entities(
+        self,
+        entity_type: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        filters: Optional[FacetFilters] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Listar entidades de un tipo en orden estable de URI
+        
+        Args:
+            entity_type: Tipo de entidad
+            limit: Tamaño de página (None para todas)
+            cursor: Cursor devuelto por la página anterior
+            filters: Filtros por facetas (género, artista, año...)
+            
+        Returns:
+            Entidades de la página y metadatos de paginación
+            
+        Raises:
+            ValueError: Si el cursor no es válido o un filtro no se aplica al tipo
+        """
+        records, pagination = self._list_records(entity_type, limit, cursor, filters)
+        return [{"type": entity_type, "data": record.to_dict()} for record in records], pagination
+    
+    @_reading
+    def list_fragments(
+        self,
+        entity_type: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        filters: Optional[FacetFilters] = None
+    ) -> Tuple[List[bytes], Dict[str, Any]]:
+        """Igual que `list_entities`, con cada entidad ya codificada en JSON"""
+        records, pagination = self._list_records(entity_type, limit, cursor, filters)
+        return [item_fragment(entity_type, record.to_json()) for record in records], pagination
+    
+    def _list_records(
+        self,
+        entity_type: str,
+        limit: Optional[int],
+        cursor: Optional[str],
+        filters: Optional[FacetFilters] = None
+    ) -> Tuple[List[EntityRecord], Dict[str, Any]]:
+        """Registros de una página de un listado"""
+        after = URIRef(decode_cursor(cursor, 1)[0]) if cursor else None
+        if not filters:
+            records, has_more = self._projection.page(entity_type, after, limit)
+            total = self._projection.count(entity_type)
+        else:
+            selection = self._facet_selection(entity_type, filters)
+            uris, has_more = self._facets.get(entity_type).page(selection, after, limit)
+            records = [self._entity_record(uri, entity_type) for uri in uris]
+            total = selection.bit_count()
+        next_key = [records[-1].uri] if has_more and records else None
+        return records, page_info(limit, total, next_key)
+    
+    def _facet_selection(self, entity_type: str, filters: Optional[FacetFilters]) -> Optional[int]:
+        """
+        Bitmap de las entidades de un tipo que cumplen los filtros (None sin filtros)
+        
+        Los IDs de los filtros de términos se resuelven como entidades del
+        tipo de la faceta; un ID desconocido no selecciona ninguna entidad.
+        
+        Raises:
+            ValueError: Si alguna faceta filtrada no existe para el tipo
+        """
+        if not filters:
+            return None
+        terms = {}
+        for name, ids in filters.terms.items():
+            nodes = []
+            for entity_id in ids:
+                for uri, candidate_type in self._id_index.get(entity_id, ()):
+                    node = self._adjacency.node(uri)
+                    if candidate_type == name and node is not None:
+                        nodes.append(node)
+            terms[name] = nodes
+        return self._facets.get(entity_type).select(terms, filters.ranges)
+    
+    def _entity_label(self, entity_type: str, uri: URIRef) -> Tuple[str, str]:
+        """ID y nombre de una entidad (valores de facetas y claves de agregaciones)"""
+        return local_name(uri), self._entity_record(uri, entity_type).name
+    
+    @_reading
+    def facet_counts(
+        self,
+        entity_types: Optional[Iterable[str]] = None,
+        filters: Optional[FacetFilters] = None,
+        query: Optional[str] = None,
+        include_description: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Recuento de resultados por valor de cada faceta
+        
+        Cuenta sobre todos los resultados (no solo una página), sumando los
+        tipos de entidad. Sin consulta ni filtros los recuentos están
+        precalculados.
+        
+        Args:
+            entity_types: Tipos de entidad (todos por defecto)
+            filters: Filtros por facetas aplicados a los resultados
+            query: Término de búsqueda (None para contar sobre el listado completo)
+            include_description: Buscar también en music:description
+            
+        Returns:
+            Faceta -> valores de término ({value, uri, name, count}) o
+            intervalos numéricos ({min, max, count})
+        """
+        if query is not None:
+            matches = {
+                ENTITY_TYPES[rank]: uris
+                for rank, uris in self._search_matches(query, entity_types, include_description, filters)
+            }
+            selections = {
+                entity_type: self._facets.get(entity_type).bitmap(matches.get(entity_type, ()))
+                for entity_type in (entity_types or ENTITY_TYPES)
+                if not filters or self._facets.get(entity_type).supports(filters)
+            }
+        else:
+            selections = {
+                entity_type: self._facet_selection(entity_type, filters)
+                for entity_type in (entity_types or ENTITY_TYPES)
+            }
+        return self._facets.counts(selections, self._entity_label)
+    
+    @_reading
+    def faceted_list(
+        self,
+        entity_type: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        filters: Optional[FacetFilters] = None,
+        facets: bool = False,
+        encoded: bool = False
+    ) -> Tuple[List[Any], Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Página de un listado y sus recuentos por faceta en una sola llamada
+        
+        Ambos se calculan sobre el mismo servicio, así que los recuentos
+        corresponden a los resultados paginados.
+        
+        Args:
+            entity_type: Tipo de entidad
+            limit: Tamaño de página (None para todas)
+            cursor: Cursor devuelto por la página anterior
+            filters: Filtros por facetas (género, artista, año...)
+            facets: Calcular los recuentos aunque no haya filtros
+            encoded: Devolver las entidades ya codificadas en JSON
+        
+        Returns:
+            Entidades de la página, metadatos de paginación y recuentos
+            (None si no se piden ni hay filtros)
+        """
+        list_method = self.list_fragments if encoded else self.list_entities
+        items, pagination = list_method(entity_type, limit, cursor, filters)
+        counts = self.facet_counts([entity_type], filters) if facets or filters else None
+        return items, pagination, counts
+    
+    @_reading
+    def faceted_search(
+        self,
+        query: str,
+        types: Optional[Iterable[str]] = None,
+        include_description: bool = False,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        filters: Optional[FacetFilters] = None,
+        facets: bool = False,
+        encoded: bool = False
+    ) -> Tuple[List[Any], Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Igual que `faceted_list` para una búsqueda (`search_page` o `search_fragments`)"""
+        search_method = self.search_fragments if encoded else self.search_page
+        results, pagination = search_method(query, types, include_description, limit, cursor, filters)
+        counts = self.facet_counts(types, filters, query, include_description) if facets or filters else None
+        return results, pagination, counts
+    
+    @_reading
+    def iter_entities(self, entity_type: str) -> Iterator[Dict[str, Any]]:
+        """
+        Generar las entidades de un tipo una a una, en orden de URI
+        
+        A diferencia de `get_all_*`, no construye la lista completa: cada
+        entidad se serializa cuando el consumidor la pide. Los registros se
+        toman al llamar, con el lock en lectura, y se recorren sin él, así que
+        una exportación lenta no bloquea los deltas.
+        
+        Args:
+            entity_type: Tipo de entidad
+        """
+        if entity_type not in ENTITY_TYPES:
+            raise ValueError(f"Tipo de entidad desconocido: {entity_type}")
+        records = self._projection.iter_records(entity_type)
+        return ({"type": entity_type, "data": record.to_dict()} for record in records)
+    
+    @_reading
+    def iter_entity_json(self, entity_type: str) -> Iterator[bytes]:
+        """Igual que `iter_entities`, con los datos de cada entidad ya codificados en JSON"""
+        if entity_type not in ENTITY_TYPES:
+            raise ValueError(f"Tipo de entidad desconocido: {entity_type}")
+        return (record.to_json() for record in self._projection.iter_records(entity_type))
+    
+    def iter_all_artists(self) -> Iterator[Dict[str, Any]]:
+        """Generar todos los artistas"""
+        return self.iter_entities("artist")
+    
+    def iter_all_albums(self) -> Iterator[Dict[str, Any]]:
+        """Generar todos los álbumes"""
+        return self.iter_entities("album")
+    
+    def iter_all_songs(self) -> Iterator[Dict[str, Any]]:
+        """Generar todas las canciones"""
+        return self.iter_entities("song")
+    
+    def iter_all_instruments(self) -> Iterator[Dict[str, Any]]:
+        """Generar todos los instrumentos"""
+        return self.iter_entities("instrument")
+    
+    def iter_all_genres(self) -> Iterator[Dict[str, Any]]:
+        """Generar todos los géneros"""
+        return self.iter_entities("genre")
     
     def get_all_artists(self) -> List[Dict[str, Any]]:
         """Obtener todos los artistas"""
-        artists = []
-        for artist in self.graph.subjects(self.RDF.type, self.MUSIC.Artist):
-            artists.append({
-                "type": "artist",
-                "data": self._entity_to_dict(artist, "artist")
-            })
-        return artists
+        return self.list_entities("artist")[0]
     
     def get_all_albums(self) -> List[Dict[str, Any]]:
         """Obtener todos los álbumes"""
-        albums = []
-        for album in self.graph.subjects(self.RDF.type, self.MUSIC.Album):
-            albums.append({
-                "type": "album",
-                "data": self._entity_to_dict(album, "album")
-            })
-        return albums
+        return self.list_entities("album")[0]
     
     def get_all_songs(self) -> List[Dict[str, Any]]:
         """Obtener todas las canciones"""
-        songs = []
-        for song in self.graph.subjects(self.RDF.type, self.MUSIC.Song):
-            songs.append({
-                "type": "song",
-                "data": self._entity_to_dict(song, "song")
-            })
-        return songs
+        return self.list_entities("song")[0]
     
     def get_all_instruments(self) -> List[Dict[str, Any]]:
         """Obtener todos los instrumentos"""
-        instruments = []
-        for instrument in self.graph.subjects(self.RDF.type, self.MUSIC.Instrument):
-            instruments.append({
-                "type": "instrument",
-                "data": self._entity_to_dict(instrument, "instrument")
-            })
-        return instruments
+        return self.list_entities("instrument")[0]
     
     def get_all_genres(self) -> List[Dict[str, Any]]:
         """Obtener todos los géneros"""
-        genres = []
-        for genre in self.graph.subjects(self.RDF.type, self.MUSIC.Genre):
-            genres.append({
-                "type": "genre",
-                "data": self._entity_to_dict(genre, "genre")
-            })
-        return genres
+        return self.list_entities("genre")[0]
+    
+    def _entity_iri(self, entity_id: str) -> URIRef:
+        """URI de una entidad a partir de su ID local o de su URI completa"""
+        return URIRef(entity_id) if '#' in entity_id else self.MUSIC[entity_id]
+    
+    def _related(self, entity_id: str, steps: Iterable[Tuple[str, bool]], entity_type: str) -> List[Dict[str, Any]]:
+        """Entidades alcanzadas desde `entity_id` recorriendo las adyacencias"""
+        return [
+            {"type": entity_type, "data": self._entity_to_dict(uri, entity_type)}
+            for uri in self._adjacency.path(self._entity_iri(entity_id), steps)
+        ]
     
+    @_reading
     def get_albums_by_artist(self, artist_uri: str) -> List[Dict[str, Any]]:
         """Obtener álbumes de un artista"""
-        artist_iri = self.MUSIC[artist_uri.split('#')[-1]] if '#' not in artist_uri else artist_uri
-        albums = []
-        
-        for album in self.graph.objects(artist_iri, self.MUSIC.hasAlbum):
-            albums.append({
-                "type": "album",
-                "data": self._entity_to_dict(album, "album")
-            })
-        return albums
+        return self._related(artist_uri, [("hasAlbum", False)], "album")
     
+    @_reading
     def get_songs_by_album(self, album_uri: str) -> List[Dict[str, Any]]:
         """Obtener canciones de un álbum"""
-        album_iri = self.MUSIC[album_uri.split('#')[-1]] if '#' not in album_uri else album_uri
-        songs = []
-        
-        for song in self.graph.objects(album_iri, self.MUSIC.containsSong):
-            songs.append({
-                "type": "song",
-                "data": self._entity_to_dict(song, "song")
-            })
-        return songs
+        return self._related(album_uri, [("containsSong", False)], "song")
     
+    @_reading
     def get_songs_by_artist(self, artist_uri: str) -> List[Dict[str, Any]]:
-        """Obtener todas las canciones de un artista"""
-        artist_iri = self.MUSIC[artist_uri.split('#')[-1]] if '#' not in artist_uri else artist_uri
-        songs = []
-        
-        # Obtener albums del artista
-        for album in self.graph.objects(artist_iri, self.MUSIC.hasAlbum):
-            # Obtener canciones del album
-            for song in self.graph.objects(album, self.MUSIC.containsSong):
-                songs.append({
-                    "type": "song",
-                    "data": self._entity_to_dict(song, "song")
-                })
-        return songs
+        """Obtener todas las canciones de un artista (artista -> álbumes -> canciones)"""
+        return self._related(artist_uri, [("hasAlbum", False), ("containsSong", False)], "song")
     
+    @_reading
     def get_songs_by_instrument(self, instrument_uri: str) -> List[Dict[str, Any]]:
         """Obtener canciones que usan un instrumento"""
-        instrument_iri = self.MUSIC[instrument_uri.split('#')[-1]] if '#' not in instrument_uri else instrument_uri
-        songs = []
+        return self._related(instrument_uri, [("usesInstrument", True)], "song")
+    
+    @_reading
+    def recommend(self, entity_type: str, entity_id: str, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """
+        Entidades similares por vecinos compartidos (índice de Jaccard)
         
-        for song in self.graph.subjects(self.MUSIC.usesInstrument, instrument_iri):
-            songs.append({
-                "type": "song",
-                "data": self._entity_to_dict(song, "song")
-            })
-        return songs
+        Canciones por instrumentos, artistas y álbumes por géneros e
+        instrumentos por las canciones en las que coinciden.
+        
+        Args:
+            entity_type: Tipo de entidad (song, artist, album o instrument)
+            entity_id: ID local o URI completa de la entidad
+            limit: Número máximo de resultados
+            
+        Returns:
+            Resultados con su puntuación y el número de rasgos compartidos,
+            o None si no hay una entidad de ese tipo con ese ID
+            
+        Raises:
+            AmbiguousEntityError: Si el ID corresponde a varias entidades del tipo
+        """
+        resolved = self._resolve(entity_id, entity_type)
+        if resolved is None:
+            return None
+        return [
+            {
+                "type": entity_type,
+                "score": score,
+                "shared": shared,
+                "data": self._entity_to_dict(uri, entity_type)
+            }
+            for uri, score, shared in self._recommender.similar(entity_type, resolved[0], limit)
+        ]
     
+    @_reading
+    def traverse(self, entity_id: str, path: str, limit: int = 100) -> Optional[List[Dict[str, Any]]]:
+        """
+        Recorrer un camino de propiedades desde una entidad
+        
+        Args:
+            entity_id: ID local o URI completa de la entidad de partida
+            path: Propiedades separadas por "/"; "^" recorre una propiedad en
+                sentido inverso (p. ej. "usesInstrument/^usesInstrument")
+            limit: Número máximo de resultados
+            
+        Returns:
+            Entidades alcanzadas (sin repetir y sin la de partida), o None si
+            no existe ninguna entidad con ese ID
+            
+        Raises:
+            ValueError: Si el camino contiene propiedades no indexadas
+            AmbiguousEntityError: Si el ID corresponde a varias entidades
+        """
+        steps = []
+        for step in path.split("/"):
+            name = step.strip().lstrip("^")
+            if name not in RELATION_PROPERTIES:
+                raise ValueError(
+                    f"Propiedad no disponible: {step} (use {', '.join(RELATION_PROPERTIES)})"
+                )
+            steps.append((name, step.strip().startswith("^")))
+        
+        uris = {uri for uri, _ in self._id_index.get(entity_id, ())}
+        if not uris:
+            return None
+        if len(uris) > 1:
+            raise AmbiguousEntityError(
+                entity_id,
+                [(str(uri), entity_type) for uri, entity_type in self._id_index[entity_id]]
+            )
+        start = uris.pop()
+        results = []
+        for uri in self._adjacency.path(start, steps, max_nodes=TRAVERSE_MAX_NODES, distinct=True):
+            if uri == start:
+                continue
+            entries = self._id_index.get(str(uri))
+            if entries:
+                entity_type = entries[0][1]
+                results.append({"type": entity_type, "data": self._entity_to_dict(uri, entity_type)})
+            else:
+                results.append({"type": None, "data": {"uri": str(uri)}})
+            if len(results) >= limit:
+                break
+        return results
+    
+    @_reading
+    def sparql(self, query: str, max_rows: int, timeout: float) -> SparqlStream:
+        """
+        Preparar una consulta SPARQL SELECT de solo lectura
+        
+        Las filas se evalúan después, por fragmentos, con `sparql_fetch`; el
+        lock solo se toma mientras se evalúa cada fragmento, así que un
+        cliente lento no retrasa los deltas.
+        
+        Args:
+            query: Texto de la consulta (prefijos music, rdf, rdfs, owl y xsd predefinidos)
+            max_rows: Máximo de filas devueltas
+            timeout: Segundos máximos de evaluación
+            
+        Returns:
+            Evaluación pendiente
+            
+        Raises:
+            SparqlError: Si la consulta no es válida o no está permitida
+        """
+        return self._sparql.open(query, self.version, max_rows, timeout)
+    
+    @_reading
+    def sparql_fetch(self, stream: SparqlStream) -> List[bytes]:
+        """
+        Evaluar el siguiente fragmento de filas de una consulta SPARQL
+        
+        Si un delta cambió el grafo desde el fragmento anterior, la
+        evaluación termina (truncada) en lugar de reanudarse sobre el grafo
+        modificado.
+        
+        Raises:
+            SparqlTimeoutError: Si se agota el plazo antes de la primera fila
+        """
+        if stream.live and stream.version != self.version:
+            stream.abort("graph_changed")
+            return []
+        return stream.fetch()
+    
+    @_reading
     def get_instruments_by_type(self, instr_type: str) -> List[Dict[str, Any]]:
         """Obtener instrumentos por tipo"""
         instruments = []
@@ -271,25 +1248,109 @@ class OntologyService:
                 })
         return instruments
     
+    @_reading
     def get_genres_by_artist(self, artist_uri: str) -> List[Dict[str, Any]]:
         """Obtener géneros de un artista"""
-        artist_iri = self.MUSIC[artist_uri.split('#')[-1]] if '#' not in artist_uri else artist_uri
-        genres = []
-        
-        for genre in self.graph.objects(artist_iri, self.MUSIC.performsGenre):
-            genres.append({
-                "type": "genre",
-                "data": self._entity_to_dict(genre, "genre")
-            })
-        return genres
-    
-    def get_ontology_stats(self) -> Dict[str, int]:
-        """Obtener estadísticas de la ontología"""
-        return {
-            "total_triples": len(self.graph),
-            "artists": len(list(self.graph.subjects(self.RDF.type, self.MUSIC.Artist))),
-            "albums": len(list(self.graph.subjects(self.RDF.type, self.MUSIC.Album))),
-            "songs": len(list(self.graph.subjects(self.RDF.type, self.MUSIC.Song))),
-            "instruments": len(list(self.graph.subjects(self.RDF.type, self.MUSIC.Instrument))),
-            "genres": len(list(self.graph.subjects(self.RDF.type, self.MUSIC.Genre)))
+        return self._related(artist_uri, [("performsGenre", False)], "genre")
+    
+    @_reading
+    def batch_lookup(
+        self,
+        entities: Iterable[Tuple[str, Optional[str]]] = (),
+        relations: Iterable[Tuple[str, str]] = ()
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Resolver varias entidades y relaciones en una sola llamada
+        
+        Las consultas repetidas dentro del lote se resuelven una sola vez.
+        Los errores se devuelven por elemento sin interrumpir el resto.
+        
+        Args:
+            entities: Pares (ID, tipo o None)
+            relations: Pares (relación, ID), p. ej. ("albums_by_artist", "artist-bjork")
+            
+        Returns:
+            {"entities": [...], "relations": [...]} en el orden recibido
+        """
+        entity_memo: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+        entity_results = []
+        for entity_id, entity_type in entities:
+            key = (entity_id, entity_type)
+            if key not in entity_memo:
+                result: Dict[str, Any] = {"id": entity_id, "type": entity_type}
+                try:
+                    data = self.get_entity(entity_id, entity_type)
+                    if data is None:
+                        result.update(found=False, error="Entidad no encontrada")
+                    else:
+                        result.update(found=True, data=data)
+                except AmbiguousEntityError as e:
+                    result.update(found=False, error=str(e))
+                entity_memo[key] = result
+            entity_results.append(entity_memo[key])
+        
+        handlers = {
+            "albums_by_artist": self.get_albums_by_artist,
+            "songs_by_album": self.get_songs_by_album,
+            "songs_by_artist": self.get_songs_by_artist,
+            "songs_by_instrument": self.get_songs_by_instrument,
+            "genres_by_artist": self.get_genres_by_artist,
         }
+        relation_memo: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        relation_results = []
+        for relation, entity_id in relations:
+            key = (relation, entity_id)
+            if key not in relation_memo:
+                result = {"relation": relation, "id": entity_id}
+                handler = handlers.get(relation)
+                if handler is None:
+                    result["error"] = f"Relación desconocida: {relation}"
+                else:
+                    result["data"] = handler(entity_id)
+                relation_memo[key] = result
+            relation_results.append(relation_memo[key])
+        
+        return {"entities": entity_results, "relations": relation_results}
+    
+    @_reading
+    def song_analytics(
+        self,
+        dimensions: List[str],
+        measure: Optional[str] = None,
+        aggregate: str = "count",
+        limit: Optional[int] = None,
+        order: str = "value"
+    ) -> Dict[str, Any]:
+        """
+        Agregar las canciones por dimensiones sobre la tabla columnar
+        
+        Args:
+            dimensions: Dimensiones (album, artist, genre, instrument, year, decade)
+            measure: Medida agregada (duration, year; None para contar canciones)
+            aggregate: count, sum, avg, min o max
+            limit: Número máximo de grupos (None para todos)
+            order: "value" (mayor agregado primero) o "key" (por dimensiones)
+            
+        Returns:
+            Grupos (claves, canciones y agregado) y totales
+            
+        Raises:
+            AnalyticsQueryError: Si la dimensión, la medida o la agregación no son válidas
+        """
+        return self._analytics.group_by(dimensions, measure, aggregate, limit, order, self._entity_label)
+    
+    @_reading
+    def get_ontology_stats(self) -> Dict[str, Any]:
+        """
+        Obtener estadísticas de la ontología
+        
+        Se calculan a partir de contadores mantenidos en la carga y en cada
+        delta, sin recorrer el grafo.
+        """
+        return self._counters.summary(self.MUSIC)
+
+
+def _write_shared_indexes(ontology_path: str, snapshot_path: str, path: str):
+    """Construir un servicio en memoria desde el snapshot y escribir sus índices derivados (en un proceso aparte)"""
+    service = OntologyService(ontology_path, snapshot_path=snapshot_path)
+    service._export_shared_indexes(path)
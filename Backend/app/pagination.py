@@ -0,0 +1,88 @@
+"""
+Paginación - Cursores opacos y proyección de campos para los listados
+"""
+
+import base64
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """El cursor recibido no es válido"""
+
+
+def encode_cursor(key: Sequence[str]) -> str:
+    """
+    Codificar la clave de ordenación del último elemento de una página
+
+    Args:
+        key: Clave de ordenación (p. ej. [uri] o [tipo, uri])
+
+    Returns:
+        Cursor opaco apto para URLs
+    """
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple[str, ...]:
+    """
+    Decodificar un cursor generado por `encode_cursor`
+
+    Args:
+        cursor: Cursor opaco
+        size: Número de componentes esperados en la clave
+
+    Raises:
+        InvalidCursorError: Si el cursor está mal formado
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursorError(f"Cursor inválido: {cursor}") from e
+
+    if not isinstance(key, list) or len(key) != size or not all(isinstance(k, str) for k in key):
+        raise InvalidCursorError(f"Cursor inválido: {cursor}")
+    return tuple(key)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Convertir el parámetro `fields=a,b,c` en una lista de campos"""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def project_fields(items: Iterable[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """
+    Quedarse solo con los campos pedidos de cada entidad
+
+    La URI se conserva siempre para que el cliente pueda identificar la entidad.
+
+    Args:
+        items: Resultados con forma {"type": ..., "data": {...}}
+        fields: Campos de `data` a conservar (None para todos)
+    """
+    if fields is None:
+        return list(items)
+
+    keep = set(fields)
+    keep.add("uri")
+    return [
+        {
+            "type": item["type"],
+            "data": {k: v for k, v in item["data"].items() if k in keep}
+        }
+        for item in items
+    ]
+
+
+def page_info(limit: Optional[int], total: int, next_key: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Metadatos de paginación para `ApiResponse.pagination`"""
+    return {
+        "limit": limit,
+        "total": total,
+        "next_cursor": encode_cursor(next_key) if next_key is not None else None,
+        "has_more": next_key is not None,
+    }
@@ -0,0 +1,291 @@
+"""
+Proyección de entidades - Registros materializados a partir del grafo RDF
+"""
+
+from bisect import bisect_right, insort
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from rdflib import Graph, Namespace, RDF
+from app.encoding import dumps
+
+# Marca para enlaces ausentes (distinto de un enlace a una entidad sin nombre)
+MISSING = object()
+
+
+class EntityRecord:
+    """
+    Registro compacto de una entidad con los nombres relacionados ya resueltos
+
+    Equivale a una lectura de `OntologyService._entity_to_dict`, pero se
+    construye una sola vez al cargar la ontología.
+    """
+
+    __slots__ = (
+        "uri", "entity_type", "name", "description", "genre",
+        "release_year", "duration", "artist", "instrument_type", "instruments", "_json",
+    )
+
+    def __init__(self, uri: str, entity_type: str, name: str):
+        self.uri = uri
+        self.entity_type = entity_type
+        self.name = name
+        self.description: Optional[str] = None
+        self.genre: Any = MISSING
+        self.release_year: Optional[int] = None
+        self.duration: Optional[int] = None
+        self.artist: Any = MISSING
+        self.instrument_type: Optional[str] = None
+        self.instruments: Tuple[Tuple[str, str], ...] = ()
+        self._json: Optional[bytes] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializar el registro con la misma forma que la API ha expuesto siempre"""
+        entity: Dict[str, Any] = {
+            "uri": self.uri,
+            "name": self.name,
+            "type": self.entity_type
+        }
+
+        if self.description:
+            entity["description"] = self.description
+
+        if self.entity_type == "artist":
+            if self.genre is not MISSING:
+                entity["genre"] = self.genre
+
+        elif self.entity_type == "album":
+            if self.release_year:
+                entity["releaseYear"] = self.release_year
+            if self.genre is not MISSING:
+                entity["genre"] = self.genre
+
+        elif self.entity_type == "song":
+            if self.duration:
+                entity["duration"] = self.duration
+            if self.release_year:
+                entity["releaseYear"] = self.release_year
+            if self.artist is not MISSING:
+                entity["artist"] = self.artist
+            if self.instruments:
+                entity["instruments"] = [
+                    {"uri": uri, "name": name} for uri, name in self.instruments
+                ]
+
+        elif self.entity_type == "instrument":
+            if self.instrument_type:
+                entity["type"] = self.instrument_type
+
+        return entity
+
+    @classmethod
+    def from_dict(cls, entity_type: str, entity: Dict[str, Any], fragment: Optional[bytes] = None) -> "EntityRecord":
+        """
+        Reconstruir un registro a partir de `to_dict` (inversa de la serialización)
+
+        Args:
+            entity_type: Tipo de entidad (en los instrumentos, "type" guarda su tipo de instrumento)
+            entity: Diccionario de `to_dict`
+            fragment: JSON ya codificado de `entity`, que se reutiliza en `to_json`
+        """
+        record = cls(entity["uri"], entity_type, entity["name"])
+        record.description = entity.get("description")
+        record.genre = entity.get("genre", MISSING)
+        record.release_year = entity.get("releaseYear")
+        record.duration = entity.get("duration")
+        record.artist = entity.get("artist", MISSING)
+        record.instruments = tuple(
+            (instrument["uri"], instrument["name"]) for instrument in entity.get("instruments", ())
+        )
+        if entity_type == "instrument":
+            record.instrument_type = entity.get("type")
+        record._json = fragment
+        return record
+
+    def to_json(self) -> bytes:
+        """
+        `to_dict` ya codificado en JSON; se codifica una vez y se reutiliza
+
+        Los registros no se modifican tras construirse (un cambio en el grafo
+        crea un registro nuevo), así que el fragmento nunca queda obsoleto.
+        """
+        if self._json is None:
+            self._json = dumps(self.to_dict())
+        return self._json
+
+
+class EntityProjection:
+    """
+    Caché de registros materializados por tipo de entidad
+
+    Se construye una vez desde el grafo y se actualiza entidad a entidad
+    cuando el grafo cambia (ver `refresh`).
+    """
+
+    # Propiedades cuyos nombres enlazados se desnormalizan en otros registros
+    LINK_PROPERTIES = ("performsGenre", "hasGenre", "performedBy", "usesInstrument")
+    # Propiedades cuyo valor se lee como entero al construir los registros
+    INTEGER_PROPERTIES = ("releaseYear", "duration")
+
+    def __init__(self, graph: Graph, music: Namespace):
+        """
+        Inicializar la proyección
+
+        Args:
+            graph: Grafo RDF de origen
+            music: Namespace de la ontología de música
+        """
+        self.graph = graph
+        self.MUSIC = music
+        self._records: Dict[str, Dict[Any, EntityRecord]] = {}
+        # URIs de cada tipo ordenadas: orden estable para la paginación por cursor
+        self._order: Dict[str, List[Any]] = {}
+
+    def build(self, entity_classes: Dict[str, Any]):
+        """
+        Materializar todos los registros de las clases indicadas
+
+        Args:
+            entity_classes: Mapa tipo de entidad -> clase RDF
+        """
+        self._records = {entity_type: {} for entity_type in entity_classes}
+        for entity_type, rdf_class in entity_classes.items():
+            records = self._records[entity_type]
+            for uri in self.graph.subjects(RDF.type, rdf_class):
+                records[uri] = self.build_record(uri, entity_type)
+            self._order[entity_type] = sorted(records)
+
+    def build_record(self, uri, entity_type: str) -> EntityRecord:
+        """Leer una entidad del grafo y construir su registro"""
+        graph = self.graph
+        MUSIC = self.MUSIC
+
+        name = graph.value(uri, MUSIC.name)
+        record = EntityRecord(str(uri), entity_type, str(name) if name else "Sin nombre")
+
+        description = graph.value(uri, MUSIC.description)
+        if description:
+            record.description = str(description)
+
+        if entity_type == "artist":
+            record.genre = self._linked_name(uri, MUSIC.performsGenre)
+
+        elif entity_type == "album":
+            year = graph.value(uri, MUSIC.releaseYear)
+            if year:
+                record.release_year = int(year)
+            record.genre = self._linked_name(uri, MUSIC.hasGenre)
+
+        elif entity_type == "song":
+            duration = graph.value(uri, MUSIC.duration)
+            if duration:
+                record.duration = int(duration)
+            year = graph.value(uri, MUSIC.releaseYear)
+            if year:
+                record.release_year = int(year)
+            record.artist = self._linked_name(uri, MUSIC.performedBy)
+
+            instruments = []
+            for instr in graph.objects(uri, MUSIC.usesInstrument):
+                instr_name = graph.value(instr, MUSIC.name)
+                instruments.append((str(instr), str(instr_name) if instr_name else "Sin nombre"))
+            record.instruments = tuple(instruments)
+
+        elif entity_type == "instrument":
+            instr_type = graph.value(uri, MUSIC.type)
+            if instr_type:
+                record.instrument_type = str(instr_type)
+
+        return record
+
+    def _linked_name(self, uri, predicate) -> Any:
+        """Nombre de la entidad enlazada, None si no tiene nombre, MISSING si no hay enlace"""
+        target = self.graph.value(uri, predicate)
+        if not target:
+            return MISSING
+        target_name = self.graph.value(target, self.MUSIC.name)
+        return str(target_name) if target_name else None
+
+    def get(self, uri, entity_type: str) -> Optional[EntityRecord]:
+        """Obtener el registro materializado de una entidad"""
+        records = self._records.get(entity_type)
+        return records.get(uri) if records is not None else None
+
+    def iter_records(self, entity_type: str) -> Iterator[EntityRecord]:
+        """
+        Iterar los registros de un tipo en orden de URI
+
+        Los registros se toman al empezar: un delta aplicado durante el
+        recorrido (que sustituye o elimina registros) no lo interrumpe.
+        """
+        records = self._records.get(entity_type, {})
+        snapshot = map(records.get, list(self._order.get(entity_type, [])))
+        return iter([record for record in snapshot if record is not None])
+
+    def page(
+        self,
+        entity_type: str,
+        after: Optional[Any] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[EntityRecord], bool]:
+        """
+        Obtener una página de registros en orden de URI
+
+        El coste es O(log n + página): la posición de inicio se localiza con
+        búsqueda binaria sobre las URIs ordenadas.
+
+        Args:
+            entity_type: Tipo de entidad
+            after: Última URI de la página anterior (None para empezar)
+            limit: Tamaño de página (None para devolver el resto)
+
+        Returns:
+            Registros de la página e indicador de si quedan más
+        """
+        order = self._order.get(entity_type, [])
+        records = self._records.get(entity_type, {})
+        start = bisect_right(order, after) if after is not None else 0
+        end = len(order) if limit is None else min(start + limit, len(order))
+        return [records[uri] for uri in order[start:end]], end < len(order)
+
+    def iter_uris(self, entity_type: str, after: Optional[Any] = None) -> Iterator[Any]:
+        """URIs de un tipo en orden, a partir de la siguiente a `after` (None para empezar)"""
+        order = self._order.get(entity_type, [])
+        start = bisect_right(order, after) if after is not None else 0
+        for position in range(start, len(order)):
+            yield order[position]
+
+    def count(self, entity_type: str) -> int:
+        """Número de registros materializados de un tipo"""
+        return len(self._records.get(entity_type, {}))
+
+    def refresh(self, uri, entity_type: str, present: bool):
+        """
+        Reconstruir (o eliminar) el registro de una entidad
+
+        Args:
+            uri: URI de la entidad
+            entity_type: Tipo de entidad
+            present: Si la entidad sigue siendo de ese tipo en el grafo
+        """
+        records = self._records.setdefault(entity_type, {})
+        order = self._order.setdefault(entity_type, [])
+        if present:
+            if uri not in records:
+                insort(order, uri)
+            records[uri] = self.build_record(uri, entity_type)
+        elif records.pop(uri, None) is not None:
+            order.pop(bisect_right(order, uri) - 1)
+
+    def dependents(self, uri) -> Set[Tuple[Any, str]]:
+        """
+        Registros que desnormalizan el nombre de una entidad
+
+        Returns:
+            Conjunto de (URI, tipo) que deben reconstruirse si cambia su nombre
+        """
+        affected: Set[Tuple[Any, str]] = set()
+        for prop in self.LINK_PROPERTIES:
+            for subject in self.graph.subjects(self.MUSIC[prop], uri):
+                for entity_type, records in self._records.items():
+                    if subject in records:
+                        affected.add((subject, entity_type))
+        return affected
@@ -0,0 +1,384 @@
+"""
+Búsqueda por relevancia - Coincidencias exactas, por prefijo, por palabra y con erratas
+"""
+
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Bandas de puntuación por nivel de coincidencia: [mínimo, máximo)
+MATCH_BANDS = (
+    ("exact", 1.0, 1.0),
+    ("prefix", 0.8, 0.95),
+    ("token", 0.6, 0.8),
+    ("fuzzy", 0.2, 0.6),
+)
+
+# Puntuación de una palabra de la consulta según cómo coincide con una del nombre
+TOKEN_EXACT = 1.0
+TOKEN_PREFIX = 0.8
+TOKEN_FUZZY = 0.6
+
+
+def fold(text: str) -> str:
+    """Normalizar un texto: minúsculas y sin acentos ("Canción" -> "cancion")"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    """Palabras alfanuméricas de un texto normalizado con `fold`"""
+    return tuple(_TOKEN_RE.findall(fold(text)))
+
+
+def max_edits(token: str) -> int:
+    """Erratas toleradas según la longitud de la palabra"""
+    if len(token) <= 3:
+        return 0
+    if len(token) <= 6:
+        return 1
+    return 2
+
+
+def edit_distance(a: str, b: str) -> int:
+    """
+    Distancia de Damerau-Levenshtein
+
+    Inserciones, borrados, sustituciones y transposiciones de dos letras
+    contiguas cuestan 1, así que "miels" está a distancia 1 de "miles". Es la
+    variante sin restricciones (una letra transpuesta se puede volver a
+    editar) y no la de alineamiento óptimo (OSA): coinciden salvo en casos
+    como "ca" / "abc", pero solo la primera cumple la desigualdad triangular
+    en la que se apoya la poda del árbol BK.
+    """
+    # Los prefijos y sufijos comunes no cambian la distancia
+    while a and b and a[0] == b[0]:
+        a, b = a[1:], b[1:]
+    while a and b and a[-1] == b[-1]:
+        a, b = a[:-1], b[:-1]
+    if not a or not b:
+        return len(a) + len(b)
+    # Algoritmo de Lowrance-Wagner: fila en la que apareció por última vez
+    # cada letra de `a` y columna de la última coincidencia en la fila actual
+    infinity = len(a) + len(b)
+    rows = [[infinity] * (len(b) + 2)]
+    rows.append([infinity] + list(range(len(b) + 1)))
+    last_row: Dict[str, int] = {}
+    for i, ca in enumerate(a, 1):
+        row = [infinity, i]
+        previous = rows[i]
+        last_match = 0
+        for j, cb in enumerate(b, 1):
+            k = last_row.get(cb, 0)
+            l = last_match
+            if ca == cb:
+                cost = previous[j]
+                last_match = j
+            else:
+                cost = previous[j] + 1
+            if previous[j + 1] + 1 < cost:
+                cost = previous[j + 1] + 1
+            if row[j] + 1 < cost:
+                cost = row[j] + 1
+            transposed = rows[k][l] + (i - k - 1) + 1 + (j - l - 1)
+            if transposed < cost:
+                cost = transposed
+            row.append(cost)
+        rows.append(row)
+        last_row[ca] = i
+    return rows[-1][-1]
+
+
+class BKTree:
+    """
+    Árbol BK sobre la distancia de edición (`edit_distance`)
+
+    Cada hijo cuelga de su padre según su distancia a él, así que una
+    búsqueda con tolerancia d solo desciende por las ramas en
+    [distancia - d, distancia + d] en lugar de comparar con todo el
+    vocabulario. Las palabras no se eliminan: el llamador filtra las que ya
+    no están en uso.
+    """
+
+    def __init__(self):
+        self._root: Optional[Tuple[str, Dict[int, tuple]]] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, word: str):
+        """Insertar una palabra (las repetidas se ignoran)"""
+        if self._root is None:
+            self._root = (word, {})
+            self._size = 1
+            return
+        node = self._root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                self._size += 1
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[str, int]]:
+        """
+        Palabras a distancia <= max_distance
+
+        Returns:
+            Pares (palabra, distancia)
+        """
+        if self._root is None:
+            return []
+        matches = []
+        stack = [self._root]
+        while stack:
+            candidate, children = stack.pop()
+            distance = edit_distance(word, candidate)
+            if distance <= max_distance:
+                matches.append((candidate, distance))
+            for edge in range(distance - max_distance, distance + max_distance + 1):
+                child = children.get(edge)
+                if child is not None:
+                    stack.append(child)
+        return matches
+
+
+class RankedNameIndex:
+    """
+    Índice de nombres para búsqueda ordenada por relevancia
+
+    Los niveles de coincidencia se evalúan de mayor a menor puntuación
+    (nombre exacto, prefijo del nombre, palabras completas o prefijos de
+    palabra, erratas). Como sus bandas de puntuación no se solapan, en cuanto
+    un nivel completa los k primeros resultados no se evalúan los siguientes,
+    y en particular no se consulta el árbol BK.
+    """
+
+    def __init__(self):
+        self._names: Dict[Hashable, str] = {}
+        self._tokens: Dict[Hashable, Tuple[str, ...]] = {}
+        self._by_name: Dict[str, Set[Hashable]] = defaultdict(set)
+        self._sorted_names: List[Tuple[str, Hashable]] = []
+        self._postings: Dict[str, Set[Hashable]] = defaultdict(set)
+        self._vocabulary: List[str] = []
+        self._bktree = BKTree()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def build(self, items: Iterable[Tuple[Hashable, str]]):
+        """
+        Construir el índice de una vez (una sola ordenación en lugar de inserciones)
+
+        Args:
+            items: Pares (clave, nombre) con claves distintas
+        """
+        self.__init__()
+        for key, text in items:
+            tokens = tokenize(text)
+            name = " ".join(tokens)
+            self._names[key] = name
+            self._tokens[key] = tokens
+            self._by_name[name].add(key)
+            self._sorted_names.append((name, key))
+            for token in set(tokens):
+                self._postings[token].add(key)
+        self._sorted_names.sort()
+        self._vocabulary = sorted(self._postings)
+        for token in self._vocabulary:
+            self._bktree.add(token)
+
+    def add(self, key: Hashable, text: Optional[str]):
+        """
+        Indexar (o reindexar) el nombre de una entidad
+
+        Mantiene las listas ordenadas con inserciones: pensado para deltas;
+        para la carga completa se usa `build`.
+
+        Args:
+            key: Identificador de la entidad
+            text: Nombre; None elimina la entidad del índice
+        """
+        if text is None:
+            self.remove(key)
+            return
+        tokens = tokenize(text)
+        name = " ".join(tokens)
+        if self._names.get(key) == name:
+            return
+        self.remove(key)
+
+        self._names[key] = name
+        self._tokens[key] = tokens
+        self._by_name[name].add(key)
+        insort(self._sorted_names, (name, key))
+        for token in set(tokens):
+            if token not in self._postings:
+                insort(self._vocabulary, token)
+                self._bktree.add(token)
+            self._postings[token].add(key)
+
+    def remove(self, key: Hashable):
+        """Eliminar una entidad del índice"""
+        name = self._names.pop(key, None)
+        if name is None:
+            return
+        tokens = self._tokens.pop(key)
+        keys = self._by_name[name]
+        keys.discard(key)
+        if not keys:
+            del self._by_name[name]
+        position = bisect_left(self._sorted_names, (name, key))
+        del self._sorted_names[position]
+        for token in set(tokens):
+            posting = self._postings[token]
+            posting.discard(key)
+            if not posting:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def _names_with_prefix(self, prefix: str) -> Iterable[Tuple[str, Hashable]]:
+        """Pares (nombre, clave) cuyo nombre empieza por `prefix`"""
+        names = self._sorted_names
+        for position in range(bisect_left(names, (prefix,)), len(names)):
+            if not names[position][0].startswith(prefix):
+                break
+            yield names[position]
+
+    def _expand(self, token: str, fuzzy: bool) -> Dict[str, float]:
+        """
+        Palabras del vocabulario que coinciden con una palabra de la consulta
+
+        Returns:
+            Mapa palabra del vocabulario -> puntuación de la coincidencia
+        """
+        expansion: Dict[str, float] = {}
+        vocabulary = self._vocabulary
+        for position in range(bisect_left(vocabulary, token), len(vocabulary)):
+            word = vocabulary[position]
+            if not word.startswith(token):
+                break
+            expansion[word] = TOKEN_EXACT if word == token else TOKEN_PREFIX
+        if fuzzy:
+            limit = max_edits(token)
+            if limit:
+                for word, distance in self._bktree.search(token, limit):
+                    if word in self._postings and word not in expansion:
+                        expansion[word] = TOKEN_FUZZY * (1 - distance / (len(token) + 1))
+        return expansion
+
+    def _candidates(self, expansions: List[Dict[str, float]]) -> Set[Hashable]:
+        """Entidades con al menos una palabra coincidente para cada palabra de la consulta"""
+        sets = []
+        for expansion in expansions:
+            keys: Set[Hashable] = set()
+            for word in expansion:
+                keys.update(self._postings[word])
+            if not keys:
+                return set()
+            sets.append(keys)
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def _token_scores(self, key: Hashable, expansions: List[Dict[str, float]]) -> Tuple[List[float], int]:
+        """Mejor puntuación por palabra de la consulta y palabras del nombre cubiertas"""
+        tokens = self._tokens[key]
+        covered = set()
+        scores = []
+        for expansion in expansions:
+            best = 0.0
+            for position, word in enumerate(tokens):
+                score = expansion.get(word)
+                if score is not None:
+                    covered.add(position)
+                    best = max(best, score)
+            scores.append(best)
+        return scores, len(covered)
+
+    def search(self, query: str, limit: int = 10, accept=None) -> List[Tuple[Hashable, float, str]]:
+        """
+        Buscar los `limit` nombres más relevantes para la consulta
+
+        Args:
+            query: Texto buscado (se ignoran mayúsculas y acentos)
+            limit: Número máximo de resultados
+            accept: Filtro opcional sobre las claves (p. ej. por tipo)
+
+        Returns:
+            Tuplas (clave, puntuación, nivel de coincidencia) por puntuación descendente
+        """
+        tokens = tokenize(query)
+        if not tokens or limit <= 0:
+            return []
+        name = " ".join(tokens)
+        bands = {level: (low, high) for level, low, high in MATCH_BANDS}
+        seen: Set[Hashable] = set()
+        results: List[Tuple[Hashable, float, str]] = []
+
+        def collect(level: str, scored: Iterable[Tuple[float, Hashable]]):
+            fresh = []
+            for x, key in scored:
+                if key in seen or (accept is not None and not accept(key)):
+                    continue
+                seen.add(key)
+                low, high = bands[level]
+                fresh.append((round(low + (high - low) * min(x, 0.999), 4), key))
+            best = heapq.nlargest(limit - len(results), fresh, key=lambda item: (item[0], _Reverse(item[1])))
+            results.extend((key, score, level) for score, key in best)
+            return len(results) >= limit
+
+        # 1. Nombre idéntico
+        if collect("exact", ((1.0, key) for key in sorted(self._by_name.get(name, ())))):
+            return results
+
+        # 2. El nombre empieza por la consulta
+        prefixed = (
+            (len(name) / len(candidate), key)
+            for candidate, key in self._names_with_prefix(name)
+        )
+        if collect("prefix", prefixed):
+            return results
+
+        # 3. Todas las palabras coinciden entera o como prefijo
+        expansions = [self._expand(token, fuzzy=False) for token in tokens]
+        scored = []
+        for key in self._candidates(expansions):
+            scores, covered = self._token_scores(key, expansions)
+            quality = (sum(scores) / len(scores) - TOKEN_PREFIX) / (TOKEN_EXACT - TOKEN_PREFIX)
+            scored.append((0.5 * quality + 0.5 * covered / len(self._tokens[key]), key))
+        if collect("token", scored):
+            return results
+
+        # 4. Alguna palabra coincide con erratas (árbol BK)
+        expansions = [self._expand(token, fuzzy=True) for token in tokens]
+        scored = []
+        for key in self._candidates(expansions):
+            scores, covered = self._token_scores(key, expansions)
+            scored.append((0.7 * sum(scores) / len(scores) + 0.3 * covered / len(self._tokens[key]), key))
+        collect("fuzzy", scored)
+        return results
+
+
+class _Reverse:
+    """Invierte el orden de una clave para desempatar por clave ascendente en nlargest"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other: "_Reverse") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other) -> bool:
+        return self.value == other.value
@@ -0,0 +1,198 @@
+"""
+Recomendaciones - Entidades similares por vecinos compartidos (Jaccard) sobre las adyacencias
+"""
+
+import heapq
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from rdflib import URIRef
+
+from app.adjacency import AdjacencyIndex
+
+# Tipo de entidad -> (propiedad, sentido inverso) que define sus rasgos:
+# canciones por instrumentos, artistas por géneros, álbumes por géneros e
+# instrumentos por las canciones en las que aparecen (co-instrumentación)
+SIMILARITY_FEATURES = {
+    "song": ("usesInstrument", False),
+    "artist": ("performsGenre", False),
+    "album": ("hasGenre", False),
+    "instrument": ("usesInstrument", True),
+}
+
+# Vecinos que se leen como máximo por rasgo; acota la latencia con rasgos
+# muy comunes (p. ej. la guitarra) a costa de una puntuación aproximada
+MAX_FANOUT = 5000
+
+# Resultados guardados por entidad (precalculados o ya consultados)
+CACHED_TOP = 50
+
+# Entidades consultadas con el top en caché (las precalculadas no cuentan)
+CACHE_SIZE = 4096
+
+# Entidades por tipo con más trabajo (suma de vecinos) cuyo top se precalcula
+PRECOMPUTE_PER_TYPE = 32
+
+
+class Recommender:
+    """
+    Top-k de entidades similares por índice de Jaccard de sus rasgos
+
+    Para una entidad x con rasgos F(x), los candidatos son las entidades que
+    comparten algún rasgo; `Counter.update` cuenta las intersecciones
+    |F(x) ∩ F(y)| recorriendo las filas de la adyacencia inversa en C, y
+    Jaccard = |F(x) ∩ F(y)| / (|F(x)| + |F(y)| - |F(x) ∩ F(y)|).
+
+    El top de las entidades precalculadas se guarda aparte y se recalcula
+    tras un delta que lo afecte (ver `refresh`); el de las consultadas va a
+    una caché LRU.
+    """
+
+    def __init__(self, adjacency: AdjacencyIndex):
+        self.adjacency = adjacency
+        self._precomputed: Dict[Tuple[str, int], List[Tuple[int, float, int]]] = {}
+        self._cache: "OrderedDict[Tuple[str, int], List[Tuple[int, float, int]]]" = OrderedDict()
+        # Entidades precalculadas cuyo top descartó un delta y falta recalcular
+        self._stale: Set[Tuple[str, int]] = set()
+        self._lock = threading.Lock()
+
+    def _rows(self, entity_type: str):
+        """Adyacencias de rasgos (entidad -> rasgos) y su inversa (rasgo -> entidades)"""
+        name, inverse = SIMILARITY_FEATURES[entity_type]
+        return self.adjacency.csr(name, inverse), self.adjacency.csr(name, not inverse)
+
+    def _compute(self, entity_type: str, node: int, limit: int) -> List[Tuple[int, float, int]]:
+        features_of, holders_of = self._rows(entity_type)
+        features = features_of.row(node)
+        if not features:
+            return []
+        shared: Counter = Counter()
+        for feature in set(features):
+            holders = holders_of.row(feature)
+            shared.update(holders[:MAX_FANOUT])
+        shared.pop(node, None)
+
+        size = len(set(features))
+        scored = []
+        for candidate, intersection in shared.items():
+            union = size + len(set(features_of.row(candidate))) - intersection
+            scored.append((intersection / union, intersection, candidate))
+        best = heapq.nlargest(limit, scored, key=lambda item: (item[0], item[1], -item[2]))
+        return [(candidate, round(score, 4), intersection) for score, intersection, candidate in best]
+
+    def similar(self, entity_type: str, uri: URIRef, limit: int = 10) -> List[Tuple[URIRef, float, int]]:
+        """
+        Entidades del mismo tipo más parecidas a `uri`
+
+        Args:
+            entity_type: Tipo de entidad (song, artist, album o instrument)
+            uri: URI de la entidad
+            limit: Número máximo de resultados
+
+        Returns:
+            Tuplas (URI, Jaccard, rasgos compartidos) por similitud descendente
+        """
+        if entity_type not in SIMILARITY_FEATURES:
+            raise ValueError(f"No hay recomendaciones para el tipo: {entity_type}")
+        node = self.adjacency.node(uri)
+        if node is None:
+            return []
+
+        if limit > CACHED_TOP:
+            cached = self._compute(entity_type, node, limit)
+        else:
+            key = (entity_type, node)
+            with self._lock:
+                cached = self._precomputed.get(key)
+                if cached is None:
+                    cached = self._cache.get(key)
+                    if cached is not None:
+                        self._cache.move_to_end(key)
+            if cached is None:
+                cached = self._compute(entity_type, node, CACHED_TOP)
+                with self._lock:
+                    self._cache[key] = cached
+                    if len(self._cache) > CACHE_SIZE:
+                        self._cache.popitem(last=False)
+        return [(self.adjacency.term(candidate), score, shared) for candidate, score, shared in cached[:limit]]
+
+    def precompute(self, candidates: Dict[str, List[URIRef]]):
+        """
+        Precalcular el top de las entidades más costosas de cada tipo
+
+        Args:
+            candidates: Mapa tipo -> URIs de las entidades de ese tipo
+        """
+        for entity_type, uris in candidates.items():
+            if entity_type not in SIMILARITY_FEATURES:
+                continue
+            features_of, holders_of = self._rows(entity_type)
+            nodes = [node for node in map(self.adjacency.node, uris) if node is not None]
+
+            def work(node: int) -> int:
+                return sum(min(len(holders_of.row(feature)), MAX_FANOUT) for feature in features_of.row(node))
+
+            for node in heapq.nlargest(PRECOMPUTE_PER_TYPE, nodes, key=work):
+                self._precomputed[(entity_type, node)] = self._compute(entity_type, node, CACHED_TOP)
+
+    def invalidate(self, changes: Iterable[Tuple[str, URIRef, URIRef]]):
+        """
+        Descartar los tops afectados por triplas añadidas o eliminadas
+
+        Una tripla cambia los rasgos de una entidad (su sujeto o su objeto,
+        según el tipo). Cambian los tops de esa entidad y los de las que
+        comparten con ella algún rasgo, de antes o de después del cambio,
+        porque su puntuación depende del número de rasgos de ambas. El coste
+        depende del tamaño de la caché y no del catálogo; los tops
+        precalculados afectados quedan pendientes de `refresh`.
+
+        Args:
+            changes: Triplas (propiedad indexada, sujeto, objeto) modificadas,
+                con las adyacencias ya actualizadas
+        """
+        changed: Dict[str, Set[int]] = {}
+        features: Dict[str, Set[int]] = {}
+        for name, subject, obj in changes:
+            for entity_type, (feature_name, inverse) in SIMILARITY_FEATURES.items():
+                if feature_name != name:
+                    continue
+                entity, feature = (obj, subject) if inverse else (subject, obj)
+                node = self.adjacency.node(entity)
+                feature_node = self.adjacency.node(feature)
+                if node is None or feature_node is None:
+                    continue
+                features_of, _ = self._rows(entity_type)
+                changed.setdefault(entity_type, set()).add(node)
+                features.setdefault(entity_type, set()).update(features_of.row(node))
+                features[entity_type].add(feature_node)
+
+        def affected(key: Tuple[str, int]) -> bool:
+            entity_type, node = key
+            if entity_type not in changed:
+                return False
+            if node in changed[entity_type]:
+                return True
+            features_of, _ = self._rows(entity_type)
+            return not features[entity_type].isdisjoint(features_of.row(node))
+
+        with self._lock:
+            for key in [key for key in self._cache if affected(key)]:
+                del self._cache[key]
+            for key in [key for key in self._precomputed if affected(key)]:
+                del self._precomputed[key]
+                self._stale.add(key)
+
+    def refresh(self):
+        """
+        Recalcular los tops precalculados que descartó `invalidate`
+
+        Solo lee las adyacencias, así que puede ejecutarse con el servicio en
+        lectura en lugar de alargar el bloqueo en escritura del delta.
+        """
+        with self._lock:
+            stale, self._stale = self._stale, set()
+        for entity_type, node in stale:
+            top = self._compute(entity_type, node, CACHED_TOP)
+            with self._lock:
+                self._precomputed[(entity_type, node)] = top
@@ -2,76 +2,310 @@
 Routers - Endpoints de la API REST
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
-from app.models import ApiResponse, SearchResult, OntologyStats
-from app.ontology import OntologyService
-import os
+from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional, List, Iterator
+from app.models import ApiResponse, SearchResult, OntologyStats, EntityType, DeltaRequest, BatchRequest, SparqlRequest
+from app.delta import collect_triples, DeltaFormatError
+from app.store import ReadOnlyStoreError
+from app.ontology import OntologyService, AmbiguousEntityError
+from app.facets import FacetFilters
+from app import config
+from app.manager import OntologyManager
+from app.pagination import parse_fields, project_fields
+from app.executor import QueryExecutor, ExecutorSaturatedError, LANE_CHEAP, LANE_EXPENSIVE
+from app.cache import ResponseCache
+from app.encoding import fragment_response
+from app.sparql import SparqlError, SparqlStream, SparqlTimeoutError
+from app.metrics import ServiceMetrics
 
 # Inicializar router
 router = APIRouter(prefix="/api", tags=["Search"])
-
-# Inicializar servicio de ontología
-ontology_path = os.path.join(
-    os.path.dirname(__file__), 
-    "..", 
-    "data", 
-    "music-ontology.owl"
-)
-ontology_service = OntologyService(ontology_path)
+admin_router = APIRouter(prefix="/api/admin", tags=["Admin"])
+analytics_router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
+
+
+def _create_service() -> OntologyService:
+    """Construir un servicio de ontología con la configuración actual"""
+    return OntologyService(
+        config.ONTOLOGY_PATH,
+        snapshot_path=config.SNAPSHOT_PATH if config.SNAPSHOT_ENABLED or config.STORE_BACKEND == "shared" else None,
+        store_backend=config.STORE_BACKEND,
+        sqlite_path=config.SQLITE_PATH,
+        instrument=config.METRICS_ENABLED,
+        ingest_workers=config.INGEST_WORKERS
+    )
+
+
+# Inicializar servicio de ontología (recargable en caliente)
+ontology_manager = OntologyManager(_create_service)
+
+
+def get_service() -> OntologyService:
+    """Servicio de ontología activo; cada petición debe obtenerlo una sola vez"""
+    return ontology_manager.service
+
+
+# Ejecutor de consultas: los listados y búsquedas no ocupan los hilos de las consultas baratas
+query_executor = QueryExecutor({
+    LANE_CHEAP: (config.QUERY_CHEAP_WORKERS, config.QUERY_CHEAP_QUEUE),
+    LANE_EXPENSIVE: (config.QUERY_EXPENSIVE_WORKERS, config.QUERY_EXPENSIVE_QUEUE),
+})
+
+
+def graph_version():
+    """Versión del grafo servido: generación de recarga y número de deltas aplicados"""
+    service = ontology_manager.service
+    return ontology_manager.generation, service.version
+
+
+# Caché de respuestas de lectura (la usa el middleware de la aplicación)
+response_cache = ResponseCache(config.RESPONSE_CACHE_MAX_BYTES, config.RESPONSE_CACHE_MAX_ENTRY_BYTES)
+
+
+# Métricas de /metrics; los gauges del servicio y del ejecutor se leen al exponerlas
+service_metrics = ServiceMetrics(collectors={
+    "ontology_load_seconds": lambda: {(): ontology_manager.last_reload["duration_ms"] / 1000},
+    "ontology_triples": lambda: {(): len(ontology_manager.service.graph)},
+    "ontology_generation": lambda: {(): ontology_manager.generation},
+    "executor_pending": lambda: {
+        (lane,): stats["pending"] for lane, stats in query_executor.stats().items()
+    },
+})
+
+
+# Parámetros comunes de paginación y proyección de campos
+LIMIT_QUERY = Query(None, ge=1, le=1000, description="Tamaño de página")
+CURSOR_QUERY = Query(None, description="Cursor devuelto por la página anterior")
+FIELDS_QUERY = Query(None, description="Campos a devolver separados por comas (p. ej. name,genre)")
+
+# Filtros por facetas: repetibles dentro de una faceta (cualquiera de los valores), combinados entre facetas
+GENRE_QUERY = Query(None, description="ID de género, repetible")
+ARTIST_QUERY = Query(None, description="ID de artista, repetible")
+INSTRUMENT_QUERY = Query(None, description="ID de instrumento, repetible")
+YEAR_MIN_QUERY = Query(None, description="Año de publicación mínimo (incluido)")
+YEAR_MAX_QUERY = Query(None, description="Año de publicación máximo (incluido)")
+DURATION_MIN_QUERY = Query(None, ge=0, description="Duración mínima en segundos (incluida)")
+DURATION_MAX_QUERY = Query(None, ge=0, description="Duración máxima en segundos (incluida)")
+FACETS_QUERY = Query(False, description="Incluir los recuentos por faceta (siempre si hay filtros)")
+
+
+def _facet_filters(
+    genre: Optional[List[str]] = None,
+    artist: Optional[List[str]] = None,
+    instrument: Optional[List[str]] = None,
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+    duration_min: Optional[int] = None,
+    duration_max: Optional[int] = None
+) -> FacetFilters:
+    """Filtros por facetas a partir de los parámetros de la petición"""
+    return FacetFilters(
+        terms={"genre": genre, "artist": artist, "instrument": instrument},
+        ranges={"year": (year_min, year_max), "duration": (duration_min, duration_max)}
+    )
+
+
+async def _list_response(
+    entity_type: str,
+    label: str,
+    limit: Optional[int],
+    cursor: Optional[str],
+    fields: Optional[str],
+    filters: Optional[FacetFilters] = None,
+    facets: bool = False
+) -> ApiResponse:
+    """Respuesta paginada de un listado de entidades, con recuentos por faceta si se piden o hay filtros"""
+    service = get_service()
+    try:
+        if fields is None:
+            # Ruta rápida: entidades ya codificadas en la proyección, sin validación ni re-codificación
+            fragments, pagination, counts = await query_executor.run(
+                LANE_EXPENSIVE, service.faceted_list, entity_type, limit, cursor, filters, facets, True
+            )
+            return fragment_response(fragments, f"Se encontraron {pagination['total']} {label}", pagination, counts)
+        
+        items, pagination, counts = await query_executor.run(
+            LANE_EXPENSIVE, service.faceted_list, entity_type, limit, cursor, filters, facets
+        )
+        return ApiResponse(
+            success=True,
+            data=project_fields(items, parse_fields(fields)),
+            message=f"Se encontraron {pagination['total']} {label}",
+            pagination=pagination,
+            facets=counts
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 # ==================== BÚSQUEDA GENERAL ====================
 
 @router.get("/search")
-def search(q: str = Query(..., min_length=1)) -> ApiResponse:
+async def search(
+    q: str = Query(..., min_length=1),
+    types: Optional[List[EntityType]] = Query(None),
+    description: bool = False,
+    limit: Optional[int] = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    genre: Optional[List[str]] = GENRE_QUERY,
+    artist: Optional[List[str]] = ARTIST_QUERY,
+    instrument: Optional[List[str]] = INSTRUMENT_QUERY,
+    year_min: Optional[int] = YEAR_MIN_QUERY,
+    year_max: Optional[int] = YEAR_MAX_QUERY,
+    duration_min: Optional[int] = DURATION_MIN_QUERY,
+    duration_max: Optional[int] = DURATION_MAX_QUERY,
+    facets: bool = FACETS_QUERY
+) -> ApiResponse:
     """
     Búsqueda general en toda la ontología
     
     Query Parameters:
         q: Término de búsqueda (requerido)
+        types: Tipos de entidad a buscar, repetible (todos por defecto)
+        description: Buscar también en las descripciones
+        limit: Tamaño de página (opcional)
+        cursor: Cursor de la página anterior (opcional)
+        fields: Campos a devolver separados por comas (opcional)
+        genre, artist, instrument: Filtros por ID, repetibles (opcional)
+        year_min, year_max, duration_min, duration_max: Filtros por rango (opcional);
+            con filtros solo se buscan los tipos que tienen esas facetas
+        facets: Incluir los recuentos por faceta (opcional)
+    """
+    service = get_service()
+    filters = _facet_filters(genre, artist, instrument, year_min, year_max, duration_min, duration_max)
+    selected = [t.value for t in types] if types else None
+    try:
+        if fields is None:
+            fragments, pagination, counts = await query_executor.run(
+                LANE_EXPENSIVE, service.faceted_search, q, selected, description, limit, cursor, filters, facets, True
+            )
+            return fragment_response(fragments, f"Se encontraron {pagination['total']} resultados", pagination, counts)
+        
+        results, pagination, counts = await query_executor.run(
+            LANE_EXPENSIVE, service.faceted_search, q, selected, description, limit, cursor, filters, facets
+        )
+        return ApiResponse(
+            success=True,
+            data=project_fields(results, parse_fields(fields)),
+            message=f"Se encontraron {pagination['total']} resultados",
+            pagination=pagination,
+            facets=counts
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/search/ranked")
+async def ranked_search(
+    q: str = Query(..., min_length=1),
+    types: Optional[List[EntityType]] = Query(None),
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de resultados")
+) -> ApiResponse:
+    """
+    Búsqueda por nombre ordenada por relevancia, con tolerancia a erratas
+    
+    Query Parameters:
+        q: Término de búsqueda (sin distinguir mayúsculas ni acentos)
+        types: Tipos de entidad a buscar, repetible (todos por defecto)
+        limit: Número máximo de resultados
     """
     try:
-        results = ontology_service.search(q)
+        results = await query_executor.run(
+            LANE_EXPENSIVE,
+            get_service().ranked_search,
+            q,
+            types=[t.value for t in types] if types else None,
+            limit=limit
+        )
         return ApiResponse(
             success=True,
             data=results,
             message=f"Se encontraron {len(results)} resultados"
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# ==================== ARTISTAS ====================
-
-@router.get("/artists")
-def get_artists() -> ApiResponse:
-    """Obtener todos los artistas"""
+@router.get("/suggest")
+async def suggest(
+    prefix: str = Query(..., min_length=1),
+    types: Optional[List[EntityType]] = Query(None),
+    limit: int = Query(8, ge=1, le=50, description="Número máximo de sugerencias")
+) -> ApiResponse:
+    """
+    Autocompletado: nombres que empiezan por el prefijo (o con una palabra que empieza por él)
+    
+    Query Parameters:
+        prefix: Texto escrito (sin distinguir mayúsculas ni acentos)
+        types: Tipos de entidad, repetible (todos por defecto)
+        limit: Número máximo de sugerencias
+    """
     try:
-        artists = ontology_service.get_all_artists()
+        suggestions = await query_executor.run(
+            LANE_CHEAP,
+            get_service().suggest,
+            prefix,
+            types=[t.value for t in types] if types else None,
+            limit=limit
+        )
         return ApiResponse(
             success=True,
-            data=artists,
-            message=f"Se encontraron {len(artists)} artistas"
+            data=suggestions,
+            message=f"Se encontraron {len(suggestions)} sugerencias"
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ==================== ARTISTAS ====================
+
+@router.get("/artists")
+async def get_artists(
+    limit: Optional[int] = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    genre: Optional[List[str]] = GENRE_QUERY,
+    facets: bool = FACETS_QUERY
+) -> ApiResponse:
+    """Obtener todos los artistas (paginado con limit/cursor, campos con fields, filtro por genre)"""
+    return await _list_response("artist", "artistas", limit, cursor, fields, _facet_filters(genre), facets)
+
+
 @router.get("/artists/{artist_id}")
-def get_artist(artist_id: str) -> ApiResponse:
+async def get_artist(artist_id: str) -> ApiResponse:
     """Obtener un artista específico por ID"""
     try:
-        artists = ontology_service.get_all_artists()
-        for artist in artists:
-            if artist_id in artist["data"]["uri"]:
-                return ApiResponse(
-                    success=True,
-                    data=artist["data"]
-                )
-        raise HTTPException(status_code=404, detail="Artista no encontrado")
+        artist = await query_executor.run(LANE_CHEAP, get_service().get_entity, artist_id, "artist")
+        if artist is None:
+            raise HTTPException(status_code=404, detail="Artista no encontrado")
+        return ApiResponse(
+            success=True,
+            data=artist
+        )
     except HTTPException:
         raise
+    except AmbiguousEntityError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -79,47 +313,54 @@ def get_artist(artist_id: str) -> ApiResponse:
 # ==================== ÁLBUMES ====================
 
 @router.get("/albums")
-def get_albums() -> ApiResponse:
-    """Obtener todos los álbumes"""
-    try:
-        albums = ontology_service.get_all_albums()
-        return ApiResponse(
-            success=True,
-            data=albums,
-            message=f"Se encontraron {len(albums)} álbumes"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_albums(
+    limit: Optional[int] = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    genre: Optional[List[str]] = GENRE_QUERY,
+    artist: Optional[List[str]] = ARTIST_QUERY,
+    year_min: Optional[int] = YEAR_MIN_QUERY,
+    year_max: Optional[int] = YEAR_MAX_QUERY,
+    facets: bool = FACETS_QUERY
+) -> ApiResponse:
+    """Obtener todos los álbumes (paginado con limit/cursor, campos con fields, filtros por genre, artist y año)"""
+    filters = _facet_filters(genre, artist, year_min=year_min, year_max=year_max)
+    return await _list_response("album", "álbumes", limit, cursor, fields, filters, facets)
 
 
 @router.get("/albums/{album_id}")
-def get_album(album_id: str) -> ApiResponse:
+async def get_album(album_id: str) -> ApiResponse:
     """Obtener un álbum específico"""
     try:
-        albums = ontology_service.get_all_albums()
-        for album in albums:
-            if album_id in album["data"]["uri"]:
-                return ApiResponse(
-                    success=True,
-                    data=album["data"]
-                )
-        raise HTTPException(status_code=404, detail="Álbum no encontrado")
+        album = await query_executor.run(LANE_CHEAP, get_service().get_entity, album_id, "album")
+        if album is None:
+            raise HTTPException(status_code=404, detail="Álbum no encontrado")
+        return ApiResponse(
+            success=True,
+            data=album
+        )
     except HTTPException:
         raise
+    except AmbiguousEntityError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/albums/artist/{artist_id}")
-def get_albums_by_artist(artist_id: str) -> ApiResponse:
+async def get_albums_by_artist(artist_id: str) -> ApiResponse:
     """Obtener álbumes de un artista específico"""
     try:
-        albums = ontology_service.get_albums_by_artist(artist_id)
+        albums = await query_executor.run(LANE_CHEAP, get_service().get_albums_by_artist, artist_id)
         return ApiResponse(
             success=True,
             data=albums,
             message=f"Se encontraron {len(albums)} álbumes"
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -127,75 +368,92 @@ def get_albums_by_artist(artist_id: str) -> ApiResponse:
 # ==================== CANCIONES ====================
 
 @router.get("/songs")
-def get_songs() -> ApiResponse:
-    """Obtener todas las canciones"""
-    try:
-        songs = ontology_service.get_all_songs()
-        return ApiResponse(
-            success=True,
-            data=songs,
-            message=f"Se encontraron {len(songs)} canciones"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_songs(
+    limit: Optional[int] = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    genre: Optional[List[str]] = GENRE_QUERY,
+    artist: Optional[List[str]] = ARTIST_QUERY,
+    instrument: Optional[List[str]] = INSTRUMENT_QUERY,
+    year_min: Optional[int] = YEAR_MIN_QUERY,
+    year_max: Optional[int] = YEAR_MAX_QUERY,
+    duration_min: Optional[int] = DURATION_MIN_QUERY,
+    duration_max: Optional[int] = DURATION_MAX_QUERY,
+    facets: bool = FACETS_QUERY
+) -> ApiResponse:
+    """
+    Obtener todas las canciones (paginado con limit/cursor, campos con fields,
+    filtros por genre, artist, instrument, año y duración)
+    """
+    filters = _facet_filters(genre, artist, instrument, year_min, year_max, duration_min, duration_max)
+    return await _list_response("song", "canciones", limit, cursor, fields, filters, facets)
 
 
 @router.get("/songs/{song_id}")
-def get_song(song_id: str) -> ApiResponse:
+async def get_song(song_id: str) -> ApiResponse:
     """Obtener una canción específica"""
     try:
-        songs = ontology_service.get_all_songs()
-        for song in songs:
-            if song_id in song["data"]["uri"]:
-                return ApiResponse(
-                    success=True,
-                    data=song["data"]
-                )
-        raise HTTPException(status_code=404, detail="Canción no encontrada")
+        song = await query_executor.run(LANE_CHEAP, get_service().get_entity, song_id, "song")
+        if song is None:
+            raise HTTPException(status_code=404, detail="Canción no encontrada")
+        return ApiResponse(
+            success=True,
+            data=song
+        )
     except HTTPException:
         raise
+    except AmbiguousEntityError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/songs/album/{album_id}")
-def get_songs_by_album(album_id: str) -> ApiResponse:
+async def get_songs_by_album(album_id: str) -> ApiResponse:
     """Obtener canciones de un álbum"""
     try:
-        songs = ontology_service.get_songs_by_album(album_id)
+        songs = await query_executor.run(LANE_CHEAP, get_service().get_songs_by_album, album_id)
         return ApiResponse(
             success=True,
             data=songs,
             message=f"Se encontraron {len(songs)} canciones"
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/songs/artist/{artist_id}")
-def get_songs_by_artist(artist_id: str) -> ApiResponse:
+async def get_songs_by_artist(artist_id: str) -> ApiResponse:
     """Obtener todas las canciones de un artista"""
     try:
-        songs = ontology_service.get_songs_by_artist(artist_id)
+        songs = await query_executor.run(LANE_CHEAP, get_service().get_songs_by_artist, artist_id)
         return ApiResponse(
             success=True,
             data=songs,
             message=f"Se encontraron {len(songs)} canciones"
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/songs/instrument/{instrument_id}")
-def get_songs_by_instrument(instrument_id: str) -> ApiResponse:
+async def get_songs_by_instrument(instrument_id: str) -> ApiResponse:
     """Obtener canciones que utilizan un instrumento"""
     try:
-        songs = ontology_service.get_songs_by_instrument(instrument_id)
+        songs = await query_executor.run(LANE_CHEAP, get_service().get_songs_by_instrument, instrument_id)
         return ApiResponse(
             success=True,
             data=songs,
             message=f"Se encontraron {len(songs)} canciones"
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -203,47 +461,48 @@ def get_songs_by_instrument(instrument_id: str) -> ApiResponse:
 # ==================== INSTRUMENTOS ====================
 
 @router.get("/instruments")
-def get_instruments() -> ApiResponse:
-    """Obtener todos los instrumentos"""
-    try:
-        instruments = ontology_service.get_all_instruments()
-        return ApiResponse(
-            success=True,
-            data=instruments,
-            message=f"Se encontraron {len(instruments)} instrumentos"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_instruments(
+    limit: Optional[int] = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY
+) -> ApiResponse:
+    """Obtener todos los instrumentos (paginado con limit/cursor, campos con fields)"""
+    return await _list_response("instrument", "instrumentos", limit, cursor, fields)
 
 
 @router.get("/instruments/{instrument_id}")
-def get_instrument(instrument_id: str) -> ApiResponse:
+async def get_instrument(instrument_id: str) -> ApiResponse:
     """Obtener un instrumento específico"""
     try:
-        instruments = ontology_service.get_all_instruments()
-        for instrument in instruments:
-            if instrument_id in instrument["data"]["uri"]:
-                return ApiResponse(
-                    success=True,
-                    data=instrument["data"]
-                )
-        raise HTTPException(status_code=404, detail="Instrumento no encontrado")
+        instrument = await query_executor.run(LANE_CHEAP, get_service().get_entity, instrument_id, "instrument")
+        if instrument is None:
+            raise HTTPException(status_code=404, detail="Instrumento no encontrado")
+        return ApiResponse(
+            success=True,
+            data=instrument
+        )
     except HTTPException:
         raise
+    except AmbiguousEntityError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/instruments/type/{instrument_type}")
-def get_instruments_by_type(instrument_type: str) -> ApiResponse:
+async def get_instruments_by_type(instrument_type: str) -> ApiResponse:
     """Obtener instrumentos por tipo"""
     try:
-        instruments = ontology_service.get_instruments_by_type(instrument_type)
+        instruments = await query_executor.run(LANE_CHEAP, get_service().get_instruments_by_type, instrument_type)
         return ApiResponse(
             success=True,
             data=instruments,
             message=f"Se encontraron {len(instruments)} instrumentos"
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -251,44 +510,403 @@ def get_instruments_by_type(instrument_type: str) -> ApiResponse:
 # ==================== GÉNEROS ====================
 
 @router.get("/genres")
-def get_genres() -> ApiResponse:
-    """Obtener todos los géneros"""
+async def get_genres(
+    limit: Optional[int] = LIMIT_QUERY,
+    cursor: Optional[str] = CURSOR_QUERY,
+    fields: Optional[str] = FIELDS_QUERY
+) -> ApiResponse:
+    """Obtener todos los géneros (paginado con limit/cursor, campos con fields)"""
+    return await _list_response("genre", "géneros", limit, cursor, fields)
+
+
+@router.get("/genres/artist/{artist_id}")
+async def get_genres_by_artist(artist_id: str) -> ApiResponse:
+    """Obtener géneros de un artista"""
     try:
-        genres = ontology_service.get_all_genres()
+        genres = await query_executor.run(LANE_CHEAP, get_service().get_genres_by_artist, artist_id)
         return ApiResponse(
             success=True,
             data=genres,
             message=f"Se encontraron {len(genres)} géneros"
         )
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/genres/artist/{artist_id}")
-def get_genres_by_artist(artist_id: str) -> ApiResponse:
-    """Obtener géneros de un artista"""
+# ==================== RECOMENDACIONES ====================
+
+@router.get("/recommend/{entity_type}/{entity_id}")
+async def recommend(
+    entity_type: EntityType,
+    entity_id: str,
+    limit: int = Query(10, ge=1, le=50, description="Número máximo de resultados")
+) -> ApiResponse:
+    """
+    Entidades similares por vecinos compartidos (Jaccard)
+    
+    song: por instrumentos; artist: por géneros; album: por géneros;
+    instrument: por canciones en las que coinciden (co-instrumentación).
+    """
     try:
-        genres = ontology_service.get_genres_by_artist(artist_id)
+        results = await query_executor.run(
+            LANE_CHEAP, get_service().recommend, entity_type.value, entity_id, limit
+        )
+        if results is None:
+            raise HTTPException(status_code=404, detail="Entidad no encontrada")
         return ApiResponse(
             success=True,
-            data=genres,
-            message=f"Se encontraron {len(genres)} géneros"
+            data=results,
+            message=f"Se encontraron {len(results)} recomendaciones"
         )
+    except HTTPException:
+        raise
+    except AmbiguousEntityError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/traverse/{entity_id}")
+async def traverse(
+    entity_id: str,
+    path: str = Query(..., min_length=1, description='Propiedades separadas por "/", "^" para la inversa'),
+    limit: int = Query(100, ge=1, le=1000, description="Número máximo de resultados")
+) -> ApiResponse:
+    """
+    Recorrido de varios saltos desde una entidad
+    
+    Ejemplo: /api/traverse/song-come-together?path=usesInstrument/^usesInstrument
+    (canciones que comparten instrumentos con la canción).
+    """
+    try:
+        results = await query_executor.run(
+            LANE_EXPENSIVE, get_service().traverse, entity_id, path, limit
+        )
+        if results is None:
+            raise HTTPException(status_code=404, detail="Entidad no encontrada")
+        return ApiResponse(
+            success=True,
+            data=results,
+            message=f"Se encontraron {len(results)} entidades"
+        )
+    except HTTPException:
+        raise
+    except AmbiguousEntityError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ==================== LOTES ====================
+
+@router.post("/batch")
+async def batch(request: BatchRequest) -> ApiResponse:
+    """
+    Resolver varias entidades y relaciones en una sola petición
+    
+    Pensado para que el frontend cargue una página de detalle (artista,
+    sus álbumes, sus géneros...) con un único viaje de red.
+    """
+    try:
+        results = await query_executor.run(
+            LANE_CHEAP,
+            get_service().batch_lookup,
+            entities=[(q.id, q.type.value if q.type else None) for q in request.entities],
+            relations=[(q.relation, q.id) for q in request.relations]
+        )
+        return ApiResponse(
+            success=True,
+            data=results,
+            message=f"Se resolvieron {len(results['entities'])} entidades y {len(results['relations'])} relaciones"
+        )
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ==================== SPARQL ====================
+
+async def _sparql_chunks(service: OntologyService, stream: SparqlStream, first: List[bytes]) -> AsyncIterator[bytes]:
+    """
+    Documento SPARQL 1.1 JSON enviado a medida que se evalúan las filas
+    
+    Cada fragmento se evalúa en el carril de consultas caras; entre
+    fragmentos no se ocupa ningún hilo ni el lock del servicio. Un error
+    tras el primer fragmento ya no puede cambiar el código de estado: el
+    documento se cierra con el motivo en `summary.reason`.
+    """
+    yield stream.head() + b",".join(first)
+    sent = bool(first)
+    while not stream.done:
+        try:
+            rows = await query_executor.run(LANE_EXPENSIVE, service.sparql_fetch, stream)
+        except ExecutorSaturatedError:
+            stream.abort("overloaded")
+            break
+        except Exception:
+            stream.abort("error")
+            break
+        if rows:
+            yield (b"," if sent else b"") + b",".join(rows)
+            sent = True
+    yield stream.tail()
+
+
+async def _sparql_response(query: str, max_rows: Optional[int]) -> StreamingResponse:
+    """Ejecutar una consulta con el presupuesto configurado y enviar las filas en streaming"""
+    rows = min(max_rows or config.SPARQL_MAX_ROWS, config.SPARQL_MAX_ROWS)
+    service = get_service()
+    try:
+        stream = await query_executor.run(LANE_EXPENSIVE, service.sparql, query, rows, config.SPARQL_TIMEOUT)
+        first = await query_executor.run(LANE_EXPENSIVE, service.sparql_fetch, stream)
+    except SparqlError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SparqlTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"{e} ({config.SPARQL_TIMEOUT} s)")
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(_sparql_chunks(service, stream, first), media_type="application/sparql-results+json")
+
+
+@router.get("/sparql")
+async def sparql_get(
+    query: str = Query(..., min_length=1, description="Consulta SPARQL SELECT"),
+    max_rows: Optional[int] = Query(None, ge=1, description="Máximo de filas (acotado por SPARQL_MAX_ROWS)")
+) -> StreamingResponse:
+    """
+    Consulta SPARQL SELECT de solo lectura
+    
+    Prefijos predefinidos: music, rdf, rdfs, owl, xsd. Respuesta en formato
+    SPARQL 1.1 JSON enviada en streaming; `summary` (al final) indica las
+    filas enviadas y si el resultado se truncó y por qué.
+    """
+    return await _sparql_response(query, max_rows)
+
+
+@router.post("/sparql")
+async def sparql_post(request: SparqlRequest) -> StreamingResponse:
+    """Consulta SPARQL SELECT enviada en el cuerpo (para consultas largas)"""
+    return await _sparql_response(request.query, request.max_rows)
+
+
+# ==================== EXPORTACIÓN ====================
+
+# Líneas NDJSON agrupadas por fragmento enviado al cliente
+EXPORT_CHUNK_LINES = 256
+
+
+def _ndjson_lines(lines: Iterator[bytes]) -> Iterator[bytes]:
+    """Agrupar entidades ya codificadas en fragmentos NDJSON de tamaño acotado"""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= EXPORT_CHUNK_LINES:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+
+@router.get("/export/{entity_type}")
+async def export_entities(
+    entity_type: EntityType,
+    format: str = Query("ndjson", description="Formato de exportación (solo ndjson)")
+) -> StreamingResponse:
+    """
+    Exportar todas las entidades de un tipo en streaming
+    
+    Cada línea es un objeto JSON con los datos de una entidad. La respuesta
+    se envía a medida que se recorren las entidades, sin construir la lista
+    completa en memoria. Los registros se fijan en el carril de consultas
+    caras (503 si está saturado); el envío ya no ocupa el carril.
+    """
+    if format != "ndjson":
+        raise HTTPException(status_code=400, detail=f"Formato no soportado: {format}")
+    
+    try:
+        lines = await query_executor.run(LANE_EXPENSIVE, get_service().iter_entity_json, entity_type.value)
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(
+        _ndjson_lines(lines),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{entity_type.value}s.ndjson"'}
+    )
+
+
 # ==================== ESTADÍSTICAS ====================
 
 @router.get("/stats")
-def get_stats() -> ApiResponse:
+async def get_stats() -> ApiResponse:
     """Obtener estadísticas de la ontología"""
     try:
-        stats = ontology_service.get_ontology_stats()
+        stats = OntologyStats(**await query_executor.run(LANE_CHEAP, get_service().get_ontology_stats))
         return ApiResponse(
             success=True,
-            data=stats,
+            data=stats.model_dump(),
             message="Estadísticas de la ontología"
         )
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ==================== ANALÍTICA ====================
+
+ANALYTICS_LIMIT_QUERY = Query(None, ge=1, le=10000, description="Número máximo de grupos")
+
+
+async def _analytics_response(
+    dimensions: List[str],
+    measure: Optional[str],
+    aggregate: str,
+    limit: Optional[int],
+    order: str,
+    message: str
+) -> ApiResponse:
+    """Respuesta de una agregación sobre la tabla columnar de canciones"""
+    try:
+        result = await query_executor.run(
+            LANE_EXPENSIVE, get_service().song_analytics, dimensions, measure, aggregate, limit, order
+        )
+        return ApiResponse(
+            success=True,
+            data=result["groups"],
+            message=f"{message}: {result['total_groups']} grupos ({result['total_songs']} canciones)"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@analytics_router.get("/songs")
+async def analytics_songs(
+    by: Optional[List[str]] = Query(None, description="Dimensión, repetible (album, artist, genre, instrument, year, decade)"),
+    measure: Optional[str] = Query(None, description="Medida (duration, year); sin ella se cuentan canciones"),
+    aggregate: str = Query("count", description="count, sum, avg, min o max"),
+    limit: Optional[int] = ANALYTICS_LIMIT_QUERY,
+    order: str = Query("value", description="value (mayor agregado primero) o key")
+) -> ApiResponse:
+    """
+    Agregación genérica de canciones por dimensiones
+    
+    Query Parameters:
+        by: Dimensiones de agrupación, repetible (ninguna = un solo grupo)
+        measure: Medida agregada (opcional)
+        aggregate: Función de agregación sobre la medida
+        limit: Número máximo de grupos (opcional)
+        order: Orden de los grupos
+    """
+    return await _analytics_response(by or [], measure, aggregate, limit, order, "Agregación de canciones")
+
+
+@analytics_router.get("/genres/decades")
+async def analytics_genres_by_decade(limit: Optional[int] = ANALYTICS_LIMIT_QUERY) -> ApiResponse:
+    """Canciones por género y década (año de la canción o, si no lo tiene, de su álbum)"""
+    return await _analytics_response(["genre", "decade"], None, "count", limit, "key", "Canciones por género y década")
+
+
+@analytics_router.get("/artists/duration")
+async def analytics_artist_duration(limit: Optional[int] = ANALYTICS_LIMIT_QUERY) -> ApiResponse:
+    """Duración media de las canciones de cada artista (de mayor a menor)"""
+    return await _analytics_response(["artist"], "duration", "avg", limit, "value", "Duración media por artista")
+
+
+@analytics_router.get("/instruments/usage")
+async def analytics_instrument_usage(limit: Optional[int] = ANALYTICS_LIMIT_QUERY) -> ApiResponse:
+    """Número de canciones en las que aparece cada instrumento"""
+    return await _analytics_response(["instrument"], None, "count", limit, "value", "Uso de instrumentos")
+
+
+# ==================== ADMINISTRACIÓN ====================
+
+def _check_admin_token(token: Optional[str]):
+    """Validar el token de administración si está configurado"""
+    if config.ADMIN_TOKEN and token != config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+
+@admin_router.post("/reload")
+async def reload_ontology(x_admin_token: Optional[str] = Header(None)) -> ApiResponse:
+    """
+    Recargar la ontología desde disco sin reiniciar el servidor
+    
+    El nuevo grafo y sus índices se construyen aparte (en el carril de
+    consultas caras) y se publican de forma atómica; las peticiones en curso
+    terminan con la versión anterior.
+    """
+    _check_admin_token(x_admin_token)
+    try:
+        info = await query_executor.run(LANE_EXPENSIVE, ontology_manager.reload, reason="admin")
+        return ApiResponse(
+            success=True,
+            data=info,
+            message=f"Ontología recargada en {info['duration_ms']} ms"
+        )
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al recargar ontología: {e}")
+
+
+@admin_router.post("/delta")
+async def apply_delta(delta: DeltaRequest, x_admin_token: Optional[str] = Header(None)) -> ApiResponse:
+    """
+    Aplicar un lote de triplas añadidas/eliminadas sin recargar el grafo
+    
+    Las triplas pueden enviarse en JSON (`add`/`remove`) o en N-Triples
+    (`add_ntriples`/`remove_ntriples`). Los índices se actualizan solo para
+    las entidades afectadas.
+    """
+    _check_admin_token(x_admin_token)
+    try:
+        additions = collect_triples((t.model_dump() for t in delta.add), delta.add_ntriples)
+        removals = collect_triples((t.model_dump() for t in delta.remove), delta.remove_ntriples)
+        result = await query_executor.run(LANE_EXPENSIVE, ontology_manager.apply_delta, additions, removals)
+        return ApiResponse(
+            success=True,
+            data=result,
+            message=f"Delta aplicado: +{result['added']} / -{result['removed']} triplas"
+        )
+    except DeltaFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ReadOnlyStoreError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@admin_router.get("/status")
+async def get_admin_status(x_admin_token: Optional[str] = Header(None)) -> ApiResponse:
+    """Estado de la ontología cargada y de la última recarga"""
+    _check_admin_token(x_admin_token)
+    return ApiResponse(
+        success=True,
+        data={
+            **ontology_manager.status(),
+            "executor": query_executor.stats(),
+            "response_cache": response_cache.stats() if config.RESPONSE_CACHE_ENABLED else None,
+        },
+        message="Estado de la ontología"
+    )
@@ -0,0 +1,91 @@
+"""
+Lock de lectores-escritor - Consultas concurrentes frente a deltas en el servicio
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class ReadWriteLock:
+    """
+    Varios lectores a la vez o un único escritor, con preferencia de escritura
+
+    Un escritor en espera impide la entrada de lectores nuevos, para que un
+    flujo continuo de consultas no retrase los deltas indefinidamente. La
+    lectura es reentrante dentro de un hilo (también en el hilo que escribe),
+    de modo que una consulta puede llamar a otra; pasar de lectura a escritura
+    no está permitido.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    def acquire_read(self):
+        """Entrar como lector (espera mientras haya un escritor activo o en espera)"""
+        depth = getattr(self._local, "depth", 0)
+        if depth or self._writer == threading.get_ident():
+            self._local.depth = depth + 1
+            return
+        with self._condition:
+            while self._writer is not None or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        self._local.depth = 1
+
+    def release_read(self):
+        """Salir como lector"""
+        depth = self._local.depth - 1
+        self._local.depth = depth
+        if depth or self._writer == threading.get_ident():
+            return
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        """
+        Entrar como escritor (espera a que salgan los lectores activos)
+
+        Raises:
+            RuntimeError: Si el hilo ya tiene el lock en lectura
+        """
+        if getattr(self._local, "depth", 0):
+            raise RuntimeError("No se puede escribir desde una lectura en curso")
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = threading.get_ident()
+
+    def release_write(self):
+        """Salir como escritor"""
+        with self._condition:
+            self._writer = None
+            self._condition.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Bloque con el lock en lectura"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Bloque con el lock en escritura"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,114 @@
+"""
+Índice de búsqueda - Índice invertido de n-gramas sobre textos de entidades
+"""
+
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Set
+
+
+def text_grams(text: str, n: int) -> Set[str]:
+    """N-gramas distintos de un texto ya normalizado"""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NGramIndex:
+    """
+    Índice invertido de n-gramas (trigramas por defecto) sobre un texto por entidad
+
+    Conserva la semántica de subcadena de la búsqueda original: los n-gramas
+    solo sirven para reducir los candidatos, y cada candidato se verifica con
+    `consulta in texto`. Los resultados se devuelven en orden de inserción.
+    """
+
+    def __init__(self, n: int = 3):
+        """
+        Inicializar el índice
+
+        Args:
+            n: Longitud de los n-gramas indexados
+        """
+        self.n = n
+        self._postings: Dict[str, Set[Hashable]] = defaultdict(set)
+        self._texts: Dict[Hashable, str] = {}
+        self._order: Dict[Hashable, int] = {}
+        self._next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._texts
+
+    def _grams(self, text: str) -> Set[str]:
+        """Obtener los n-gramas distintos de un texto ya normalizado"""
+        return text_grams(text, self.n)
+
+    def add(self, key: Hashable, text: Optional[str]):
+        """
+        Indexar (o reindexar) el texto de una entidad
+
+        Args:
+            key: Identificador de la entidad (URI)
+            text: Texto a indexar; None elimina la entidad del índice
+        """
+        if text is None:
+            self.remove(key)
+            return
+
+        normalized = text.lower()
+        previous = self._texts.get(key)
+        if previous == normalized:
+            return
+        if previous is not None:
+            self._drop_postings(key, previous)
+        else:
+            self._order[key] = self._next_seq
+            self._next_seq += 1
+
+        self._texts[key] = normalized
+        for gram in self._grams(normalized):
+            self._postings[gram].add(key)
+
+    def remove(self, key: Hashable):
+        """Eliminar una entidad del índice"""
+        previous = self._texts.pop(key, None)
+        if previous is None:
+            return
+        self._drop_postings(key, previous)
+        del self._order[key]
+
+    def _drop_postings(self, key: Hashable, text: str):
+        for gram in self._grams(text):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[gram]
+
+    def search(self, query: str) -> List[Hashable]:
+        """
+        Buscar entidades cuyo texto contiene la consulta (sin distinguir mayúsculas)
+
+        Args:
+            query: Término de búsqueda
+
+        Returns:
+            Claves de las entidades coincidentes en orden de inserción
+        """
+        query_lower = query.lower()
+        if len(query_lower) < self.n:
+            # Consultas más cortas que un n-grama: recorrido de los textos en memoria
+            candidates: Iterable[Hashable] = self._texts.keys()
+        else:
+            postings = []
+            for gram in self._grams(query_lower):
+                posting = self._postings.get(gram)
+                if not posting:
+                    return []
+                postings.append(posting)
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+
+        matches = [key for key in candidates if query_lower in self._texts[key]]
+        matches.sort(key=self._order.__getitem__)
+        return matches
@@ -0,0 +1,372 @@
+"""
+Snapshot binario - Grafo parseado en formato compacto para arranques rápidos
+
+Formato (little-endian, secciones alineadas a 8 bytes):
+
+    cabecera   magic, versión, tamaño/mtime/sha256 del OWL de origen,
+               número de términos y de triplas, posición de cada sección
+    offsets    uint64[n_terms + 1] con el inicio de cada término en el blob
+    blob       términos codificados, ordenados por sus bytes (ID = posición)
+    spo        uint32[3 * n_triples] con las triplas (s, p, o) ordenadas
+    pos        las mismas triplas como (p, o, s), ordenadas
+    osp        las mismas triplas como (o, s, p), ordenadas
+
+El archivo se lee con mmap: los arrays de enteros se usan directamente desde
+la caché de páginas del sistema, sin copiarlos, de modo que varios procesos
+que abren el mismo snapshot comparten una única copia en memoria.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: los locks de archivo se toman con msvcrt
+    fcntl = None
+    import msvcrt
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.term import Node
+
+from app.ingest import ingest
+
+MAGIC = b"MUSNAP01"
+FORMAT_VERSION = 2
+
+# magic, versión, tamaño, mtime_ns, sha256, n_terms, n_triples,
+# pos. offsets, pos. blob, longitud blob, pos. spo, pos. pos, pos. osp
+HEADER = struct.Struct("<8sIxxxxQq32sQQQQQQQQ")
+
+
+class SnapshotError(Exception):
+    """El snapshot no existe, está corrupto o no corresponde al archivo de origen"""
+
+
+def file_fingerprint(path: str) -> Tuple[int, int, bytes]:
+    """
+    Huella del archivo de origen
+
+    Returns:
+        (tamaño, mtime en nanosegundos, sha256)
+    """
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return stat.st_size, stat.st_mtime_ns, digest.digest()
+
+
+def encode_term(term: Node) -> bytes:
+    """Codificar un término RDF como bytes (tipo + contenido)"""
+    if isinstance(term, URIRef):
+        return b"U" + str(term).encode("utf-8")
+    if isinstance(term, BNode):
+        return b"B" + str(term).encode("utf-8")
+    if isinstance(term, Literal):
+        lang = (term.language or "").encode("utf-8")
+        datatype = str(term.datatype or "").encode("utf-8")
+        return b"L" + lang + b"\x00" + datatype + b"\x00" + str(term).encode("utf-8")
+    raise SnapshotError(f"Término no soportado en el snapshot: {term!r}")
+
+
+def decode_term(data: bytes) -> Node:
+    """Reconstruir un término RDF a partir de `encode_term`"""
+    kind, payload = data[:1], data[1:]
+    if kind == b"U":
+        return URIRef(payload.decode("utf-8"))
+    if kind == b"B":
+        return BNode(payload.decode("utf-8"))
+    if kind == b"L":
+        lang, datatype, lexical = payload.split(b"\x00", 2)
+        return Literal(
+            lexical.decode("utf-8"),
+            lang=lang.decode("utf-8") or None,
+            datatype=URIRef(datatype.decode("utf-8")) if datatype else None
+        )
+    raise SnapshotError(f"Tipo de término desconocido: {kind!r}")
+
+
+def _align(f) -> int:
+    """Rellenar el archivo hasta múltiplo de 8 y devolver la posición"""
+    pos = f.tell()
+    padding = -pos % 8
+    if padding:
+        f.write(b"\x00" * padding)
+    return pos + padding
+
+
+def write_snapshot(graph: Graph, snapshot_path: str, source_path: str):
+    """
+    Escribir el snapshot de un grafo
+
+    El archivo se escribe en una ruta temporal y se renombra al final, por lo
+    que otros procesos nunca leen un snapshot a medio escribir.
+
+    Args:
+        graph: Grafo ya parseado
+        snapshot_path: Ruta del snapshot
+        source_path: Archivo OWL del que procede el grafo
+    """
+    size, mtime_ns, sha256 = file_fingerprint(source_path)
+
+    # Internado de términos: IDs densos en orden de sus bytes codificados
+    encoded = {}
+    for triple in graph:
+        for term in triple:
+            if term not in encoded:
+                encoded[term] = encode_term(term)
+    terms = sorted(encoded.items(), key=lambda item: item[1])
+    term_ids = {term: i for i, (term, _) in enumerate(terms)}
+
+    offsets = array("Q", [0])
+    for _, data in terms:
+        offsets.append(offsets[-1] + len(data))
+
+    spo = sorted((term_ids[s], term_ids[p], term_ids[o]) for s, p, o in graph)
+    indexes = []
+    for order in (spo, sorted((p, o, s) for s, p, o in spo), sorted((o, s, p) for s, p, o in spo)):
+        triples = array("I")
+        for ids in order:
+            triples.extend(ids)
+        indexes.append(triples)
+
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(b"\x00" * HEADER.size)
+            offsets_pos = _align(f)
+            offsets.tofile(f)
+            blob_pos = _align(f)
+            for _, data in terms:
+                f.write(data)
+            blob_len = offsets[-1]
+            index_pos = []
+            for triples in indexes:
+                index_pos.append(_align(f))
+                triples.tofile(f)
+
+            f.seek(0)
+            f.write(HEADER.pack(
+                MAGIC, FORMAT_VERSION, size, mtime_ns, sha256,
+                len(terms), len(spo), offsets_pos, blob_pos, blob_len, *index_pos
+            ))
+        os.replace(tmp_path, snapshot_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class Snapshot:
+    """Snapshot abierto con mmap (solo lectura)"""
+
+    def __init__(self, snapshot_path: str):
+        """
+        Abrir un snapshot
+
+        Raises:
+            SnapshotError: Si el archivo no existe o no es un snapshot válido
+        """
+        try:
+            with open(snapshot_path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"No se pudo abrir el snapshot: {e}") from e
+
+        if len(self._mmap) < HEADER.size:
+            raise SnapshotError("Snapshot truncado")
+        (magic, version, self.source_size, self.source_mtime_ns, self.source_sha256,
+         self.n_terms, self.n_triples, offsets_pos, blob_pos, blob_len,
+         spo_pos, pos_pos, osp_pos) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise SnapshotError("Formato de snapshot incompatible")
+        if osp_pos + 12 * self.n_triples > len(self._mmap):
+            raise SnapshotError("Snapshot truncado")
+
+        self._views: List[memoryview] = []
+        self._offsets = self._section(offsets_pos, 8 * (self.n_terms + 1), "Q")
+        self._blob = self._section(blob_pos, blob_len)
+        self.spo = self._section(spo_pos, 12 * self.n_triples, "I")
+        self.pos = self._section(pos_pos, 12 * self.n_triples, "I")
+        self.osp = self._section(osp_pos, 12 * self.n_triples, "I")
+
+    def _section(self, pos: int, length: int, fmt: Optional[str] = None) -> memoryview:
+        """Vista sin copia de una sección del archivo"""
+        view = memoryview(self._mmap)[pos:pos + length]
+        self._views.append(view)
+        if fmt is not None:
+            view = view.cast(fmt)
+            self._views.append(view)
+        return view
+
+    def matches(self, fingerprint: Tuple[int, int, bytes]) -> bool:
+        """Comprobar si el snapshot corresponde a la huella del archivo de origen"""
+        return fingerprint == (self.source_size, self.source_mtime_ns, self.source_sha256)
+
+    def term_bytes(self, term_id: int) -> bytes:
+        """Bytes codificados de un término"""
+        return bytes(self._blob[self._offsets[term_id]:self._offsets[term_id + 1]])
+
+    def term_bound(self, data: bytes) -> int:
+        """Primer ID cuyos bytes codificados son >= `data` (búsqueda binaria en la tabla ordenada)"""
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.term_bytes(mid) < data:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def term_id(self, term: Node) -> Optional[int]:
+        """ID de un término (búsqueda binaria en la tabla ordenada), None si no existe"""
+        try:
+            target = encode_term(term)
+        except SnapshotError:
+            return None
+        lo = self.term_bound(target)
+        if lo < self.n_terms and self.term_bytes(lo) == target:
+            return lo
+        return None
+
+    def decode_terms(self) -> List[Node]:
+        """Decodificar la tabla de términos completa"""
+        return [decode_term(self.term_bytes(i)) for i in range(self.n_terms)]
+
+    def iter_id_triples(self) -> Iterator[Tuple[int, int, int]]:
+        """Iterar las triplas como IDs enteros"""
+        spo = self.spo
+        for i in range(0, 3 * self.n_triples, 3):
+            yield spo[i], spo[i + 1], spo[i + 2]
+
+    def close(self):
+        """Liberar el mmap"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+
+def snapshot_triples(snapshot_path: str, source_path: str) -> Optional[Iterator[Tuple[Node, Node, Node]]]:
+    """
+    Triplas de un snapshot si está al día con el archivo de origen
+
+    La tabla de términos se decodifica completa, pero las triplas se
+    producen de una en una, así que el consumidor puede volcarlas a otro
+    store sin materializar el grafo.
+
+    Args:
+        snapshot_path: Ruta del snapshot
+        source_path: Archivo de origen
+
+    Returns:
+        Iterador de triplas, None si el snapshot no existe o está obsoleto
+    """
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        snapshot = Snapshot(snapshot_path)
+    except SnapshotError:
+        return None
+    if not snapshot.matches(file_fingerprint(source_path)):
+        snapshot.close()
+        return None
+
+    def triples() -> Iterator[Tuple[Node, Node, Node]]:
+        try:
+            terms = snapshot.decode_terms()
+            for s, p, o in snapshot.iter_id_triples():
+                yield terms[s], terms[p], terms[o]
+        finally:
+            snapshot.close()
+
+    return triples()
+
+
+def load_snapshot(graph: Graph, snapshot_path: str, source_path: str) -> bool:
+    """
+    Cargar un snapshot en el grafo si está al día con el archivo de origen
+
+    Args:
+        graph: Grafo (vacío) a rellenar
+        snapshot_path: Ruta del snapshot
+        source_path: Archivo de origen
+
+    Returns:
+        True si se cargó el snapshot, False si no existe o está obsoleto
+    """
+    triples = snapshot_triples(snapshot_path, source_path)
+    if triples is None:
+        return False
+    graph.addN((s, p, o, graph) for s, p, o in triples)
+    return True
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Lock exclusivo entre procesos sobre un archivo auxiliar
+
+    flock en POSIX y msvcrt.locking (sobre el primer byte) en Windows; en
+    ambos casos el sistema libera el lock si el proceso termina.
+
+    Args:
+        path: Ruta del archivo de lock (se crea si no existe)
+    """
+    with open(path, "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK se rinde tras ~10 s de reintentos
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def ensure_snapshot(source_path: str, snapshot_path: str, workers: int = 1) -> bool:
+    """
+    Garantizar que existe un snapshot al día, parseando el origen si hace falta
+
+    Usa un lock de archivo para que, si varios procesos arrancan a la vez,
+    solo uno parsee el origen y el resto espere y reutilice su snapshot.
+
+    Args:
+        source_path: Archivo de origen (RDF/XML, N-Triples o Turtle)
+        snapshot_path: Ruta del snapshot
+        workers: Procesos para parsear el origen (solo N-Triples)
+
+    Returns:
+        True si se tuvo que (re)construir el snapshot
+    """
+    with file_lock(snapshot_path + ".lock"):
+        fingerprint = file_fingerprint(source_path)
+        if os.path.exists(snapshot_path):
+            try:
+                snapshot = Snapshot(snapshot_path)
+            except SnapshotError:
+                pass
+            else:
+                fresh = snapshot.matches(fingerprint)
+                snapshot.close()
+                if fresh:
+                    return False
+
+        graph = Graph()
+        ingest(graph, source_path, workers=workers)
+        write_snapshot(graph, snapshot_path, source_path)
+        return True
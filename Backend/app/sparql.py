@@ -0,0 +1,382 @@
+"""
+SPARQL - Consultas SELECT de solo lectura con presupuesto de tiempo y filas
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterator, List, Optional
+
+from rdflib import BNode, Graph, Literal, OWL, RDF, RDFS, URIRef, XSD
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.plugins.sparql.sparql import Query
+from rdflib.store import Store
+
+from app.encoding import dumps
+
+# Longitud máxima del texto de una consulta
+MAX_QUERY_LENGTH = 10000
+
+# Consultas preparadas en caché (clave: texto de la consulta)
+PREPARED_CACHE_SIZE = 256
+
+# Resultados en caché por servicio (clave: consulta, límite de filas y versión del grafo)
+RESULT_CACHE_SIZE = 128
+
+# Filas evaluadas por fragmento de la respuesta en streaming
+STREAM_CHUNK_ROWS = 500
+
+
+class SparqlError(ValueError):
+    """La consulta no es válida o no está permitida"""
+
+
+class SparqlTimeoutError(Exception):
+    """La consulta superó su presupuesto de tiempo"""
+
+
+class BudgetedStore(Store):
+    """
+    Vista de solo lectura de un grafo que aborta al superar un plazo
+
+    La evaluación de SPARQL de rdflib lee el grafo patrón a patrón a través
+    de `triples`; comprobar el plazo en cada tripla devuelta interrumpe
+    también las consultas que nunca llegan a producir una fila (productos
+    cartesianos, ORDER BY sobre todo el grafo...). El plazo se puede mover
+    entre fragmentos de una evaluación en curso (ver `SparqlStream`).
+    """
+
+    def __init__(self, graph: Graph, deadline: float):
+        super().__init__()
+        self._graph = graph
+        self.deadline = deadline
+
+    def _check(self):
+        if time.monotonic() > self.deadline:
+            raise SparqlTimeoutError("La consulta superó el tiempo máximo")
+
+    def triples(self, triple_pattern, context=None):
+        self._check()
+        for count, (triple, contexts) in enumerate(self._graph.store.triples(triple_pattern, context=self._graph)):
+            if count % 256 == 0:
+                self._check()
+            yield triple, contexts
+
+    def __len__(self, context=None) -> int:
+        return len(self._graph)
+
+    def namespace(self, prefix):
+        return self._graph.store.namespace(prefix)
+
+    def prefix(self, namespace):
+        return self._graph.store.prefix(namespace)
+
+    def namespaces(self):
+        return self._graph.store.namespaces()
+
+    def bind(self, prefix, namespace, override=True):
+        pass
+
+    def add(self, triple, context, quoted=False):
+        raise SparqlError("El endpoint SPARQL es de solo lectura")
+
+    def remove(self, triple, context=None):
+        raise SparqlError("El endpoint SPARQL es de solo lectura")
+
+
+def _contains(node: Any, name: str) -> bool:
+    """Buscar un nodo del álgebra por nombre (p. ej. ServiceGraphPattern)"""
+    if isinstance(node, CompValue):
+        if node.name == name:
+            return True
+        return any(_contains(value, name) for value in node.values())
+    if isinstance(node, (list, tuple)):
+        return any(_contains(value, name) for value in node)
+    return False
+
+
+_prepared: "OrderedDict[str, Query]" = OrderedDict()
+_prepared_lock = threading.Lock()
+
+# El parser de SPARQL de rdflib (pyparsing) no es seguro entre hilos
+_parse_lock = threading.Lock()
+
+
+def prepare(query: str, namespaces: Dict[str, Any]) -> Query:
+    """
+    Parsear y preparar una consulta SELECT (con caché por texto)
+
+    Raises:
+        SparqlError: Si la consulta no es un SELECT válido o usa SERVICE/FROM
+    """
+    if len(query) > MAX_QUERY_LENGTH:
+        raise SparqlError(f"La consulta supera los {MAX_QUERY_LENGTH} caracteres")
+    with _prepared_lock:
+        prepared = _prepared.get(query)
+        if prepared is not None:
+            _prepared.move_to_end(query)
+            return prepared
+
+    try:
+        with _parse_lock:
+            prepared = prepareQuery(query, initNs=namespaces)
+    except Exception as e:
+        raise SparqlError(f"Consulta SPARQL inválida: {e}") from e
+    if prepared.algebra.name != "SelectQuery":
+        raise SparqlError("Solo se admiten consultas SELECT")
+    if prepared.algebra.get("datasetClause") or _contains(prepared.algebra, "ServiceGraphPattern"):
+        raise SparqlError("No se admiten FROM, FROM NAMED ni SERVICE")
+
+    with _prepared_lock:
+        _prepared[query] = prepared
+        if len(_prepared) > PREPARED_CACHE_SIZE:
+            _prepared.popitem(last=False)
+    return prepared
+
+
+def encode_term(term) -> Optional[Dict[str, str]]:
+    """Término RDF en el formato de resultados SPARQL 1.1 JSON"""
+    if term is None:
+        return None
+    if isinstance(term, URIRef):
+        return {"type": "uri", "value": str(term)}
+    if isinstance(term, BNode):
+        return {"type": "bnode", "value": str(term)}
+    if isinstance(term, Literal):
+        encoded = {"type": "literal", "value": str(term)}
+        if term.language:
+            encoded["xml:lang"] = term.language
+        elif term.datatype:
+            encoded["datatype"] = str(term.datatype)
+        return encoded
+    return {"type": "literal", "value": str(term)}
+
+
+class SparqlResult:
+    """Resultado completo ya codificado de una consulta (entrada de la caché)"""
+
+    __slots__ = ("variables", "rows", "truncated", "elapsed_ms")
+
+    def __init__(self, variables: List[str], rows: List[bytes], truncated: bool, elapsed_ms: float):
+        self.variables = variables
+        self.rows = rows
+        self.truncated = truncated
+        self.elapsed_ms = elapsed_ms
+
+
+class SparqlStream:
+    """
+    Evaluación de una consulta que se consume por fragmentos
+
+    rdflib produce las filas de forma perezosa: cada `fetch` avanza la
+    evaluación hasta completar un fragmento, comprobando el plazo en cada
+    tripla leída y en cada fila y el máximo de filas en cada fila. El plazo
+    solo corre mientras se evalúa, no mientras el cliente lee. Si el grafo
+    cambia entre fragmentos la evaluación no se reanuda (sus iteradores ya
+    no son válidos) y el resultado termina como truncado.
+
+    El documento SPARQL 1.1 JSON se envía como `head()`, las filas separadas
+    por comas y `tail()`, que añade el resumen (filas, truncado y motivo,
+    tiempo de evaluación y si procede de la caché).
+    """
+
+    def __init__(
+        self,
+        engine: "SparqlEngine",
+        key: Hashable,
+        version: int,
+        variables: List[str],
+        rows: Iterator[bytes],
+        store: Optional[BudgetedStore],
+        max_rows: int,
+        timeout: float,
+        cached: Optional[SparqlResult] = None
+    ):
+        """
+        Args:
+            engine: Motor que guarda el resultado en caché al completarse
+            key: Clave del resultado en la caché
+            version: Versión del grafo evaluado
+            variables: Variables proyectadas
+            rows: Filas codificadas en JSON, evaluadas a medida que se piden
+            store: Vista con plazo sobre la que se evalúa (None si el
+                resultado procede de la caché)
+            max_rows: Máximo de filas
+            timeout: Segundos de evaluación disponibles
+            cached: Resultado en caché del que proceden las filas
+        """
+        self._engine = engine
+        self._key = key
+        self.version = version
+        self.variables = variables
+        self._rows = rows
+        self._store = store
+        self.max_rows = max_rows
+        self._remaining = timeout
+        self._collected: Optional[List[bytes]] = None if cached is not None else []
+        self.count = 0
+        self.done = False
+        self.reason: Optional[str] = None
+        self.cached = cached is not None
+        self.elapsed_ms = cached.elapsed_ms if cached is not None else 0.0
+        if cached is not None and cached.truncated:
+            self.reason = "max_rows"
+
+    @property
+    def live(self) -> bool:
+        """Si las filas se están evaluando sobre el grafo (y no leyendo de la caché)"""
+        return self._store is not None
+
+    @property
+    def truncated(self) -> bool:
+        return self.reason is not None
+
+    def fetch(self, limit: int = STREAM_CHUNK_ROWS) -> List[bytes]:
+        """
+        Evaluar las siguientes `limit` filas como máximo
+
+        Returns:
+            Filas codificadas (lista vacía al terminar)
+
+        Raises:
+            SparqlTimeoutError: Si se agota el plazo antes de la primera fila
+        """
+        rows: List[bytes] = []
+        if self.done:
+            return rows
+        start = time.monotonic()
+        if self._store is not None:
+            self._store.deadline = start + self._remaining
+        finished = False
+        reason = self.reason
+        try:
+            while len(rows) < limit:
+                row = next(self._rows, None)
+                if row is None:
+                    finished = True
+                    break
+                if self.count >= self.max_rows:
+                    finished, reason = True, "max_rows"
+                    break
+                if self._store is not None:
+                    self._store._check()
+                rows.append(row)
+                self.count += 1
+        except SparqlTimeoutError:
+            if not self.count:
+                raise
+            finished, reason = True, "timeout"
+        finally:
+            spent = time.monotonic() - start
+            if self._store is not None:
+                self._remaining -= spent
+                self.elapsed_ms = round(self.elapsed_ms + spent * 1000, 2)
+            if self._collected is not None:
+                self._collected.extend(rows)
+        if finished:
+            self._finish(reason)
+        return rows
+
+    def abort(self, reason: str):
+        """Terminar sin evaluar más filas (p. ej. "graph_changed")"""
+        self._collected = None
+        self._finish(reason)
+
+    def _finish(self, reason: Optional[str]):
+        self.done = True
+        self.reason = reason
+        if self._collected is not None and reason in (None, "max_rows"):
+            self._engine._store_result(
+                self._key, SparqlResult(self.variables, self._collected, reason is not None, self.elapsed_ms)
+            )
+        self._collected = None
+
+    def head(self) -> bytes:
+        """Inicio del documento, hasta la apertura de la lista de filas"""
+        return b'{"head":' + dumps({"vars": self.variables}) + b',"results":{"bindings":['
+
+    def tail(self) -> bytes:
+        """Cierre del documento con el resumen de la evaluación"""
+        summary = {
+            "rows": self.count,
+            "truncated": self.truncated,
+            "reason": self.reason,
+            "elapsed_ms": self.elapsed_ms,
+            "cached": self.cached,
+        }
+        return b']},"summary":' + dumps(summary) + b"}"
+
+
+def _encoded_rows(result, variables: List[str]) -> Iterator[bytes]:
+    """Filas de un resultado de rdflib en formato SPARQL 1.1 JSON, a medida que se evalúan"""
+    for row in result:
+        bindings = {}
+        for var, term in zip(variables, row):
+            encoded = encode_term(term)
+            if encoded is not None:
+                bindings[var] = encoded
+        yield dumps(bindings)
+
+
+class SparqlEngine:
+    """
+    Ejecución de consultas SELECT sobre el grafo de un servicio
+
+    Cada consulta se evalúa sobre una vista del grafo con plazo y se corta al
+    llegar al máximo de filas. Los resultados se guardan por texto de la
+    consulta y versión del grafo, de modo que un cambio del grafo los deja
+    obsoletos sin invalidación explícita.
+    """
+
+    NAMESPACES = {"rdf": RDF, "rdfs": RDFS, "owl": OWL, "xsd": XSD}
+
+    def __init__(self, graph: Graph, music):
+        """
+        Args:
+            graph: Grafo RDF consultado
+            music: Namespace de la ontología de música (prefijo `music:`)
+        """
+        self.graph = graph
+        self.namespaces = {**self.NAMESPACES, "music": music}
+        self._results: "OrderedDict[Hashable, SparqlResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, query: str, version: int, max_rows: int, timeout: float) -> SparqlStream:
+        """
+        Preparar una consulta SELECT para evaluarla por fragmentos
+
+        Args:
+            query: Texto de la consulta
+            version: Versión actual del grafo
+            max_rows: Máximo de filas devueltas (el resto se descarta)
+            timeout: Segundos máximos de evaluación
+
+        Returns:
+            Evaluación pendiente (o lectura del resultado en caché)
+
+        Raises:
+            SparqlError: Si la consulta no es válida o no está permitida
+        """
+        key = (query, max_rows, version)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+        if cached is not None:
+            return SparqlStream(
+                self, key, version, cached.variables, iter(cached.rows), None, max_rows, timeout, cached=cached
+            )
+
+        prepared = prepare(query, self.namespaces)
+        store = BudgetedStore(self.graph, time.monotonic() + timeout)
+        result = Graph(store=store, identifier=self.graph.identifier).query(prepared)
+        variables = [str(var) for var in result.vars]
+        return SparqlStream(self, key, version, variables, _encoded_rows(result, variables), store, max_rows, timeout)
+
+    def _store_result(self, key: Hashable, result: SparqlResult):
+        """Guardar un resultado completo en la caché"""
+        with self._lock:
+            self._results[key] = result
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
@@ -0,0 +1,351 @@
+"""
+Almacén SQLite - Store RDF persistente en disco con índices SPO/POS/OSP
+
+Los términos se guardan una sola vez en una tabla de términos (con la misma
+codificación que el snapshot) y las triplas como tres enteros. La clave
+primaria (s, p, o) y los índices (p, o, s) y (o, s, p) permiten resolver
+cualquier patrón con una búsqueda por prefijo, de modo que el grafo no tiene
+que caber en RAM y los reinicios no vuelven a parsear el OWL.
+
+Cada carga desde el OWL crea una base de datos nueva (una generación,
+`<ruta>.<n>`) en lugar de vaciar la anterior: un servicio que todavía lee la
+generación previa conserva sus IDs de término y su contenido intactos hasta
+que se sustituye.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rdflib.plugins.stores.memory import Memory
+from rdflib.store import Store
+from rdflib.term import Node
+
+from app.ingest import Progress, iter_batches
+from app.snapshot import SnapshotError, decode_term, encode_term, file_fingerprint, file_lock, snapshot_triples
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    key BLOB NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS triples (
+    s INTEGER NOT NULL,
+    p INTEGER NOT NULL,
+    o INTEGER NOT NULL,
+    PRIMARY KEY (s, p, o)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS triples_pos ON triples (p, o, s);
+CREATE INDEX IF NOT EXISTS triples_osp ON triples (o, s, p);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+"""
+
+# Columnas de la tabla de triplas en el orden de los componentes (s, p, o)
+COLUMNS = ("s", "p", "o")
+
+# Filas por lote en las inserciones masivas
+BATCH_SIZE = 50000
+
+
+class SQLiteStore(Store):
+    """
+    Store de rdflib respaldado por una base de datos SQLite
+
+    Cada hilo usa su propia conexión (en modo WAL, las lecturas no bloquean
+    a la escritura). Los identificadores de los términos no cambian una vez
+    asignados (los términos nunca se borran y una recarga usa otro archivo),
+    así que la decodificación se guarda en una caché LRU.
+
+    El número de triplas se lleva en el proceso: con varios procesos sobre
+    la misma base de datos, cada uno solo cuenta los deltas que aplica él.
+    """
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, path: str, term_cache_size: int = 65536):
+        """
+        Abrir (o crear) la base de datos
+
+        Args:
+            path: Ruta del archivo SQLite
+            term_cache_size: Términos decodificados que se mantienen en caché
+        """
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._namespaces = Memory()
+        self._ids: Dict[Node, int] = {}
+        self._ids_limit = term_cache_size
+        self._term = lru_cache(maxsize=term_cache_size)(self._decode)
+
+        # Solo la primera conexión puede crear el archivo: si una generación
+        # antigua se borra, los hilos nuevos fallan en lugar de abrir una vacía
+        self._mode = "rwc"
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        self._mode = "rw"
+        self._count = connection.execute("SELECT COUNT(*) FROM triples").fetchone()[0]
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (se abre en el primer uso)"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            uri = f"{Path(os.path.abspath(self.path)).as_uri()}?mode={self._mode}"
+            connection = sqlite3.connect(uri, uri=True, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA cache_size=-65536")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _decode(self, term_id: int) -> Node:
+        row = self._connection().execute("SELECT key FROM terms WHERE id = ?", (term_id,)).fetchone()
+        return decode_term(row[0])
+
+    def _lookup(self, term: Node) -> Optional[int]:
+        """ID de un término, None si no aparece en la base de datos"""
+        term_id = self._ids.get(term)
+        if term_id is not None:
+            return term_id
+        try:
+            key = encode_term(term)
+        except SnapshotError:
+            return None
+        row = self._connection().execute("SELECT id FROM terms WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if len(self._ids) >= self._ids_limit:
+            self._ids.clear()
+        self._ids[term] = row[0]
+        return row[0]
+
+    def _intern(self, term: Node) -> int:
+        """ID de un término, insertándolo si no existe"""
+        term_id = self._lookup(term)
+        if term_id is None:
+            cursor = self._connection().execute("INSERT INTO terms (key) VALUES (?)", (encode_term(term),))
+            term_id = cursor.lastrowid
+        return term_id
+
+    def _where(self, triple_pattern) -> Optional[Tuple[str, Tuple[int, ...]]]:
+        """Condición SQL de un patrón (None si algún término no existe)"""
+        conditions = []
+        params = []
+        for column, term in zip(COLUMNS, triple_pattern):
+            if term is None:
+                continue
+            term_id = self._lookup(term)
+            if term_id is None:
+                return None
+            conditions.append(f"{column} = ?")
+            params.append(term_id)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, tuple(params)
+
+    def __len__(self, context=None) -> int:
+        return self._count
+
+    def triples(self, triple_pattern, context=None) -> Iterator:
+        condition = self._where(triple_pattern)
+        if condition is None:
+            return
+        where, params = condition
+        term = self._term
+        for s, p, o in self._connection().execute(f"SELECT s, p, o FROM triples{where}", params):
+            yield (term(s), term(p), term(o)), iter(())
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def add(self, triple, context, quoted=False):
+        s, p, o = (self._intern(term) for term in triple)
+        cursor = self._connection().execute("INSERT OR IGNORE INTO triples (s, p, o) VALUES (?, ?, ?)", (s, p, o))
+        self._count += cursor.rowcount
+
+    def addN(self, quads):
+        for s, p, o, context in quads:
+            self.add((s, p, o), context)
+
+    def remove(self, triple_pattern, context=None):
+        condition = self._where(triple_pattern)
+        if condition is None:
+            return
+        where, params = condition
+        cursor = self._connection().execute(f"DELETE FROM triples{where}", params)
+        self._count -= cursor.rowcount
+
+    def bind(self, prefix, namespace, override=True):
+        self._namespaces.bind(prefix, namespace, override=override)
+
+    def namespace(self, prefix):
+        return self._namespaces.namespace(prefix)
+
+    def prefix(self, namespace):
+        return self._namespaces.prefix(namespace)
+
+    def namespaces(self):
+        return self._namespaces.namespaces()
+
+    def fingerprint(self) -> Optional[Tuple[int, int, bytes]]:
+        """Huella del OWL con el que se cargó la base de datos (None si está vacía)"""
+        rows = dict(self._connection().execute("SELECT name, value FROM meta"))
+        if not {"source_size", "source_mtime_ns", "source_sha256"} <= rows.keys():
+            return None
+        return int(rows["source_size"]), int(rows["source_mtime_ns"]), bytes(rows["source_sha256"])
+
+    def load(self, triples: Iterable[Tuple[Node, Node, Node]], fingerprint: Tuple[int, int, bytes]):
+        """
+        Cargar las triplas dadas en una base de datos vacía, en una sola transacción
+
+        Los índices secundarios se eliminan durante la inserción y se crean
+        al final, que es mucho más rápido que mantenerlos fila a fila. Los
+        IDs de término se numeran desde 1, así que el contenido no se
+        sustituye en el sitio: una recarga crea una base de datos nueva (ver
+        `open_sqlite_store`).
+
+        Args:
+            triples: Triplas (s, p, o) a cargar
+            fingerprint: Huella del OWL de origen (tamaño, mtime_ns, sha256)
+
+        Raises:
+            ValueError: Si la base de datos ya tiene términos
+        """
+        connection = self._connection()
+        if connection.execute("SELECT 1 FROM terms LIMIT 1").fetchone() is not None:
+            raise ValueError(f"La base de datos no está vacía: {self.path}")
+        ids: Dict[Node, int] = {}
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DROP INDEX IF EXISTS triples_pos")
+            connection.execute("DROP INDEX IF EXISTS triples_osp")
+
+            terms: List[Tuple[int, bytes]] = []
+            rows: List[Tuple[int, int, int]] = []
+            for triple in triples:
+                row = []
+                for term in triple:
+                    term_id = ids.get(term)
+                    if term_id is None:
+                        term_id = ids[term] = len(ids) + 1
+                        terms.append((term_id, encode_term(term)))
+                    row.append(term_id)
+                rows.append(tuple(row))
+                if len(rows) >= BATCH_SIZE:
+                    connection.executemany("INSERT INTO terms (id, key) VALUES (?, ?)", terms)
+                    connection.executemany("INSERT OR IGNORE INTO triples (s, p, o) VALUES (?, ?, ?)", rows)
+                    terms, rows = [], []
+            connection.executemany("INSERT INTO terms (id, key) VALUES (?, ?)", terms)
+            connection.executemany("INSERT OR IGNORE INTO triples (s, p, o) VALUES (?, ?, ?)", rows)
+
+            connection.execute("CREATE INDEX triples_pos ON triples (p, o, s)")
+            connection.execute("CREATE INDEX triples_osp ON triples (o, s, p)")
+            size, mtime_ns, sha256 = fingerprint
+            connection.executemany(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                [("source_size", size), ("source_mtime_ns", mtime_ns), ("source_sha256", sha256)]
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("ANALYZE")
+        self._count = connection.execute("SELECT COUNT(*) FROM triples").fetchone()[0]
+
+    def close(self, commit_pending_transaction=False):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._local = threading.local()
+        self._term.cache_clear()
+
+
+def _generations(db_path: str) -> List[int]:
+    """Generaciones existentes de la base de datos (`<ruta>.<n>`), en orden"""
+    directory, name = os.path.split(os.path.abspath(db_path))
+    pattern = re.compile(re.escape(name) + r"\.(\d+)")
+    return sorted(
+        int(match.group(1))
+        for match in map(pattern.fullmatch, os.listdir(directory))
+        if match is not None
+    )
+
+
+def _remove_generation(db_path: str, generation: int):
+    """Borrar una generación (los archivos en uso en Windows se dejan para la próxima vez)"""
+    path = f"{db_path}.{generation}"
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
+
+
+def open_sqlite_store(
+    db_path: str,
+    source_path: str,
+    snapshot_path: Optional[str] = None,
+    workers: int = 1
+) -> Tuple[SQLiteStore, bool]:
+    """
+    Abrir la base de datos, cargando una generación nueva si no está al día
+
+    Usa un lock de archivo para que, si varios procesos arrancan a la vez,
+    solo uno cargue el origen y el resto reutilice el resultado. Las triplas
+    pasan del parser (o del snapshot) a la base de datos en streaming, sin
+    construir el grafo en memoria.
+
+    La carga se hace en `<db_path>.<n + 1>`; la generación anterior no se
+    modifica, porque un servicio que aún no se ha sustituido puede estar
+    leyéndola. Se conservan la generación nueva y la anterior; las demás se
+    borran.
+
+    Args:
+        db_path: Ruta base de la base de datos (las generaciones añaden `.<n>`)
+        source_path: Archivo de origen (RDF/XML, N-Triples o Turtle)
+        snapshot_path: Snapshot binario del origen (evita parsearlo si está al día)
+        workers: Procesos para parsear el origen (solo N-Triples)
+
+    Returns:
+        Store abierto e indicador de si se tuvo que (re)cargar
+    """
+    with file_lock(db_path + ".lock"):
+        fingerprint = file_fingerprint(source_path)
+        generations = _generations(db_path)
+        current = generations[-1] if generations else 0
+        if current:
+            store = SQLiteStore(f"{db_path}.{current}")
+            if store.fingerprint() == fingerprint:
+                return store, False
+            store.close()
+
+        store = SQLiteStore(f"{db_path}.{current + 1}")
+        try:
+            triples = snapshot_triples(snapshot_path, source_path) if snapshot_path else None
+            if triples is None:
+                progress = Progress(source_path)
+                triples = chain.from_iterable(iter_batches(source_path, progress, workers=workers))
+            store.load(triples, fingerprint)
+        except BaseException:
+            store.close()
+            _remove_generation(db_path, current + 1)
+            raise
+
+        for generation in generations[:-1]:
+            _remove_generation(db_path, generation)
+        return store, True
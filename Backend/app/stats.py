@@ -0,0 +1,107 @@
+"""
+Estadísticas - Contadores del grafo mantenidos en carga y en cada modificación
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, Tuple
+
+from rdflib import Namespace, OWL, RDF, RDFS, XSD
+
+# Prefijos con los que se publican los predicados en /api/stats
+PREFIXES = (
+    ("rdf", str(RDF)),
+    ("rdfs", str(RDFS)),
+    ("owl", str(OWL)),
+    ("xsd", str(XSD)),
+)
+
+
+def prefixed(uri, music: Namespace) -> str:
+    """Nombre corto de un predicado (music:name, rdf:type...)"""
+    uri = str(uri)
+    for prefix, namespace in (("music", str(music)),) + PREFIXES:
+        if uri.startswith(namespace):
+            return f"{prefix}:{uri[len(namespace):]}"
+    return uri
+
+
+class GraphCounters:
+    """
+    Contadores de triplas por predicado y de instancias por clase
+
+    Se recorren todas las triplas una sola vez al cargar; después cada
+    tripla añadida o eliminada actualiza los contadores en O(1), de modo que
+    consultar las estadísticas no requiere recorrer el grafo.
+    """
+
+    def __init__(self):
+        self.triples = 0
+        self.predicates: Counter = Counter()
+        self.classes: Counter = Counter()
+
+    def build(self, triples: Iterable[Tuple]):
+        """Inicializar los contadores a partir de todas las triplas del grafo"""
+        self.triples = 0
+        self.predicates = Counter()
+        self.classes = Counter()
+        for triple in triples:
+            self.add(triple)
+
+    def load(self, triples: int, predicates: Dict[Any, int], classes: Dict[Any, int]):
+        """Inicializar los contadores con recuentos ya calculados (p. ej. sobre un snapshot)"""
+        self.triples = triples
+        self.predicates = Counter(predicates)
+        self.classes = Counter(classes)
+
+    def add(self, triple: Tuple):
+        """Registrar una tripla añadida (debe ser nueva en el grafo)"""
+        _, predicate, obj = triple
+        self.triples += 1
+        self.predicates[predicate] += 1
+        if predicate == RDF.type:
+            self.classes[obj] += 1
+
+    def remove(self, triple: Tuple):
+        """Registrar una tripla eliminada (debe existir en el grafo)"""
+        _, predicate, obj = triple
+        self.triples -= 1
+        self.predicates[predicate] -= 1
+        if self.predicates[predicate] <= 0:
+            del self.predicates[predicate]
+        if predicate == RDF.type:
+            self.classes[obj] -= 1
+            if self.classes[obj] <= 0:
+                del self.classes[obj]
+
+    def summary(self, music: Namespace) -> Dict[str, Any]:
+        """
+        Estadísticas del grafo calculadas solo a partir de los contadores
+
+        Args:
+            music: Namespace de la ontología de música
+        """
+        artists = self.classes[music.Artist]
+        albums = self.classes[music.Album]
+        songs = self.classes[music.Song]
+
+        def ratio(numerator: int, denominator: int) -> float:
+            return round(numerator / denominator, 3) if denominator else 0.0
+
+        return {
+            "total_triples": self.triples,
+            "artists": artists,
+            "albums": albums,
+            "songs": songs,
+            "instruments": self.classes[music.Instrument],
+            "genres": self.classes[music.Genre],
+            "predicates": {
+                prefixed(predicate, music): count
+                for predicate, count in sorted(self.predicates.items())
+            },
+            "distributions": {
+                "avg_instruments_per_song": ratio(self.predicates[music.usesInstrument], songs),
+                "avg_songs_per_album": ratio(self.predicates[music.containsSong], albums),
+                "avg_albums_per_artist": ratio(self.predicates[music.hasAlbum], artists),
+                "avg_genres_per_artist": ratio(self.predicates[music.performsGenre], artists),
+            },
+        }
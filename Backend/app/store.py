@@ -0,0 +1,151 @@
+"""
+Almacén compartido - Store RDF de solo lectura sobre un snapshot mapeado en memoria
+
+Todos los procesos worker que abren el mismo snapshot comparten las páginas
+del archivo a través de la caché del sistema operativo: el grafo ocupa RAM una
+sola vez, independientemente del número de workers.
+"""
+
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple
+
+from rdflib.store import Store
+
+from app.snapshot import Snapshot, decode_term
+
+# Orden de los componentes (s=0, p=1, o=2) en cada índice del snapshot
+SPO = (0, 1, 2)
+POS = (1, 2, 0)
+OSP = (2, 0, 1)
+
+
+class ReadOnlyStoreError(Exception):
+    """Se intentó modificar un store de solo lectura"""
+
+
+class SnapshotStore(Store):
+    """
+    Store de rdflib respaldado por los arrays SPO/POS/OSP de un snapshot
+
+    Cada patrón de consulta se resuelve con búsqueda binaria sobre el índice
+    cuyo prefijo coincide con los términos conocidos, igual que en un almacén
+    de triplas con índices por permutación.
+    """
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, snapshot_path: str, term_cache_size: int = 65536):
+        """
+        Abrir el snapshot
+
+        Args:
+            snapshot_path: Ruta del snapshot (debe estar al día)
+            term_cache_size: Términos decodificados que se mantienen en caché
+        """
+        super().__init__()
+        self.snapshot = Snapshot(snapshot_path)
+        self._term = lru_cache(maxsize=term_cache_size)(self._decode)
+        self._term_id = lru_cache(maxsize=term_cache_size)(self.snapshot.term_id)
+        self._indexes = {
+            SPO: self.snapshot.spo,
+            POS: self.snapshot.pos,
+            OSP: self.snapshot.osp,
+        }
+
+    def _decode(self, term_id: int):
+        return decode_term(self.snapshot.term_bytes(term_id))
+
+    def term(self, term_id: int):
+        """Término decodificado de un ID del snapshot (con caché)"""
+        return self._term(term_id)
+
+    def term_id(self, term) -> Optional[int]:
+        """ID en el snapshot de un término (con caché), None si no existe"""
+        return self._term_id(term)
+
+    def __len__(self, context=None) -> int:
+        return self.snapshot.n_triples
+
+    def _choose_index(self, ids: Tuple[Optional[int], ...]) -> Tuple[Tuple[int, int, int], Tuple[int, ...]]:
+        """Elegir el índice cuyo prefijo cubre los componentes conocidos"""
+        s, p, o = ids
+        if s is not None:
+            if p is not None or o is None:
+                order = SPO
+            else:
+                order = OSP
+        elif p is not None:
+            order = POS
+        elif o is not None:
+            order = OSP
+        else:
+            order = SPO
+
+        prefix = []
+        for component in order:
+            if ids[component] is None:
+                break
+            prefix.append(ids[component])
+        return order, tuple(prefix)
+
+    def _bound(self, array, prefix: Tuple[int, ...], upper: bool) -> int:
+        """Primera fila cuyo prefijo es >= (o > si `upper`) que el buscado"""
+        size = len(prefix)
+        lo, hi = 0, self.snapshot.n_triples
+        while lo < hi:
+            mid = (lo + hi) // 2
+            base = 3 * mid
+            row = tuple(array[base:base + size])
+            if row < prefix or (upper and row == prefix):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def triples(self, triple_pattern, context=None) -> Iterator:
+        ids = []
+        for term in triple_pattern:
+            if term is None:
+                ids.append(None)
+                continue
+            term_id = self._term_id(term)
+            if term_id is None:
+                return
+            ids.append(term_id)
+
+        order, prefix = self._choose_index(tuple(ids))
+        array = self._indexes[order]
+        if prefix:
+            start = self._bound(array, prefix, upper=False)
+            end = self._bound(array, prefix, upper=True)
+        else:
+            start, end = 0, self.snapshot.n_triples
+
+        term = self._term
+        for row in range(start, end):
+            base = 3 * row
+            values = array[base:base + 3]
+            triple = [0, 0, 0]
+            for position, component in enumerate(order):
+                triple[component] = values[position]
+            yield (term(triple[0]), term(triple[1]), term(triple[2])), iter(())
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def add(self, triple, context, quoted=False):
+        raise ReadOnlyStoreError("El store compartido es de solo lectura")
+
+    def addN(self, quads):
+        raise ReadOnlyStoreError("El store compartido es de solo lectura")
+
+    def remove(self, triple, context=None):
+        raise ReadOnlyStoreError("El store compartido es de solo lectura")
+
+    def close(self, commit_pending_transaction=False):
+        self._term.cache_clear()
+        self._term_id.cache_clear()
+        self.snapshot.close()
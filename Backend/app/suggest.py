@@ -0,0 +1,227 @@
+"""
+Autocompletado - Índice de prefijos sobre nombres normalizados en arrays ordenados
+"""
+
+import heapq
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from app.ranking import tokenize
+
+# Rangos de claves mayores que este límite no se recorren en cada petición:
+# su top se calcula una vez y se guarda en caché hasta que cambie una entidad
+# cuyo nombre empiece por ese prefijo
+SCAN_LIMIT = 2048
+
+# Longitud máxima de los prefijos cuyo top se precalcula al construir el índice
+WARM_PREFIX_LENGTH = 2
+
+# Número máximo de prefijos con el top en caché y tamaño de ese top
+CACHE_SIZE = 4096
+CACHE_TOP = 50
+
+
+class SuggestIndex:
+    """
+    Índice de autocompletado por prefijo
+
+    Cada nombre se normaliza (minúsculas, sin acentos) y se indexa por cada
+    palabra en la que empieza un sufijo suyo ("led zeppelin" y "zeppelin"),
+    de modo que "zep" también sugiere "Led Zeppelin". Las claves se guardan
+    en un array ordenado con un array paralelo de identificadores enteros, y
+    un prefijo se resuelve con dos búsquedas binarias. Las sugerencias se
+    ordenan por peso (grado de la entidad en el grafo).
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._ids: List[int] = []
+        self._entities: List[Optional[Tuple[str, str, str, int]]] = []
+        self._entity_ids: Dict[Hashable, int] = {}
+        self._entity_keys: Dict[int, Tuple[str, ...]] = {}
+        self._cache: "OrderedDict[Tuple, List[int]]" = OrderedDict()
+        # Prefijo -> claves de caché con ese prefijo (para invalidar sin recorrer la caché)
+        self._cached_prefixes: Dict[str, Set[Tuple]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entity_keys)
+
+    def build(self, items: Iterable[Tuple[Hashable, str, str, str, int]]):
+        """
+        Construir el índice de una vez (una sola ordenación en lugar de inserciones)
+
+        Args:
+            items: Tuplas (clave, uri, tipo, nombre, peso)
+        """
+        self.__init__()
+        pairs = []
+        for key, uri, entity_type, name, weight in items:
+            entity_id = len(self._entities)
+            tokens = tokenize(name)
+            suffixes = tuple(" ".join(tokens[i:]) for i in range(len(tokens)))
+            self._entities.append((uri, entity_type, name, weight))
+            self._entity_ids[key] = entity_id
+            self._entity_keys[entity_id] = suffixes
+            pairs.extend((suffix, entity_id) for suffix in suffixes)
+        pairs.sort()
+        self._keys = [suffix for suffix, _ in pairs]
+        self._ids = [entity_id for _, entity_id in pairs]
+        self._warm()
+
+    def _warm(self):
+        """Precalcular el top de los prefijos cortos con rangos grandes"""
+        for length in range(1, WARM_PREFIX_LENGTH + 1):
+            position = 0
+            while position < len(self._keys):
+                prefix = self._keys[position][:length]
+                start, end = self._range(prefix)
+                if len(prefix) == length and end - start > SCAN_LIMIT:
+                    self._store((prefix, None), self._top(start, end, CACHE_TOP, None))
+                position = max(end, position + 1)
+
+    def add(self, key: Hashable, uri: str, entity_type: str, name: Optional[str], weight: int = 0):
+        """
+        Indexar (o reindexar) una entidad
+
+        Args:
+            key: Identificador de la entidad en el índice
+            uri: URI de la entidad
+            entity_type: Tipo de la entidad
+            name: Nombre; None elimina la entidad del índice
+            weight: Peso de la entidad (mayor primero)
+        """
+        if name is None:
+            self.remove(key)
+            return
+        tokens = tokenize(name)
+        suffixes = tuple(" ".join(tokens[i:]) for i in range(len(tokens)))
+
+        entity_id = self._entity_ids.get(key)
+        if entity_id is None:
+            entity_id = len(self._entities)
+            self._entities.append(None)
+            self._entity_ids[key] = entity_id
+        self._entities[entity_id] = (uri, entity_type, name, weight)
+        self._invalidate(self._entity_keys.get(entity_id, ()) + suffixes)
+
+        if self._entity_keys.get(entity_id) == suffixes:
+            return
+        self._drop_keys(entity_id)
+        self._entity_keys[entity_id] = suffixes
+        for suffix in suffixes:
+            position = bisect_right(self._keys, suffix)
+            self._keys.insert(position, suffix)
+            self._ids.insert(position, entity_id)
+
+    def set_weight(self, key: Hashable, weight: int):
+        """Actualizar el peso de una entidad ya indexada"""
+        entity_id = self._entity_ids.get(key)
+        if entity_id is None:
+            return
+        uri, entity_type, name, _ = self._entities[entity_id]
+        self._entities[entity_id] = (uri, entity_type, name, weight)
+        self._invalidate(self._entity_keys.get(entity_id, ()))
+
+    def remove(self, key: Hashable):
+        """Eliminar una entidad del índice"""
+        entity_id = self._entity_ids.pop(key, None)
+        if entity_id is None:
+            return
+        self._invalidate(self._entity_keys.get(entity_id, ()))
+        self._drop_keys(entity_id)
+        self._entities[entity_id] = None
+
+    def _store(self, cache_key: Tuple, top: List[int]):
+        """Guardar el top de un prefijo, expulsando el usado hace más tiempo si la caché está llena"""
+        with self._lock:
+            self._cache[cache_key] = top
+            self._cached_prefixes[cache_key[0]].add(cache_key)
+            if len(self._cache) > CACHE_SIZE:
+                evicted, _ = self._cache.popitem(last=False)
+                self._forget(evicted)
+
+    def _forget(self, cache_key: Tuple):
+        """Quitar una clave de caché ya descartada del índice por prefijo"""
+        keys = self._cached_prefixes.get(cache_key[0])
+        if keys is not None:
+            keys.discard(cache_key)
+            if not keys:
+                del self._cached_prefixes[cache_key[0]]
+
+    def _invalidate(self, suffixes: Tuple[str, ...]):
+        """
+        Descartar los tops en caché de los prefijos que cubren alguna de estas claves
+
+        Solo se consultan los prefijos de cada clave (coste proporcional a su
+        longitud), no toda la caché.
+        """
+        with self._lock:
+            for suffix in suffixes:
+                for length in range(1, len(suffix) + 1):
+                    for cache_key in self._cached_prefixes.pop(suffix[:length], ()):
+                        self._cache.pop(cache_key, None)
+
+    def _drop_keys(self, entity_id: int):
+        """Quitar del array ordenado las claves de una entidad"""
+        for suffix in self._entity_keys.pop(entity_id, ()):
+            position = bisect_left(self._keys, suffix)
+            while self._ids[position] != entity_id:
+                position += 1
+            del self._keys[position]
+            del self._ids[position]
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        """Posiciones [inicio, fin) de las claves que empiezan por `prefix`"""
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        return start, end
+
+    def _top(self, start: int, end: int, limit: int, accept: Optional[Set[str]]) -> List[int]:
+        """Identificadores distintos de más peso en un rango de claves"""
+        entities = self._entities
+        candidates = {
+            entity_id for entity_id in self._ids[start:end]
+            if accept is None or entities[entity_id][1] in accept
+        }
+        return heapq.nsmallest(
+            limit, candidates, key=lambda entity_id: (-entities[entity_id][3], entities[entity_id][2])
+        )
+
+    def suggest(self, prefix: str, limit: int = 10, types: Optional[Set[str]] = None) -> List[Dict[str, str]]:
+        """
+        Sugerencias para un prefijo
+
+        Args:
+            prefix: Texto escrito por el usuario
+            limit: Número máximo de sugerencias
+            types: Tipos de entidad admitidos (todos por defecto)
+
+        Returns:
+            Diccionarios con uri, name y type ordenados por peso descendente
+        """
+        normalized = " ".join(tokenize(prefix))
+        if not normalized or limit <= 0:
+            return []
+        start, end = self._range(normalized)
+
+        if end - start <= SCAN_LIMIT or limit > CACHE_TOP:
+            top = self._top(start, end, limit, types)
+        else:
+            cache_key = (normalized, frozenset(types) if types else None)
+            with self._lock:
+                top = self._cache.get(cache_key)
+                if top is not None:
+                    self._cache.move_to_end(cache_key)
+            if top is None:
+                top = self._top(start, end, CACHE_TOP, types)
+                self._store(cache_key, top)
+            top = top[:limit]
+
+        results = []
+        for entity_id in top:
+            uri, entity_type, name, _ = self._entities[entity_id]
+            results.append({"uri": uri, "name": name, "type": entity_type})
+        return results
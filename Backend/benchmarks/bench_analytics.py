@@ -0,0 +1,147 @@
+"""
+Benchmark - Agregaciones de /api/analytics sobre la tabla columnar
+
+La tabla se genera directamente con NumPy (mismo reparto que
+benchmarks.synthetic: ~3 álbumes por artista, ~10 canciones por álbum, 1-4
+instrumentos por canción) para medir catálogos de millones de canciones sin
+tener que cargar el grafo RDF equivalente. Con --artists se mide además la
+ruta anterior (un diccionario por canción con `_entity_to_dict`) sobre un
+grafo sintético real.
+
+Uso:
+    python -m benchmarks.bench_analytics --songs 1000000
+    python -m benchmarks.bench_analytics --songs 1000000 --artists 300
+"""
+
+import argparse
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+from rdflib import URIRef
+
+from app.analytics import MISSING, CatalogTable, build_table
+
+# Consultas medidas: etiqueta -> argumentos de CatalogTable.group_by
+QUERIES = {
+    "canciones por género y década": (["genre", "decade"], None, "count", None, "key"),
+    "duración media por artista": (["artist"], "duration", "avg", 100, "value"),
+    "uso de instrumentos": (["instrument"], None, "count", None, "value"),
+    "duración máxima por década e instrumento": (["decade", "instrument"], "duration", "max", None, "key"),
+}
+
+
+def _timeit(func, repeat: int) -> float:
+    """Mejor tiempo (en ms) de varias ejecuciones"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def synthetic_table(songs: int, genres: int = 10, instruments: int = 20, seed: int = 42) -> CatalogTable:
+    """Tabla columnar con `songs` canciones generada sin pasar por el grafo"""
+    rng = np.random.default_rng(seed)
+    albums = max(1, songs // 10)
+    artists = max(1, albums // 3)
+
+    song_album = np.sort(rng.integers(0, albums, songs))
+    album_artist = np.sort(rng.integers(0, artists, albums))
+    album_genre = rng.integers(0, genres, albums)
+    album_year = rng.integers(1960, 2025, albums)
+
+    # Instrumentos con popularidad de tipo Zipf, sin repetir dentro de una canción
+    per_song = rng.integers(1, 5, songs)
+    popularity = 1 / np.arange(1, instruments + 1)
+    instrument_songs = np.repeat(np.arange(songs), per_song)
+    instrument_codes = rng.choice(instruments, len(instrument_songs), p=popularity / popularity.sum())
+    pairs = np.unique(instrument_songs.astype(np.int64) * instruments + instrument_codes)
+
+    def uris(prefix: str, count: int):
+        return [URIRef(f"http://example.org/music-ontology#{prefix}-{i}") for i in range(count)]
+
+    duration = rng.integers(90, 601, songs)
+    duration[rng.random(songs) < 0.01] = MISSING
+    return CatalogTable(
+        {
+            "song": uris("song", songs),
+            "album": uris("album", albums),
+            "artist": uris("artist", artists),
+            "genre": uris("genre", genres),
+            "instrument": uris("instr", instruments),
+        },
+        {"year": album_year[song_album], "duration": duration},
+        {
+            "song_album": (np.arange(songs), song_album),
+            "album_artist": (np.arange(albums), album_artist),
+            "album_genre": (np.arange(albums), album_genre),
+            "song_instrument": (pairs // instruments, pairs % instruments),
+        },
+    )
+
+
+def per_entity_baseline(artists: int, repeat: int):
+    """Las mismas agregaciones sobre el servicio, una canción cada vez, frente a la tabla"""
+    import os
+    import tempfile
+    from app.ontology import OntologyService
+    from benchmarks.synthetic import build_graph
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "music.nt")
+        build_graph(artists=artists).serialize(path, format="nt")
+        service = OntologyService(path)
+
+    def loop():
+        # Ruta sin tabla: un diccionario por canción y recorridos por relación
+        genre_decade: Counter = Counter()
+        durations = defaultdict(list)
+        for record in service._projection.iter_records("song"):
+            song = service._entity_to_dict(record.uri, "song")
+            albums = service._adjacency.neighbors("containsSong", URIRef(record.uri), inverse=True)
+            year = song.get("releaseYear")
+            for album in albums:
+                for genre in service._adjacency.neighbors("hasGenre", album):
+                    if year:
+                        genre_decade[(genre, year // 10 * 10)] += 1
+                for artist in service._adjacency.neighbors("hasAlbum", album, inverse=True):
+                    if song.get("duration"):
+                        durations[artist].append(song["duration"])
+        return genre_decade, {artist: sum(v) / len(v) for artist, v in durations.items()}
+
+    def vectorized():
+        service.song_analytics(["genre", "decade"], order="key")
+        service.song_analytics(["artist"], "duration", "avg", 100)
+
+    songs = service._projection.count("song")
+    build_ms = _timeit(lambda: build_table(service._projection, service._adjacency), 1)
+    loop_ms = _timeit(loop, repeat)
+    table_ms = _timeit(vectorized, repeat)
+    print(f"\nServicio con {songs} canciones (tabla construida en {build_ms:.1f} ms)")
+    print(f"  por entidad: {loop_ms:.1f} ms | tabla columnar: {table_ms:.1f} ms ({loop_ms / table_ms:.0f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--songs", type=int, default=1000000)
+    parser.add_argument("--artists", type=int, default=0, help="Comparar con la ruta por entidad en un grafo real")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = synthetic_table(args.songs)
+    print(f"Tabla: {table.songs} canciones, {len(table.uris['album'])} álbumes, "
+          f"{len(table.uris['artist'])} artistas ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    print(f"{'consulta':<44}{'grupos':>8}{'ms':>10}")
+    for label, query in QUERIES.items():
+        groups = table.group_by(*query)[1]
+        print(f"{label:<44}{groups:>8}{_timeit(lambda: table.group_by(*query), args.repeat):>10.1f}")
+
+    if args.artists:
+        per_entity_baseline(args.artists, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark - Ingesta: Graph.parse de rdflib vs. lectura en streaming por formato
+
+Cada combinación se mide en un proceso aparte para que la memoria pico de
+una no contamine la de otra:
+
+- "rdflib": Graph.parse del archivo completo
+- "streaming": app.ingest en un grafo en memoria
+- "streaming (N procesos)": lo mismo repartiendo el parseo (solo N-Triples)
+- "streaming → sqlite": volcado directo al store SQLite, sin grafo en memoria
+
+Uso:
+    python -m benchmarks.bench_ingest --triples 200000
+    python -m benchmarks.bench_ingest --triples 1000000 --formats nt --workers 4
+"""
+
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.synthetic import WRITERS, iter_triples, scale_for_triples
+
+# Formato de app.ingest / rdflib -> (extensión, escritor de benchmarks.synthetic)
+FORMATS = {
+    "xml": (".owl", "xml"),
+    "nt": (".nt", "nt"),
+    "turtle": (".ttl", "ttl"),
+}
+
+
+def _rss_mb() -> float:
+    """Memoria residente actual del proceso (MB)"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure(mode: str, path: str, format: str, workers: int) -> Dict[str, Any]:
+    """Cargar el archivo con un método y medir tiempo y memoria (en el proceso actual)"""
+    from rdflib import Graph
+    from app.ingest import ingest
+    from app.sqlite_store import open_sqlite_store
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    if mode == "rdflib":
+        graph = Graph()
+        graph.parse(path, format=format)
+        triples = len(graph)
+    elif mode == "streaming":
+        graph = Graph()
+        triples = ingest(graph, path, format=format, workers=workers, verbose=False)["triples"]
+    else:
+        store, _ = open_sqlite_store(path + ".sqlite", path, workers=workers)
+        triples = len(store)
+    seconds = time.perf_counter() - start
+    return {
+        "triples": triples,
+        "seconds": round(seconds, 2),
+        "triples_per_second": round(triples / seconds),
+        "rss_mb": round(_rss_mb() - rss_before, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - rss_before, 1),
+    }
+
+
+def runs(format: str, workers: int) -> List[Tuple[str, str, int]]:
+    """Combinaciones (etiqueta, modo, procesos) a medir para un formato"""
+    result = [("rdflib", "rdflib", 1), ("streaming", "streaming", 1)]
+    if format == "nt" and workers > 1:
+        result.append((f"streaming ({workers} procesos)", "streaming", workers))
+    result.append(("streaming → sqlite", "sqlite", 1))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--triples", type=int, default=200000)
+    parser.add_argument("--formats", default="xml,nt,turtle", help="Formatos separados por comas")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos para N-Triples")
+    parser.add_argument("--worker", nargs=4, metavar=("MODE", "PATH", "FORMAT", "WORKERS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        mode, path, format, workers = args.worker
+        print(json.dumps(measure(mode, path, format, int(workers))))
+        return
+
+    print(f"{'':<34}{'triplas':>10}{'s':>9}{'triplas/s':>12}{'RSS (MB)':>10}{'pico (MB)':>11}")
+    params = scale_for_triples(args.triples)
+    with tempfile.TemporaryDirectory() as tmp:
+        for format in args.formats.split(","):
+            extension, writer = FORMATS[format]
+            path = os.path.join(tmp, "music" + extension)
+            with open(path, "w", encoding="utf-8") as out:
+                WRITERS[writer](iter_triples(realistic=True, schema=True, **params), out)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            for label, mode, workers in runs(format, args.workers):
+                for stale in glob.glob(path + ".sqlite.*"):
+                    os.remove(stale)
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_ingest", "--worker", mode, path, format, str(workers)],
+                    check=True, capture_output=True, text=True
+                ).stdout
+                r = json.loads(output.strip().splitlines()[-1])
+                name = f"{format} ({size_mb:.0f} MB) {label}"
+                print(
+                    f"{name:<34}{r['triples']:>10}{r['seconds']:>9.2f}{r['triples_per_second']:>12}"
+                    f"{r['rss_mb']:>10.1f}{r['peak_rss_mb']:>11.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark - Coste por petición de los listados con y sin proyección materializada
+
+Uso:
+    python -m benchmarks.bench_projection --artists 500
+"""
+
+import argparse
+import time
+
+from rdflib import RDF
+
+from app.projection import EntityProjection
+from benchmarks.synthetic import MUSIC, build_graph
+
+ENTITY_CLASSES = {
+    "artist": MUSIC.Artist,
+    "album": MUSIC.Album,
+    "song": MUSIC.Song,
+    "instrument": MUSIC.Instrument,
+    "genre": MUSIC.Genre,
+}
+
+
+def _timeit(func, repeat: int) -> float:
+    """Mejor tiempo (en ms) de varias ejecuciones"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--artists", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    graph = build_graph(artists=args.artists)
+    projection = EntityProjection(graph, MUSIC)
+
+    build_ms = _timeit(lambda: projection.build(ENTITY_CLASSES), 1)
+    print(f"Grafo: {len(graph)} triplas | construcción de la proyección: {build_ms:.1f} ms")
+    print(f"{'tipo':<12}{'entidades':>10}{'grafo (ms)':>14}{'proyección (ms)':>18}{'mejora':>10}")
+
+    for entity_type, rdf_class in ENTITY_CLASSES.items():
+        def from_graph():
+            # Ruta anterior: lecturas graph.value por entidad en cada petición
+            return [
+                {"type": entity_type, "data": projection.build_record(uri, entity_type).to_dict()}
+                for uri in graph.subjects(RDF.type, rdf_class)
+            ]
+
+        def from_projection():
+            return [
+                {"type": entity_type, "data": record.to_dict()}
+                for record in projection.iter_records(entity_type)
+            ]
+
+        graph_ms = _timeit(from_graph, args.repeat)
+        projection_ms = _timeit(from_projection, args.repeat)
+        print(
+            f"{entity_type:<12}{projection.count(entity_type):>10}"
+            f"{graph_ms:>14.2f}{projection_ms:>18.2f}{graph_ms / projection_ms:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
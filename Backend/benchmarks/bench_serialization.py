@@ -0,0 +1,80 @@
+"""
+Benchmark - Throughput de los listados con serialización genérica vs. fragmentos precodificados
+
+Uso:
+    python -m benchmarks.bench_serialization --artists 300
+"""
+
+import argparse
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.encoding import fragment_response, item_fragment, orjson
+from app.models import ApiResponse
+from app.projection import EntityProjection
+from benchmarks.synthetic import MUSIC, build_graph
+from benchmarks.bench_projection import ENTITY_CLASSES
+
+
+def build_app(projection: EntityProjection) -> FastAPI:
+    """Aplicación mínima con la ruta anterior y la ruta rápida sobre la misma proyección"""
+    app = FastAPI()
+
+    @app.get("/before/{entity_type}")
+    def before(entity_type: str) -> ApiResponse:
+        # Ruta anterior: diccionarios validados por Pydantic y codificados por FastAPI
+        items = [
+            {"type": entity_type, "data": record.to_dict()}
+            for record in projection.iter_records(entity_type)
+        ]
+        return ApiResponse(success=True, data=items, message=f"Se encontraron {len(items)}")
+
+    @app.get("/after/{entity_type}")
+    def after(entity_type: str) -> ApiResponse:
+        fragments = [
+            item_fragment(entity_type, record.to_json())
+            for record in projection.iter_records(entity_type)
+        ]
+        return fragment_response(fragments, f"Se encontraron {len(fragments)}")
+
+    return app
+
+
+def _throughput(client: TestClient, url: str, seconds: float) -> float:
+    """Peticiones por segundo durante `seconds` segundos"""
+    client.get(url)
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        client.get(url)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--artists", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    graph = build_graph(artists=args.artists)
+    projection = EntityProjection(graph, MUSIC)
+    projection.build(ENTITY_CLASSES)
+    client = TestClient(build_app(projection))
+
+    print(f"Grafo: {len(graph)} triplas | codificador: {'orjson' if orjson else 'json'}")
+    print(f"{'tipo':<12}{'entidades':>10}{'antes (req/s)':>16}{'después (req/s)':>18}{'mejora':>10}")
+    for entity_type in ENTITY_CLASSES:
+        assert client.get(f"/before/{entity_type}").json() == client.get(f"/after/{entity_type}").json()
+        before = _throughput(client, f"/before/{entity_type}", args.seconds)
+        after = _throughput(client, f"/after/{entity_type}", args.seconds)
+        print(
+            f"{entity_type:<12}{projection.count(entity_type):>10}"
+            f"{before:>16.1f}{after:>18.1f}{after / before:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
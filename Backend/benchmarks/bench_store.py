@@ -0,0 +1,123 @@
+"""
+Benchmark - Carga, memoria y latencia por consulta con el backend en memoria vs. SQLite
+
+Cada backend se mide en un proceso aparte para que la memoria de uno no
+contamine la del otro. "sqlite (fría)" parte de una base de datos vacía
+(parsea el OWL y lo carga); "sqlite (caliente)" reabre la ya cargada, que es
+el caso de un reinicio.
+
+Uso:
+    python -m benchmarks.bench_store --artists 300
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.synthetic import build_graph
+
+# Backend del proceso hijo -> etiqueta en la tabla
+RUNS = (
+    ("memory", "memoria"),
+    ("sqlite", "sqlite (fría)"),
+    ("sqlite", "sqlite (caliente)"),
+)
+
+
+def _rss_mb() -> float:
+    """Memoria residente actual del proceso (MB)"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _median_ms(func: Callable[[int], Any], repeat: int) -> float:
+    """Mediana (en ms) de varias ejecuciones; `func` recibe el número de ejecución"""
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def measure(backend: str, owl_path: str, db_path: str, repeat: int) -> Dict[str, Any]:
+    """Cargar el servicio con un backend y medir sus consultas (en el proceso actual)"""
+    from app.ontology import OntologyService
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    service = OntologyService(owl_path, store_backend=backend, sqlite_path=db_path)
+    load_s = time.perf_counter() - start
+    rss_after = _rss_mb()
+
+    query = "SELECT ?s WHERE {{ ?s music:usesInstrument music:instr-{} }}"
+    endpoints = {
+        "/songs": lambda i: service.get_all_songs(),
+        "/search": lambda i: service.search("Canción 1-"),
+        "/entity": lambda i: service.get_entity(f"song-{i}-0-0"),
+        "/artists/{id}/songs": lambda i: service.get_songs_by_artist(f"artist-{i}"),
+        "/recommend": lambda i: service.recommend("song", f"song-{i}-1-0"),
+        "/stats": lambda i: service.get_ontology_stats(),
+        # Texto distinto en cada ejecución: sin caché de consultas ni de resultados
+        "/sparql": lambda i: service.sparql(query.format(i % 20) + f" # {i}", 10000, 60),
+    }
+    return {
+        "load_s": round(load_s, 3),
+        "rss_mb": round(rss_after - rss_before, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "latency_ms": {name: round(_median_ms(func, repeat), 3) for name, func in endpoints.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--artists", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--worker", nargs=3, metavar=("BACKEND", "OWL", "DB"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        backend, owl_path, db_path = args.worker
+        print(json.dumps(measure(backend, owl_path, db_path, args.repeat)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        owl_path = os.path.join(tmp, "music.owl")
+        db_path = os.path.join(tmp, "music.sqlite")
+        graph = build_graph(artists=args.artists)
+        graph.serialize(owl_path, format="xml")
+        print(f"Grafo: {len(graph)} triplas")
+        del graph
+
+        results: List[Dict[str, Any]] = []
+        for backend, label in RUNS:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_store", "--repeat", str(args.repeat),
+                 "--worker", backend, owl_path, db_path],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        db_mb = os.path.getsize(db_path + ".1") / (1024 * 1024)
+
+    labels = [label for _, label in RUNS]
+    print(f"Base de datos SQLite: {db_mb:.1f} MB")
+    print(f"{'':<22}" + "".join(f"{label:>20}" for label in labels))
+    print(f"{'carga (s)':<22}" + "".join(f"{r['load_s']:>20.2f}" for r in results))
+    print(f"{'RSS tras carga (MB)':<22}" + "".join(f"{r['rss_mb']:>20.1f}" for r in results))
+    print(f"{'RSS pico (MB)':<22}" + "".join(f"{r['peak_rss_mb']:>20.1f}" for r in results))
+    for name in results[0]["latency_ms"]:
+        print(f"{name + ' (ms)':<22}" + "".join(f"{r['latency_ms'][name]:>20.2f}" for r in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark - Arranque y memoria por worker con el backend en memoria vs. compartido
+
+Arranca N procesos a la vez con el mismo snapshot, como los workers de
+uvicorn, y mide en cada uno el tiempo hasta tener el servicio listo y su
+memoria según /proc/self/smaps_rollup una vez cargados todos: la privada
+(anónima: objetos de Python y arrays propios) y la PSS (la residente, con las
+páginas compartidas repartidas entre los procesos que las mapean).
+"compartido (frío)" parte sin el archivo de índices derivados, así que uno
+de los workers lo escribe mientras los demás esperan al lock.
+
+Uso:
+    python -m benchmarks.bench_workers --artists 300 --workers 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.synthetic import build_graph
+
+# Backend de los procesos hijos, si se borran antes los índices derivados, etiqueta
+RUNS = (
+    ("memory", False, "memoria"),
+    ("shared", True, "compartido (frío)"),
+    ("shared", False, "compartido (caliente)"),
+)
+
+
+def _smaps_mb() -> Dict[str, float]:
+    """Memoria anónima, PSS y RSS del proceso actual (MB)"""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Anonymous", "Pss", "Rss"):
+                values[key] = int(rest.split()[0]) / 1024
+    return values
+
+
+def worker(backend: str, owl_path: str, snapshot_path: str):
+    """Cargar el servicio, avisar al padre y medir la memoria cuando lo pida"""
+    start = time.perf_counter()
+    from app.ontology import OntologyService
+
+    OntologyService(owl_path, snapshot_path=snapshot_path, store_backend=backend)
+    startup_s = time.perf_counter() - start
+    print("ready", flush=True)
+    sys.stdin.readline()
+    memory = _smaps_mb()
+    print(json.dumps({
+        "startup_s": round(startup_s, 2),
+        "private_mb": round(memory["Anonymous"], 1),
+        "pss_mb": round(memory["Pss"], 1),
+        "rss_mb": round(memory["Rss"], 1),
+    }), flush=True)
+
+
+def run(backend: str, owl_path: str, snapshot_path: str, workers: int) -> List[Dict[str, Any]]:
+    """Arrancar los workers a la vez y medirlos cuando todos están listos"""
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_workers", "--worker", backend, owl_path, snapshot_path],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        while process.stdout.readline().strip() != "ready":
+            pass
+    results = []
+    for process in processes:
+        process.stdin.write("\n")
+        process.stdin.flush()
+        results.append(json.loads(process.stdout.readline()))
+    for process in processes:
+        process.stdin.close()
+        process.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--artists", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--worker", nargs=3, metavar=("BACKEND", "OWL", "SNAPSHOT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        owl_path = os.path.join(tmp, "music.nt")
+        snapshot_path = owl_path + ".snapshot"
+        graph = build_graph(artists=args.artists, realistic=True)
+        graph.serialize(owl_path, format="nt")
+        print(f"Grafo: {len(graph)} triplas, {args.workers} workers")
+        del graph
+        # Snapshot escrito de antemano: todos los casos arrancan desde él
+        run("memory", owl_path, snapshot_path, 1)
+
+        results = []
+        for backend, cold, label in RUNS:
+            if cold and os.path.exists(snapshot_path + ".idx"):
+                os.remove(snapshot_path + ".idx")
+            results.append((label, run(backend, owl_path, snapshot_path, args.workers)))
+
+    print(f"{'':<24}{'arranque (s)':>14}{'privada (MB)':>14}{'PSS (MB)':>10}{'PSS total (MB)':>16}")
+    for label, measures in results:
+        count = len(measures)
+        print(
+            f"{label:<24}"
+            f"{max(m['startup_s'] for m in measures):>14.1f}"
+            f"{sum(m['private_mb'] for m in measures) / count:>14.0f}"
+            f"{sum(m['pss_mb'] for m in measures) / count:>10.0f}"
+            f"{sum(m['pss_mb'] for m in measures):>16.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Benchmark - Carga, memoria y latencia p50/p99 de cada método del servicio y cada ruta /api
+
+Genera (o recibe) una ontología, la carga con la aplicación completa en el
+proceso actual y mide cada método público de `OntologyService` y cada ruta
+de /api a través de un TestClient. Los resultados se guardan en JSON para
+comparar commits:
+
+    python -m benchmarks.run_benchmarks --triples 100000 --output bench-a.json
+    git checkout otra-rama
+    python -m benchmarks.run_benchmarks --triples 100000 --output bench-b.json --baseline bench-a.json
+"""
+
+import argparse
+import inspect
+import itertools
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.synthetic import iter_triples, scale_for_triples, write_rdfxml
+
+# Variación de p50 (en tanto por uno) a partir de la cual se marca un cambio frente a la línea base
+REGRESSION_THRESHOLD = 0.2
+
+
+def _rss_mb() -> float:
+    """Memoria residente actual del proceso (MB)"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Percentil `q` (0-1) por el método del rango más cercano"""
+    index = max(0, math.ceil(q * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def timed(func: Callable[[int], Any], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """
+    Latencias de `func` (recibe el número de ejecución)
+
+    Returns:
+        p50, p99 y media en milisegundos
+    """
+    for i in range(warmup):
+        func(i)
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(_percentile(timings, 0.5), 3),
+        "p99_ms": round(_percentile(timings, 0.99), 3),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "n": repeat,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Samples:
+    """Identificadores y términos reales del grafo cargado, rotados entre ejecuciones"""
+
+    def __init__(self, service, size: int = 50):
+        from app.ontology import local_name
+
+        self.ids: Dict[str, List[str]] = {}
+        self.names: Dict[str, List[str]] = {}
+        for entity_type in ("artist", "album", "song", "instrument", "genre"):
+            items = list(itertools.islice(service.iter_entities(entity_type), size))
+            self.ids[entity_type] = [local_name(item["data"]["uri"]) for item in items] or ["missing"]
+            self.names[entity_type] = [item["data"].get("name") or "a" for item in items] or ["a"]
+        self.instrument_types = sorted({
+            str(value) for value in itertools.islice(service.graph.objects(None, service.MUSIC.type), 1000)
+        }) or ["Cuerda"]
+
+    def id(self, entity_type: str, i: int) -> str:
+        values = self.ids[entity_type]
+        return values[i % len(values)]
+
+    def word(self, i: int) -> str:
+        """Palabra de un nombre de canción (consulta de búsqueda)"""
+        names = self.names["song"]
+        words = names[i % len(names)].split()
+        return words[i % len(words)]
+
+    def prefix(self, i: int) -> str:
+        return self.word(i)[:3]
+
+    def instrument_type(self, i: int) -> str:
+        return self.instrument_types[i % len(self.instrument_types)]
+
+    def sparql(self, i: int) -> str:
+        return (
+            "SELECT ?song ?name WHERE { ?song music:usesInstrument music:%s ; music:name ?name } LIMIT 100"
+            % self.id("instrument", i)
+        )
+
+
+def method_benchmarks(service, samples: Samples) -> Dict[str, Callable[[int], Any]]:
+    """Llamada representativa de cada método público de `OntologyService`"""
+    s = samples
+    artist_uri = service.MUSIC[s.id("artist", 0)]
+    description = service.MUSIC.description
+
+    def delta(i: int):
+        # Alterna añadir y quitar una descripción extra: el grafo vuelve a su estado
+        from rdflib import Literal
+        triple = (artist_uri, description, Literal("benchmark"))
+        if i % 2 == 0:
+            return service.apply_delta([triple], [])
+        return service.apply_delta([], [triple])
+
+    return {
+        "search": lambda i: service.search(s.word(i)),
+        "search_page": lambda i: service.search_page(s.word(i), limit=50),
+        "search_fragments": lambda i: service.search_fragments(s.word(i), limit=50),
+        "ranked_search": lambda i: service.ranked_search(s.word(i)),
+        "suggest": lambda i: service.suggest(s.prefix(i)),
+        "get_entity": lambda i: service.get_entity(s.id("song", i)),
+        "list_entities": lambda i: service.list_entities("song", limit=100),
+        "list_fragments": lambda i: service.list_fragments("song", limit=100),
+        "iter_entities": lambda i: sum(1 for _ in service.iter_entities("album")),
+        "iter_entity_json": lambda i: sum(1 for _ in service.iter_entity_json("album")),
+        "iter_all_artists": lambda i: sum(1 for _ in service.iter_all_artists()),
+        "iter_all_albums": lambda i: sum(1 for _ in service.iter_all_albums()),
+        "iter_all_songs": lambda i: sum(1 for _ in service.iter_all_songs()),
+        "iter_all_instruments": lambda i: sum(1 for _ in service.iter_all_instruments()),
+        "iter_all_genres": lambda i: sum(1 for _ in service.iter_all_genres()),
+        "get_all_artists": lambda i: service.get_all_artists(),
+        "get_all_albums": lambda i: service.get_all_albums(),
+        "get_all_songs": lambda i: service.get_all_songs(),
+        "get_all_instruments": lambda i: service.get_all_instruments(),
+        "get_all_genres": lambda i: service.get_all_genres(),
+        "get_albums_by_artist": lambda i: service.get_albums_by_artist(s.id("artist", i)),
+        "get_songs_by_album": lambda i: service.get_songs_by_album(s.id("album", i)),
+        "get_songs_by_artist": lambda i: service.get_songs_by_artist(s.id("artist", i)),
+        "get_songs_by_instrument": lambda i: service.get_songs_by_instrument(s.id("instrument", i)),
+        "get_genres_by_artist": lambda i: service.get_genres_by_artist(s.id("artist", i)),
+        "get_instruments_by_type": lambda i: service.get_instruments_by_type(s.instrument_type(i)),
+        "recommend": lambda i: service.recommend("song", s.id("song", i)),
+        "traverse": lambda i: service.traverse(s.id("artist", i), "hasAlbum/containsSong"),
+        "sparql": lambda i: service.sparql(s.sparql(i), 1000, 30),
+        "batch_lookup": lambda i: service.batch_lookup(
+            entities=[(s.id("artist", i), None), (s.id("song", i), "song")],
+            relations=[("albums_by_artist", s.id("artist", i)), ("genres_by_artist", s.id("artist", i))]
+        ),
+        "get_ontology_stats": lambda i: service.get_ontology_stats(),
+        "apply_delta": delta,
+    }
+
+
+def route_request(path: str, method: str, samples: Samples, i: int) -> Dict[str, Any]:
+    """Argumentos de `TestClient.request` para una ruta con parámetros de muestra"""
+    s = samples
+    path_params = {
+        "artist_id": s.id("artist", i),
+        "album_id": s.id("album", i),
+        "song_id": s.id("song", i),
+        "instrument_id": s.id("instrument", i),
+        "instrument_type": s.instrument_type(i),
+        "entity_type": "song",
+        "entity_id": s.id("song", i),
+    }
+    if path == "/api/traverse/{entity_id}":
+        path_params["entity_id"] = s.id("artist", i)
+    url = path.format(**{name: value for name, value in path_params.items() if "{" + name + "}" in path})
+
+    params: Dict[str, Any] = {}
+    body: Optional[Dict[str, Any]] = None
+    if path in ("/api/search", "/api/search/ranked"):
+        params["q"] = s.word(i)
+    elif path == "/api/suggest":
+        params["prefix"] = s.prefix(i)
+    elif path == "/api/traverse/{entity_id}":
+        params["path"] = "hasAlbum/containsSong"
+    elif path == "/api/sparql":
+        if method == "GET":
+            params["query"] = s.sparql(i)
+        else:
+            body = {"query": s.sparql(i)}
+    elif path == "/api/batch":
+        body = {
+            "entities": [{"id": s.id("artist", i)}, {"id": s.id("song", i), "type": "song"}],
+            "relations": [{"relation": "albums_by_artist", "id": s.id("artist", i)}],
+        }
+    return {"method": method, "url": url, "params": params, "json": body}
+
+
+def route_benchmarks(application):
+    """(nombre, ruta, método) de cada ruta GET/POST de /api salvo /api/admin"""
+    from fastapi.routing import APIRoute
+
+    for route in application.routes:
+        if not isinstance(route, APIRoute) or not route.path.startswith("/api") or route.path.startswith("/api/admin"):
+            continue
+        for method in sorted(route.methods & {"GET", "POST"}):
+            yield f"{method} {route.path}", route.path, method
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]):
+    """Mostrar las variaciones de p50 frente a una ejecución anterior"""
+    print(f"\nComparación con {baseline['meta'].get('commit') or 'línea base'} (p50):")
+    changes = 0
+    for section in ("methods", "routes"):
+        for name, current in results[section].items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous or not previous["p50_ms"]:
+                continue
+            ratio = current["p50_ms"] / previous["p50_ms"] - 1
+            if abs(ratio) >= REGRESSION_THRESHOLD:
+                changes += 1
+                mark = "⚠" if ratio > 0 else "✓"
+                print(f"  {mark} {name}: {previous['p50_ms']:.3f} -> {current['p50_ms']:.3f} ms ({ratio:+.0%})")
+    if not changes:
+        print(f"  Sin variaciones de más del {REGRESSION_THRESHOLD:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--triples", type=int, default=100000, help="Tamaño de la ontología sintética")
+    parser.add_argument("--owl", help="Usar este OWL en lugar de generar uno")
+    parser.add_argument("--store", choices=("memory", "shared", "sqlite"), default="memory")
+    parser.add_argument("--repeat", type=int, default=50, help="Ejecuciones medidas por método y ruta")
+    parser.add_argument("--response-cache", action="store_true", help="Medir con la caché de respuestas activa")
+    parser.add_argument("--output", help="Archivo JSON de resultados")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior con el que comparar")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        owl_path = args.owl
+        if owl_path is None:
+            owl_path = os.path.join(tmp, "music.owl")
+            start = time.perf_counter()
+            with open(owl_path, "w", encoding="utf-8") as out:
+                count = write_rdfxml(iter_triples(realistic=True, schema=True, **scale_for_triples(args.triples)), out)
+            print(f"✓ Ontología sintética: {count} triplas ({time.perf_counter() - start:.1f} s)")
+
+        # La configuración se lee al importar la aplicación
+        os.environ.update({
+            "ONTOLOGY_PATH": owl_path,
+            "ONTOLOGY_SNAPSHOT": "false",
+            "ONTOLOGY_SNAPSHOT_PATH": os.path.join(tmp, "music.snapshot"),
+            "ONTOLOGY_SQLITE_PATH": os.path.join(tmp, "music.sqlite"),
+            "ONTOLOGY_STORE": args.store,
+            "ONTOLOGY_WATCH_INTERVAL": "0",
+            "RESPONSE_CACHE": "true" if args.response_cache else "false",
+        })
+        from fastapi.testclient import TestClient
+
+        rss_before = _rss_mb()
+        from app import app as application
+        from app.routes import get_service, ontology_manager
+        rss_after = _rss_mb()
+        service = get_service()
+        samples = Samples(service)
+
+        results: Dict[str, Any] = {
+            "meta": {
+                "commit": _git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "store": args.store,
+                "owl": args.owl,
+                "triples_requested": None if args.owl else args.triples,
+                "repeat": args.repeat,
+                "response_cache": args.response_cache,
+            },
+            "load": {
+                "triples": len(service.graph),
+                "load_ms": ontology_manager.last_reload["duration_ms"],
+                "rss_mb": round(rss_after - rss_before, 1),
+            },
+            "methods": {},
+            "routes": {},
+        }
+
+        public = {name for name in dir(service) if not name.startswith("_") and inspect.ismethod(getattr(service, name))}
+        benchmarks = method_benchmarks(service, samples)
+        for name in sorted(public - set(benchmarks)):
+            print(f"⚠ Método sin benchmark: {name}")
+        for name, func in benchmarks.items():
+            results["methods"][name] = timed(func, args.repeat)
+
+        with TestClient(application) as client:
+            for name, path, method in route_benchmarks(application):
+                statuses = set()
+
+                def call(i: int):
+                    response = client.request(**route_request(path, method, samples, i))
+                    statuses.add(response.status_code)
+
+                results["routes"][name] = {**timed(call, args.repeat), "status": sorted(statuses)}
+        results["load"]["rss_end_mb"] = round(_rss_mb() - rss_before, 1)
+
+    print(
+        f"Triplas: {results['load']['triples']} | carga: {results['load']['load_ms'] / 1000:.2f} s | "
+        f"RSS: {results['load']['rss_mb']} MB"
+    )
+    print(f"{'':<42}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for section in ("methods", "routes"):
+        for name, stats in results[section].items():
+            status = stats.get("status")
+            flag = f"  estados {status}" if status and any(code >= 400 for code in status) else ""
+            print(f"{name:<42}{stats['p50_ms']:>12.3f}{stats['p99_ms']:>12.3f}{flag}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"✓ Resultados guardados en {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
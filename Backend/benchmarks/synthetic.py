@@ -0,0 +1,318 @@
+"""
+Generador sintético - Ontologías con el vocabulario music: a distintas escalas
+
+Uso (escribe un OWL que el servicio puede cargar con ONTOLOGY_PATH):
+    python -m benchmarks.synthetic --triples 1000000 --output data/synthetic-1m.owl
+    python -m benchmarks.synthetic --triples 10000000 --format nt --output /tmp/music-10m.nt
+    python -m benchmarks.synthetic --triples 1000000 --format ttl --output /tmp/music-1m.ttl
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+from typing import Iterator, List, Optional, TextIO, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from rdflib import Graph, Literal, Namespace, OWL, RDF, RDFS, URIRef, XSD
+from rdflib.namespace import NamespaceManager
+
+MUSIC = Namespace("http://example.org/music-ontology#")
+
+INSTRUMENT_TYPES = ("Cuerda", "Teclado", "Percusión", "Viento", "Electrónico")
+
+# Triplas por artista con el reparto por defecto (3 álbumes x 10 canciones,
+# ~2.5 instrumentos por canción); sirve para traducir --triples a artistas
+TRIPLES_PER_ARTIST = 275
+
+OBJECT_PROPERTIES = ("hasAlbum", "containsSong", "usesInstrument", "performedBy", "hasGenre", "performsGenre")
+DATATYPE_PROPERTIES = ("name", "description", "duration", "releaseYear", "type")
+CLASSES = ("Artist", "Album", "Song", "Instrument", "Genre")
+
+Triple = Tuple[URIRef, URIRef, object]
+
+
+def _schema() -> Iterator[Triple]:
+    """Declaraciones de la ontología: clases y propiedades"""
+    ontology = URIRef("http://example.org/music-ontology")
+    yield ontology, RDF.type, OWL.Ontology
+    yield ontology, RDFS.label, Literal("Music Ontology (sintética)")
+    for name in CLASSES:
+        yield MUSIC[name], RDF.type, OWL.Class
+    for name in OBJECT_PROPERTIES:
+        yield MUSIC[name], RDF.type, OWL.ObjectProperty
+    for name in DATATYPE_PROPERTIES:
+        yield MUSIC[name], RDF.type, OWL.DatatypeProperty
+
+
+def iter_triples(
+    artists: int = 100,
+    albums_per_artist: int = 3,
+    songs_per_album: int = 10,
+    instruments: int = 20,
+    genres: int = 10,
+    seed: int = 42,
+    realistic: bool = False,
+    schema: bool = False,
+    max_triples: Optional[int] = None
+) -> Iterator[Triple]:
+    """
+    Generar las triplas de una ontología sintética sin materializar el grafo
+
+    Con `realistic` el reparto deja de ser uniforme: el número de álbumes por
+    artista sigue una distribución log-normal (pocos artistas con discografías
+    largas), las canciones por álbum varían alrededor de la media y los
+    instrumentos se eligen con popularidad de tipo Zipf (guitarra y batería
+    aparecen en muchas más canciones que el arpa).
+
+    Args:
+        artists: Número de artistas
+        albums_per_artist: Álbumes por artista (media con `realistic`)
+        songs_per_album: Canciones por álbum (media con `realistic`)
+        instruments: Número de instrumentos
+        genres: Número de géneros
+        seed: Semilla para que el grafo sea reproducible
+        realistic: Usar repartos sesgados en lugar de fijos
+        schema: Incluir las declaraciones de clases y propiedades
+        max_triples: No empezar artistas nuevos al alcanzar este número de
+            triplas (el último artista se completa)
+
+    Returns:
+        Iterador de triplas (s, p, o)
+    """
+    rng = random.Random(seed)
+    if schema:
+        yield from _schema()
+
+    genre_uris = []
+    for g in range(genres):
+        uri = MUSIC[f"genre-{g}"]
+        yield uri, RDF.type, MUSIC.Genre
+        yield uri, MUSIC.name, Literal(f"Género {g}")
+        genre_uris.append(uri)
+
+    instrument_uris = []
+    for i in range(instruments):
+        uri = MUSIC[f"instr-{i}"]
+        yield uri, RDF.type, MUSIC.Instrument
+        yield uri, MUSIC.name, Literal(f"Instrumento {i}")
+        yield uri, MUSIC.type, Literal(INSTRUMENT_TYPES[i % len(INSTRUMENT_TYPES)])
+        instrument_uris.append(uri)
+    popularity = [1 / (rank + 1) for rank in range(len(instrument_uris))]
+
+    # Log-normal con media `albums_per_artist`: exp(mu + sigma^2 / 2) = media
+    sigma = 0.8
+    mu = math.log(max(albums_per_artist, 1)) - sigma ** 2 / 2
+
+    count = 2 * genres + 3 * instruments
+    for a in range(artists):
+        if max_triples is not None and count >= max_triples:
+            return
+        # Las triplas de cada artista (con sus álbumes y canciones) se generan juntas
+        block: List[Triple] = []
+        artist = MUSIC[f"artist-{a}"]
+        block.append((artist, RDF.type, MUSIC.Artist))
+        block.append((artist, MUSIC.name, Literal(f"Artista {a}")))
+        block.append((artist, MUSIC.description, Literal(f"Descripción del artista {a}")))
+        block.append((artist, MUSIC.performsGenre, rng.choice(genre_uris)))
+
+        n_albums = max(1, round(rng.lognormvariate(mu, sigma))) if realistic else albums_per_artist
+        for b in range(n_albums):
+            album = MUSIC[f"album-{a}-{b}"]
+            year = rng.randint(1960, 2024)
+            block.append((album, RDF.type, MUSIC.Album))
+            block.append((album, MUSIC.name, Literal(f"Álbum {a}-{b}")))
+            block.append((album, MUSIC.releaseYear, Literal(year, datatype=XSD.integer)))
+            block.append((album, MUSIC.hasGenre, rng.choice(genre_uris)))
+            block.append((artist, MUSIC.hasAlbum, album))
+
+            if realistic:
+                spread = max(1, songs_per_album // 2)
+                n_songs = max(1, rng.randint(songs_per_album - spread, songs_per_album + spread))
+            else:
+                n_songs = songs_per_album
+            for s in range(n_songs):
+                song = MUSIC[f"song-{a}-{b}-{s}"]
+                block.append((song, RDF.type, MUSIC.Song))
+                block.append((song, MUSIC.name, Literal(f"Canción {a}-{b}-{s}")))
+                block.append((song, MUSIC.duration, Literal(rng.randint(90, 600), datatype=XSD.integer)))
+                block.append((song, MUSIC.releaseYear, Literal(year, datatype=XSD.integer)))
+                block.append((song, MUSIC.performedBy, artist))
+                block.append((album, MUSIC.containsSong, song))
+                k = rng.randint(1, min(4, len(instrument_uris)))
+                if realistic:
+                    chosen = set()
+                    while len(chosen) < k:
+                        chosen.add(rng.choices(instrument_uris, weights=popularity)[0])
+                    song_instruments = sorted(chosen)
+                else:
+                    song_instruments = rng.sample(instrument_uris, k)
+                for instr in song_instruments:
+                    block.append((song, MUSIC.usesInstrument, instr))
+        yield from block
+        count += len(block)
+
+
+def build_graph(
+    artists: int = 100,
+    albums_per_artist: int = 3,
+    songs_per_album: int = 10,
+    instruments: int = 20,
+    genres: int = 10,
+    seed: int = 42,
+    realistic: bool = False
+) -> Graph:
+    """
+    Construir en memoria una ontología sintética
+
+    Args:
+        artists: Número de artistas
+        albums_per_artist: Álbumes por artista
+        songs_per_album: Canciones por álbum
+        instruments: Número de instrumentos
+        genres: Número de géneros
+        seed: Semilla para que el grafo sea reproducible
+        realistic: Usar repartos sesgados (ver `iter_triples`)
+
+    Returns:
+        Grafo RDF con entidades de los cinco tipos
+    """
+    graph = Graph()
+    for triple in iter_triples(artists, albums_per_artist, songs_per_album, instruments, genres, seed, realistic):
+        graph.add(triple)
+    return graph
+
+
+def scale_for_triples(triples: int) -> dict:
+    """
+    Parámetros de `iter_triples` para obtener aproximadamente `triples` triplas
+
+    El número de artistas es una cota holgada: la generación se detiene con
+    `max_triples`, así que el total no depende de la varianza del reparto.
+    Los instrumentos y géneros crecen con el catálogo para que los recorridos
+    inversos (canciones por instrumento) no degeneren en unos pocos nodos.
+    """
+    artists = max(1, round(triples / TRIPLES_PER_ARTIST))
+    return {
+        "artists": 2 * artists + 1,
+        "instruments": max(20, min(500, artists // 50)),
+        "genres": max(10, min(200, artists // 200)),
+        "max_triples": triples,
+    }
+
+
+def _qname(uri: URIRef) -> Optional[str]:
+    """Nombre cualificado de una propiedad (music:, rdf:, rdfs:), None si no tiene prefijo"""
+    for prefix, namespace in (("music", str(MUSIC)), ("rdf", str(RDF)), ("rdfs", str(RDFS))):
+        if str(uri).startswith(namespace):
+            return f"{prefix}:{str(uri)[len(namespace):]}"
+    return None
+
+
+def _xml_property(predicate: URIRef, obj) -> str:
+    qname = _qname(predicate)
+    if isinstance(obj, Literal):
+        attributes = ""
+        if obj.language:
+            attributes = f" xml:lang={quoteattr(obj.language)}"
+        elif obj.datatype:
+            attributes = f" rdf:datatype={quoteattr(str(obj.datatype))}"
+        return f"    <{qname}{attributes}>{escape(str(obj))}</{qname}>\n"
+    return f"    <{qname} rdf:resource={quoteattr(str(obj))}/>\n"
+
+
+def write_rdfxml(triples: Iterator[Triple], out: TextIO) -> int:
+    """
+    Escribir triplas como RDF/XML en streaming
+
+    Las triplas consecutivas del mismo sujeto comparten un rdf:Description;
+    un sujeto puede aparecer en varios (RDF/XML lo permite), así que no hace
+    falta agrupar el grafo en memoria.
+
+    Returns:
+        Número de triplas escritas
+    """
+    out.write(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<rdf:RDF xmlns:rdf="{RDF}" xmlns:rdfs="{RDFS}" xmlns:owl="{OWL}"\n'
+        f'         xmlns:xsd="{XSD}" xmlns:music="{MUSIC}">\n'
+    )
+    count = 0
+    current = None
+    for subject, predicate, obj in triples:
+        if subject != current:
+            if current is not None:
+                out.write("  </rdf:Description>\n")
+            out.write(f"  <rdf:Description rdf:about={quoteattr(str(subject))}>\n")
+            current = subject
+        if predicate == RDF.type:
+            out.write(f"    <rdf:type rdf:resource={quoteattr(str(obj))}/>\n")
+        else:
+            out.write(_xml_property(predicate, obj))
+        count += 1
+    if current is not None:
+        out.write("  </rdf:Description>\n")
+    out.write("</rdf:RDF>\n")
+    return count
+
+
+def write_ntriples(triples: Iterator[Triple], out: TextIO) -> int:
+    """Escribir triplas como N-Triples en streaming (devuelve cuántas)"""
+    count = 0
+    for subject, predicate, obj in triples:
+        out.write(f"{subject.n3()} {predicate.n3()} {obj.n3()} .\n")
+        count += 1
+    return count
+
+
+def write_turtle(triples: Iterator[Triple], out: TextIO) -> int:
+    """Escribir triplas como Turtle en streaming (un bloque por tramo de sujeto; devuelve cuántas)"""
+    namespaces = NamespaceManager(Graph(), bind_namespaces="none")
+    for prefix, namespace in (("music", MUSIC), ("rdf", RDF), ("rdfs", RDFS), ("owl", OWL), ("xsd", XSD)):
+        namespaces.bind(prefix, namespace)
+        out.write(f"@prefix {prefix}: <{namespace}> .\n")
+    out.write("\n")
+    count = 0
+    current = None
+    for subject, predicate, obj in triples:
+        if subject != current:
+            if current is not None:
+                out.write(" .\n")
+            out.write(f"{subject.n3(namespaces)} {predicate.n3(namespaces)} {obj.n3(namespaces)}")
+            current = subject
+        else:
+            out.write(f" ;\n    {predicate.n3(namespaces)} {obj.n3(namespaces)}")
+        count += 1
+    if current is not None:
+        out.write(" .\n")
+    return count
+
+
+WRITERS = {"xml": write_rdfxml, "nt": write_ntriples, "ttl": write_turtle}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--triples", type=int, default=100000, help="Triplas aproximadas (1k - 10M)")
+    parser.add_argument("--output", required=True, help="Archivo de salida")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="xml")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--uniform", action="store_true", help="Reparto fijo en lugar de sesgado")
+    args = parser.parse_args()
+
+    params = scale_for_triples(args.triples)
+    start = time.perf_counter()
+    triples = iter_triples(seed=args.seed, realistic=not args.uniform, schema=True, **params)
+    directory = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as out:
+        count = WRITERS[args.format](triples, out)
+    print(
+        f"✓ {count} triplas ({params['instruments']} instrumentos, {params['genres']} géneros) "
+        f"en {args.output} ({time.perf_counter() - start:.1f} s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ Script para ejecutar el servidor FastAPI directamente
 """
 
 import uvicorn
+import os
 import sys
 import logging
 
@@ -11,12 +12,16 @@ logging.basicConfig(level=logging.INFO)
 
 if __name__ == "__main__":
     try:
-        print("Iniciando servidor FastAPI...")
+        # Con ONTOLOGY_STORE=shared los workers comparten el snapshot mapeado
+        # en memoria: el primero que arranca lo construye y el resto se adjunta
+        workers = int(os.getenv("WORKERS", "1"))
+        print(f"Iniciando servidor FastAPI ({workers} worker(s))...")
         uvicorn.run(
             "app:app",
             host="127.0.0.1",
             port=8000,
             reload=False,
+            workers=workers,
             log_level="info"
         )
     except KeyboardInterrupt:
@@ -0,0 +1,21 @@
+"""
+Configuración común de las pruebas: importar `app` desde el directorio del backend
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def client():
+    """Cliente HTTP sobre un servicio recién cargado (los deltas no pasan de una prueba a otra)"""
+    from fastapi.testclient import TestClient
+    from app import app
+    from app.routes import ontology_manager
+
+    ontology_manager.reload("test")
+    return TestClient(app)
@@ -0,0 +1,180 @@
+"""
+Pruebas de /api/admin/delta: los índices, registros y recuentos siguen al grafo
+"""
+
+from app import config
+from app.routes import ontology_manager
+
+MO = "http://example.org/music-ontology#"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+XSD_INTEGER = "http://www.w3.org/2001/XMLSchema#integer"
+
+
+def post_delta(client, add=(), remove=()):
+    headers = {"X-Admin-Token": config.ADMIN_TOKEN} if config.ADMIN_TOKEN else {}
+    return client.post("/api/admin/delta", json={"add": list(add), "remove": list(remove)}, headers=headers)
+
+
+def expand(name):
+    return name if name.startswith("http") else MO + name
+
+
+def triple(s, p, o, o_type="uri", **extra):
+    return {"s": expand(s), "p": expand(p), "o": expand(o) if o_type == "uri" else o, "o_type": o_type, **extra}
+
+
+def data(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    return response.json()["data"]
+
+
+def search_uris(client, query):
+    return {item["data"]["uri"] for item in data(client, f"/api/search?q={query}")}
+
+
+def test_rename_updates_search_suggest_detail_and_dependents(client):
+    response = post_delta(
+        client,
+        add=[triple("artist-john-lennon", "name", "Juan Lennon", "literal")],
+        remove=[triple("artist-john-lennon", "name", "John Lennon", "literal")],
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["added"] == 1
+
+    assert MO + "artist-john-lennon" in search_uris(client, "Juan Lennon")
+    assert MO + "artist-john-lennon" not in search_uris(client, "John Lennon")
+    assert [item["name"] for item in data(client, "/api/suggest?prefix=Juan")] == ["Juan Lennon"]
+    assert not data(client, "/api/suggest?prefix=John Len")
+    assert data(client, "/api/artists/artist-john-lennon")["name"] == "Juan Lennon"
+    # La canción desnormaliza el nombre de su artista
+    assert data(client, "/api/songs/song-come-together")["artist"] == "Juan Lennon"
+    stats = data(client, "/api/stats")
+    assert stats["total_triples"] == 336
+    assert stats["predicates"]["music:name"] == 53
+
+
+def test_link_removal_updates_detail_adjacency_and_stats(client):
+    response = post_delta(client, remove=[triple("song-come-together", "usesInstrument", "instr-bass")])
+    assert response.status_code == 200, response.text
+    assert response.json()["data"]["removed"] == 1
+
+    song = data(client, "/api/songs/song-come-together")
+    assert [instrument["uri"] for instrument in song["instruments"]] == [MO + "instr-guitar"]
+    reached = {item["data"]["uri"] for item in data(client, "/api/traverse/song-come-together?path=usesInstrument")}
+    assert reached == {MO + "instr-guitar"}
+    bass_songs = {item["data"]["uri"] for item in data(client, "/api/songs/instrument/instr-bass")}
+    assert MO + "song-come-together" not in bass_songs
+    stats = data(client, "/api/stats")
+    assert stats["total_triples"] == 335
+    assert stats["predicates"]["music:usesInstrument"] == 27
+
+
+def assert_unchanged(client, version):
+    assert ontology_manager.service.version == version
+    assert len(ontology_manager.service.graph) == 336
+    song = data(client, "/api/songs/song-come-together")
+    assert song["duration"] == 259
+    assert song["artist"] == "John Lennon"
+    assert "releaseYear" not in song
+    assert [item["name"] for item in data(client, "/api/suggest?prefix=Come")] == ["Come Together"]
+    assert MO + "song-come-together" in search_uris(client, "Come Together")
+    assert len(data(client, "/api/traverse/song-come-together?path=usesInstrument")) == 2
+    assert data(client, "/api/stats")["total_triples"] == 336
+
+
+def test_malformed_literal_is_rejected_without_changes(client):
+    version = ontology_manager.service.version
+    # El resto del lote es válido: no debe aplicarse ninguna tripla
+    response = post_delta(
+        client,
+        add=[
+            triple("song-come-together", "name", "Otro nombre", "literal"),
+            triple("song-come-together", "releaseYear", "mil novecientos", "literal", datatype=XSD_INTEGER),
+        ],
+        remove=[
+            triple("song-come-together", "name", "Come Together", "literal"),
+            triple("song-come-together", "performedBy", "artist-john-lennon"),
+        ],
+    )
+    assert response.status_code == 400
+    assert "releaseYear" in response.json()["detail"]
+    assert_unchanged(client, version)
+
+    response = post_delta(
+        client, add=[triple("song-come-together", "description", "Tema", "literal", lang="es", datatype=XSD_INTEGER)]
+    )
+    assert response.status_code == 400
+    assert_unchanged(client, version)
+
+
+def test_failed_reindex_rolls_back_the_delta(client, monkeypatch):
+    service = ontology_manager.service
+    version = service.version
+    refresh_entity = service._refresh_entity
+    calls = []
+
+    def failing_refresh(uri):
+        # Falla tras aplicar las triplas y reindexar una parte de las entidades
+        calls.append(uri)
+        if len(calls) == 2:
+            raise RuntimeError("fallo simulado")
+        refresh_entity(uri)
+
+    monkeypatch.setattr(service, "_refresh_entity", failing_refresh)
+    response = post_delta(
+        client,
+        add=[triple("artist-john-lennon", "name", "Juan Lennon", "literal")],
+        remove=[
+            triple("artist-john-lennon", "name", "John Lennon", "literal"),
+            triple("song-come-together", "usesInstrument", "instr-bass"),
+        ],
+    )
+    assert response.status_code == 500
+    monkeypatch.setattr(service, "_refresh_entity", refresh_entity)
+    assert_unchanged(client, version)
+    assert data(client, "/api/artists/artist-john-lennon")["name"] == "John Lennon"
+    assert [item["name"] for item in data(client, "/api/suggest?prefix=John Len")] == ["John Lennon"]
+
+
+def genre_songs(client):
+    return {row["genre"]: row["songs"] for row in data(client, "/api/analytics/songs?by=genre")}
+
+
+def test_facets_and_analytics_follow_genre_change_and_new_song(client):
+    # La tabla de analítica ya existe: el delta la actualiza en lugar de reconstruirla
+    assert genre_songs(client)["genre-rock"] == 6
+    response = post_delta(
+        client,
+        add=[
+            triple("album-abbey-road", "hasGenre", "genre-jazz"),
+            triple("song-a-new", RDF_TYPE, "Song"),
+            triple("song-a-new", "name", "A New Song", "literal"),
+            triple("album-abbey-road", "containsSong", "song-a-new"),
+        ],
+        remove=[triple("album-abbey-road", "hasGenre", "genre-rock")],
+    )
+    assert response.status_code == 200, response.text
+
+    uris, cursor = [], None
+    while True:
+        params = {"genre": "genre-jazz", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/songs", params=params).json()
+        uris += [item["data"]["uri"] for item in body["data"]]
+        cursor = body["pagination"]["next_cursor"]
+        if not cursor:
+            break
+    # La canción nueva se intercala en orden de URI
+    assert uris == [MO + name for name in (
+        "song-a-new", "song-blue-in-green", "song-come-together", "song-so-what", "song-something", "song-the-end",
+    )]
+
+    facets = client.get("/api/songs", params={"genre": "genre-jazz", "facets": "true"}).json()["facets"]
+    assert facets["genre"] == [{"value": "genre-jazz", "uri": MO + "genre-jazz", "name": "Jazz", "count": 6}]
+    # La canción nueva hereda el año del álbum
+    assert {"min": 1960, "max": 1969, "count": 4} in facets["year"]
+    rock = data(client, "/api/songs?genre=genre-rock")
+    assert {item["data"]["uri"] for item in rock} == {MO + "song-changes", MO + "song-money", MO + "song-time"}
+    assert genre_songs(client) == {"genre-rock": 3, "genre-pop": 4, "genre-jazz": 6, "genre-blues": 1, "genre-folk": 1}
+    decades = data(client, "/api/analytics/songs?by=decade&by=genre")
+    assert {"decade": 1960, "genre": "genre-jazz", "genre_name": "Jazz", "songs": 4} in decades
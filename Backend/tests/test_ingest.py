@@ -0,0 +1,149 @@
+"""
+Pruebas de paridad de la ingesta en streaming con `Graph.parse` de rdflib
+"""
+
+import os
+
+import pytest
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+from app import ingest as ingest_module
+from app.ingest import ingest
+
+BUNDLED_OWL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "music-ontology.owl")
+
+# Bloques diminutos (cortan tokens, etiquetas y caracteres multibyte) y el valor por defecto
+CHUNK_SIZES = (7, 64, ingest_module.CHUNK_SIZE)
+
+RDFXML_FEATURES = """<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE rdf:RDF [<!ENTITY xsd "http://www.w3.org/2001/XMLSchema#">]>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:ex="http://example.org/ns#"
+         xml:base="http://example.org/base/">
+  <ex:Album rdf:about="album-1" ex:title="Título con acentos" xml:lang="es">
+    <ex:year rdf:datatype="&xsd;integer">1969</ex:year>
+    <ex:label xml:lang="en-GB">Label</ex:label>
+    <ex:plain>sin idioma</ex:plain>
+    <ex:tracks>
+      <rdf:Bag>
+        <rdf:li rdf:resource="#song-1"/>
+        <rdf:li rdf:resource="#song-2"/>
+        <rdf:li>texto</rdf:li>
+      </rdf:Bag>
+    </ex:tracks>
+    <ex:producer rdf:parseType="Resource">
+      <ex:name>Productor</ex:name>
+      <ex:studio rdf:nodeID="studio"/>
+    </ex:producer>
+    <ex:order rdf:parseType="Collection">
+      <rdf:Description rdf:about="#song-2"/>
+      <rdf:Description rdf:about="#song-1"/>
+    </ex:order>
+    <ex:notes rdf:parseType="Literal"><b xmlns="http://www.w3.org/1999/xhtml">negrita</b> y <i>cursiva</i></ex:notes>
+    <ex:genre rdf:ID="stmt-1" rdf:resource="http://example.org/genre/rock"/>
+    <ex:empty/>
+  </ex:Album>
+  <rdf:Description rdf:nodeID="studio" ex:city="Londres">
+    <rdf:type rdf:resource="http://example.org/ns#Studio"/>
+  </rdf:Description>
+  <rdf:Description rdf:ID="song-1">
+    <ex:duration rdf:datatype="http://www.w3.org/2001/XMLSchema#int">259</ex:duration>
+    <ex:next><ex:Song rdf:about="#song-2" ex:name="Something"/></ex:next>
+    <ex:artist><rdf:Description ex:name="Anónimo"/></ex:artist>
+  </rdf:Description>
+  <rdf:Seq rdf:about="http://example.org/seq">
+    <rdf:_1>uno</rdf:_1>
+    <rdf:li>dos</rdf:li>
+  </rdf:Seq>
+</rdf:RDF>
+"""
+
+NTRIPLES = r"""# Comentario
+<http://example.org/s1> <http://example.org/p> <http://example.org/o1> .
+<http://example.org/s1> <http://example.org/p> "simple" .
+<http://example.org/s1> <http://example.org/p> "con idioma"@es-ES .
+<http://example.org/s1> <http://example.org/p> "42"^^<http://www.w3.org/2001/XMLSchema#integer> .
+<http://example.org/s1> <http://example.org/p> "escapes \"comillas\" \\ \n \t é \U0001F3B5" .
+<http://example.org/s1> <http://example.org/p> "ñandú multibyte ♪" .
+
+_:b1 <http://example.org/p> _:b2 .
+_:b2 <http://example.org/p> "nodo en blanco" .
+<http://example.org/s2> <http://example.org/q> _:b1 .
+<http://example.org/sé> <http://example.org/p> <http://example.org/o2> .
+<http://example.org/s3>	<http://example.org/p>	"tabuladores"	.
+"""
+
+
+def turtle_document(repeat: int) -> str:
+    """Documento Turtle con las construcciones que afectan al troceado en sentencias"""
+    parts = ["""@prefix ex: <http://example.org/ns#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+@base <http://example.org/base/> .
+"""]
+    for i in range(repeat):
+        parts.append(f"""
+# Comentario con . punto y "comillas"
+ex:s{i} a ex:Thing ;
+    ex:name "Nombre {i}. Con punto" , 'simple {i}'@es ;
+    ex:long \"\"\"Varias
+líneas con . punto y "comillas" {i}\"\"\" ;
+    ex:decimal 1.5 , -2.0e3 , {i} ;
+    ex:typed "{i}"^^xsd:integer ;
+    ex:rel <relative-{i}> , ex:with.dot{i} ;
+    ex:list ( ex:a ex:b "c. d" ) ;
+    ex:blank [ ex:p "anidado {i}" ; ex:q [ ex:r ex:s ] ] .
+[] ex:anon "anónimo {i}" .
+ex:esc{i} ex:p "escape \\" y \\\\ ." .
+""")
+    return "".join(parts)
+
+
+def write(tmp_path, name: str, text: str) -> str:
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def assert_parity(path: str, format: str, **kwargs):
+    expected = Graph().parse(path, format=format)
+    graph = Graph()
+    ingest(graph, path, verbose=False, **kwargs)
+    assert len(graph) == len(expected)
+    assert isomorphic(graph, expected)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_bundled_owl(monkeypatch, chunk_size):
+    monkeypatch.setattr(ingest_module, "CHUNK_SIZE", chunk_size)
+    assert_parity(BUNDLED_OWL, "xml")
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_rdfxml_features(monkeypatch, tmp_path, chunk_size):
+    monkeypatch.setattr(ingest_module, "CHUNK_SIZE", chunk_size)
+    assert_parity(write(tmp_path, "features.rdf", RDFXML_FEATURES), "xml", batch_size=5)
+
+
+@pytest.mark.parametrize("workers", (1, 3))
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_ntriples(monkeypatch, tmp_path, chunk_size, workers):
+    monkeypatch.setattr(ingest_module, "CHUNK_SIZE", chunk_size)
+    # Con batch_size=1 cada proceso recibe rangos de ~100 bytes
+    assert_parity(write(tmp_path, "data.nt", NTRIPLES * 3), "nt", batch_size=1, workers=workers)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_turtle(monkeypatch, tmp_path, chunk_size):
+    monkeypatch.setattr(ingest_module, "CHUNK_SIZE", chunk_size)
+    assert_parity(write(tmp_path, "data.ttl", turtle_document(20)), "turtle", batch_size=7)
+
+
+def test_malformed_input_raises_ingest_error(tmp_path):
+    for name, text in (
+        ("bad.nt", "<http://example.org/s> <http://example.org/p> .\n"),
+        ("bad.ttl", "@prefix ex: <http://example.org/> .\nex:s ex:p .\n"),
+        ("bad.rdf", "<rdf:RDF xmlns:rdf='http://www.w3.org/1999/02/22-rdf-syntax-ns#'><rdf:Description>"),
+    ):
+        with pytest.raises(ingest_module.IngestError):
+            ingest(Graph(), write(tmp_path, name, text), verbose=False)
@@ -0,0 +1,99 @@
+"""
+Pruebas del backend compartido: índices derivados mapeados frente al backend en memoria
+"""
+
+import os
+import shutil
+
+import pytest
+
+from app.facets import FacetFilters
+from app.ontology import ENTITY_TYPES, OntologyService, local_name
+from app.store import ReadOnlyStoreError
+
+BUNDLED_OWL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "music-ontology.owl")
+
+
+def sorted_ties(facets):
+    """Valores de cada faceta con los empates de recuento en orden de valor (el desempate no está definido)"""
+    return {
+        name: sorted(values, key=lambda value: (-value["count"], str(value.get("value", value.get("min")))))
+        for name, values in facets.items()
+    }
+
+
+@pytest.fixture(scope="module")
+def services(tmp_path_factory):
+    """Servicio en memoria y servicio compartido sobre una copia de la ontología"""
+    directory = tmp_path_factory.mktemp("shared")
+    source = str(directory / "music-ontology.owl")
+    shutil.copy(BUNDLED_OWL, source)
+    snapshot = str(directory / "music-ontology.owl.snapshot")
+    # El compartido escribe el snapshot y el de memoria lo carga: los valores
+    # múltiples (instrumentos) siguen el mismo orden en ambos
+    shared = OntologyService(source, snapshot_path=snapshot, store_backend="shared")
+    memory = OntologyService(source, snapshot_path=snapshot)
+    return memory, shared
+
+
+def test_shared_indexes_match_memory(services):
+    memory, shared = services
+    for entity_type in ENTITY_TYPES:
+        assert shared.list_entities(entity_type) == memory.list_entities(entity_type)
+        assert list(shared.iter_entity_json(entity_type)) == list(memory.iter_entity_json(entity_type))
+
+        page, pagination = memory.list_entities(entity_type, limit=3)
+        assert shared.list_entities(entity_type, limit=3) == (page, pagination)
+        cursor = pagination["next_cursor"]
+        assert shared.list_entities(entity_type, limit=3, cursor=cursor) == \
+            memory.list_entities(entity_type, limit=3, cursor=cursor)
+
+        for item in page:
+            entity_id = local_name(item["data"]["uri"])
+            assert shared.get_entity(entity_id, entity_type) == memory.get_entity(entity_id, entity_type)
+            for path in ("hasAlbum/containsSong", "^containsSong/^hasAlbum", "usesInstrument", "^hasGenre"):
+                assert shared.traverse(entity_id, path) == memory.traverse(entity_id, path)
+
+    for query in ("a", "ro", "the", "rock", "Björk", "jazz", "zzz"):
+        assert shared.search(query) == memory.search(query)
+        assert shared.search(query, include_description=True) == memory.search(query, include_description=True)
+        assert shared.ranked_search(query) == memory.ranked_search(query)
+        assert shared.suggest(query) == memory.suggest(query)
+
+    filters = FacetFilters(terms={"genre": ["genre-rock", "genre-jazz"]}, ranges={"year": (1960, 1990)})
+    memory_page = memory.faceted_list("album", filters=filters, facets=True)
+    shared_page = shared.faceted_list("album", filters=filters, facets=True)
+    assert shared_page[:2] == memory_page[:2]
+    assert sorted_ties(shared_page[2]) == sorted_ties(memory_page[2])
+
+    assert shared.song_analytics(["genre", "decade"]) == memory.song_analytics(["genre", "decade"])
+    assert shared.get_ontology_stats() == memory.get_ontology_stats()
+
+
+def test_derived_file_is_reused_and_rebuilt_when_stale(services, tmp_path):
+    memory, shared = services
+    derived = shared.snapshot_path + ".idx"
+    written = os.stat(derived).st_mtime_ns
+
+    OntologyService(shared.ontology_path, snapshot_path=shared.snapshot_path, store_backend="shared")
+    assert os.stat(derived).st_mtime_ns == written
+
+    # Un OWL distinto regenera el snapshot y, con él, los índices derivados
+    source = str(tmp_path / "music-ontology.owl")
+    with open(BUNDLED_OWL, encoding="utf-8") as f:
+        document = f.read()
+    with open(source, "w", encoding="utf-8") as f:
+        f.write(document.replace("Reina del Soul", "Reina del soul"))
+    snapshot = str(tmp_path / "music-ontology.owl.snapshot")
+    shutil.copy(shared.snapshot_path, snapshot)
+    shutil.copy(derived, snapshot + ".idx")
+
+    rebuilt = OntologyService(source, snapshot_path=snapshot, store_backend="shared")
+    assert rebuilt.get_entity("artist-aretha-franklin")["description"] == "Reina del soul"
+    assert rebuilt.search("reina del soul", include_description=True)
+
+
+def test_shared_backend_is_read_only(services):
+    _, shared = services
+    with pytest.raises(ReadOnlyStoreError):
+        shared.apply_delta([], [])
@@ -1,6 +1,8 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { Search, Users, Disc3, Music, Zap, Tag } from 'lucide-react';
 import styles from '../styles/SearchBar.module.css';
+import { apiService } from '../services/api';
+import type { Suggestion } from '../types';
 
 interface SearchBarProps {
   onSearch: (query: string, filter: string) => void;
@@ -18,6 +20,27 @@ interface FilterOption {
 export const SearchBar: React.FC<SearchBarProps> = ({ onSearch, isLoading }) => {
   const [query, setQuery] = useState('');
   const [filter, setFilter] = useState<FilterType>('all');
+  const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
+
+  // Autocompletado con un pequeño retardo entre pulsaciones
+  useEffect(() => {
+    const prefix = query.trim();
+    if (!prefix) {
+      setSuggestions([]);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      const results = await apiService.suggest(prefix);
+      if (!cancelled) {
+        setSuggestions(results);
+      }
+    }, 150);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [query]);
 
   const handleSearch = (e: React.FormEvent) => {
     e.preventDefault();
@@ -46,7 +69,14 @@ export const SearchBar: React.FC<SearchBarProps> = ({ onSearch, isLoading }) =>
             value={query}
             onChange={(e) => setQuery(e.target.value)}
             disabled={isLoading}
+            list="search-suggestions"
+            autoComplete="off"
           />
+          <datalist id="search-suggestions">
+            {suggestions.map((suggestion) => (
+              <option key={`${suggestion.type}-${suggestion.uri}`} value={suggestion.name} />
+            ))}
+          </datalist>
           <button
             type="submit"
             className={styles['search-button']}
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { SearchResult, ApiResponse } from '../types';
+import type { SearchResult, RankedSearchResult, Suggestion, ApiResponse, BatchRequest, BatchResponse } from '../types';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
@@ -36,6 +36,34 @@ export const apiService = {
     }
   },
 
+  // Búsqueda por nombre ordenada por relevancia (tolera acentos y erratas)
+  rankedSearch: async (query: string, limit = 10): Promise<RankedSearchResult[]> => {
+    try {
+      const response = await api.get<ApiResponse<RankedSearchResult[]>>(
+        '/api/search/ranked',
+        { params: { q: query, limit } }
+      );
+      return response.data.data;
+    } catch (error) {
+      console.error('Ranked search error:', error);
+      throw error;
+    }
+  },
+
+  // Autocompletado por prefijo (solo nombre, tipo y URI)
+  suggest: async (prefix: string, limit = 8): Promise<Suggestion[]> => {
+    try {
+      const response = await api.get<ApiResponse<Suggestion[]>>(
+        '/api/suggest',
+        { params: { prefix, limit } }
+      );
+      return response.data.data;
+    } catch (error) {
+      console.error('Suggest error:', error);
+      return [];
+    }
+  },
+
   // Obtener todos los artistas
   getArtists: async (): Promise<SearchResult[]> => {
     try {
@@ -199,6 +227,20 @@ export const apiService = {
     }
   },
 
+  // Resolver varias entidades y relaciones en una sola petición
+  batch: async (request: BatchRequest): Promise<BatchResponse> => {
+    try {
+      const response = await api.post<ApiResponse<BatchResponse>>(
+        '/api/batch',
+        request
+      );
+      return response.data.data;
+    } catch (error) {
+      console.error('Batch error:', error);
+      throw error;
+    }
+  },
+
   // Obtener géneros por artista
   getGenresByArtist: async (artistUri: string): Promise<SearchResult[]> => {
     try {
@@ -44,8 +44,60 @@ export interface SearchResult {
   data: Artist | Album | Song | Instrument | Genre;
 }
 
+export interface RankedSearchResult extends SearchResult {
+  score: number;
+  match: 'exact' | 'prefix' | 'token' | 'fuzzy';
+}
+
+export interface Suggestion {
+  uri: string;
+  name: string;
+  type: SearchResult['type'];
+}
+
+export interface Pagination {
+  limit?: number | null;
+  total: number;
+  next_cursor?: string | null;
+  has_more: boolean;
+}
+
 export interface ApiResponse<T> {
   success: boolean;
   data: T;
   error?: string;
+  message?: string;
+  pagination?: Pagination;
+}
+
+export type BatchRelation =
+  | 'albums_by_artist'
+  | 'songs_by_album'
+  | 'songs_by_artist'
+  | 'songs_by_instrument'
+  | 'genres_by_artist';
+
+export interface BatchRequest {
+  entities?: { id: string; type?: SearchResult['type'] }[];
+  relations?: { relation: BatchRelation; id: string }[];
+}
+
+export interface BatchEntityResult {
+  id: string;
+  type?: SearchResult['type'] | null;
+  found: boolean;
+  data?: Artist | Album | Song | Instrument | Genre;
+  error?: string;
+}
+
+export interface BatchRelationResult {
+  relation: BatchRelation;
+  id: string;
+  data?: SearchResult[];
+  error?: string;
+}
+
+export interface BatchResponse {
+  entities: BatchEntityResult[];
+  relations: BatchRelationResult[];
 }